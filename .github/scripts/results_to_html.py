@@ -13,6 +13,10 @@ os.makedirs(output_dir, exist_ok=True)
 
 DATA_FILES = [
     ('person_alias.json.gz', '人物别名数据（wikiPersonAlias 用户脚本用）'),
+    ('person_alias.json.zst', '人物别名数据（zstd 压缩，内容同上）'),
+    ('person_alias.bin', '人物别名二进制索引（有序键表，可 mmap 后二分查找，格式见 alias_index.py）'),
+    ('person-alias', '人物别名分片与清单（按需加载，每个分片附布隆过滤器文件，格式见 alias_shards.py）'),
+    ('dup_order_state.json', '同名人物组序号状态（find_dup_person_name.py --order-state，下一期沿用）'),
     ('missing-cn-name-person.csv', '可自动转换简体中文名的人物列表'),
     ('missing-cn-name-character.csv', '可自动转换简体中文名的角色列表'),
 ]
@@ -105,16 +109,30 @@ if os.path.exists(txt_src):
 data_links = []
 for name, desc in DATA_FILES:
     src = os.path.join(results_dir, name)
-    if name == 'person_alias.json.gz':
+    if name in ('person_alias.json.gz', 'person_alias.json.zst', 'person_alias.bin', 'person-alias',
+                'dup_order_state.json'):
         src = name
     if not os.path.exists(src):
         continue
     dst = os.path.join(output_dir, name)
+    if os.path.isdir(src):
+        shutil.copytree(src, dst, dirs_exist_ok=True)
+        data_links.append((f'{name}/manifest.json', desc))
+        continue
     shutil.copy(src, dst)
     data_links.append((name, desc))
 if data_links:
-    with open(os.path.join(output_dir, 'data_version.txt'), 'w') as f:
-        f.write(datetime.datetime.now().strftime('%Y-%m-%d'))
+    if os.path.exists('data_version.txt'):
+        # 版本链由 person_reports.py --alias-delta-dir 维护，链中的增量补丁一并发布
+        shutil.copy('data_version.txt', os.path.join(output_dir, 'data_version.txt'))
+        with open('data_version.txt') as f:
+            for line in f.readlines()[1:]:
+                parts = line.split()
+                if len(parts) >= 2 and os.path.exists(parts[1]):
+                    shutil.copy(parts[1], os.path.join(output_dir, parts[1]))
+    else:
+        with open(os.path.join(output_dir, 'data_version.txt'), 'w') as f:
+            f.write(datetime.datetime.now().strftime('%Y-%m-%d'))
     print(f"已复制 {len(data_links)} 个数据文件到 _site/")
 
 idx_body = ['<h1>Bangumi 筛选结果</h1>',
@@ -0,0 +1,155 @@
+"""人物别名的跨期稳定下标与增量补丁，客户端已是上一期数据时只需下载补丁。
+
+- stabilize：以上一期 person_alias.json 为基准重排本期结果，已有人物保持原下标，新人物追加在末尾；
+  已从 Archive 删除的人物在原位留下空条目 ``[]``（不再有别名指向它），以免后面的下标整体前移，
+  其名称和 ID 不再出现在新一期的文件中。空位不复用：同一 ID 重新出现时作为新人物追加。
+  各别名的人物下标列表按下标升序排列，使补丁应用后的结果与全量文件完全一致。
+- make_delta / apply_delta：两期之间新增、变更的人物条目，以及新增、删除的 别名→人物 对。
+- 版本链写在 data_version.txt：首行为当前版本，其后每行 ``<旧版本> <补丁文件>``，
+  该补丁把旧版本升级到上一行的版本。客户端在链中找到本地版本后，从该行起向上依次应用补丁；
+  找不到（过旧或从未导入）时下载全量文件。
+
+补丁格式（person_alias.delta.<旧版本>.json）:
+
+    {
+      "version": 1,
+      "from": "2026-10-11",
+      "to": "2026-10-18",
+      "persons": [[index, name, id], ...],   # 新增或名称变更的人物；[index] 为已删除的人物（该位置置为 []）
+      "add": {"别名键": [index, ...]},        # 新增的 别名→人物 对
+      "remove": {"别名键": [index, ...]}      # 删除的 别名→人物 对；别名不再指向任何人物时即删除该别名
+    }
+"""
+
+import datetime
+import gzip
+import json
+import os
+import re
+
+DELTA_VERSION = 1
+VERSION_FILE = 'data_version.txt'
+DEFAULT_KEEP = 8
+_DELTA_FILE = re.compile(r'person_alias\.delta\.[\w.-]+\.json')
+
+
+def delta_file_name(from_version):
+    return f'person_alias.delta.{from_version}.json'
+
+
+def load_mapping(path):
+    """读取 person_alias.json（或 .json.gz）。"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def stabilize(mapping, previous):
+    """按上一期 [persons, aliases] 的人物下标重排本期结果，返回新的 [persons, aliases]。"""
+    persons, aliases = mapping
+    old_persons = previous[0]
+    stable = [[] for _ in old_persons]
+    id_to_index = {p[1]: i for i, p in enumerate(old_persons) if p}
+    remap = []
+    for name, person_id in persons:
+        i = id_to_index.get(person_id)
+        if i is None:
+            i = id_to_index[person_id] = len(stable)
+            stable.append([name, person_id])
+        else:
+            stable[i] = [name, person_id]
+        remap.append(i)
+    return [stable, {alias: sorted(remap[i] for i in indices) for alias, indices in aliases.items()}]
+
+
+def make_delta(old, new, from_version, to_version):
+    """old → new 的补丁；new 须由 stabilize 生成（old 的人物下标在 new 中不变）。"""
+    old_persons, old_aliases = old
+    new_persons, new_aliases = new
+    persons = [[i, *p] for i, p in enumerate(new_persons)
+               if i >= len(old_persons) or list(old_persons[i]) != p]
+    add, remove = {}, {}
+    for alias, indices in new_aliases.items():
+        before = set(old_aliases.get(alias, ()))
+        added = [i for i in indices if i not in before]
+        if added:
+            add[alias] = added
+    for alias, indices in old_aliases.items():
+        after = set(new_aliases.get(alias, ()))
+        removed = sorted(i for i in indices if i not in after)
+        if removed:
+            remove[alias] = removed
+    return {'version': DELTA_VERSION, 'from': from_version, 'to': to_version,
+            'persons': persons, 'add': add, 'remove': remove}
+
+
+def apply_delta(mapping, delta):
+    """把补丁应用到 [persons, aliases]（原地修改并返回）。"""
+    persons, aliases = mapping
+    for index, *person in delta['persons']:
+        persons.extend([[]] * (index + 1 - len(persons)))
+        persons[index] = person
+    for alias, removed in delta['remove'].items():
+        left = [i for i in aliases.get(alias, ()) if i not in set(removed)]
+        if left:
+            aliases[alias] = left
+        else:
+            aliases.pop(alias, None)
+    for alias, added in delta['add'].items():
+        aliases[alias] = sorted(set(aliases.get(alias, ())).union(added))
+    return mapping
+
+
+def read_chain(path):
+    """读取版本链，返回 (当前版本, [(旧版本, 补丁文件), ...])；文件不存在时为 (None, [])。"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = [ln.split() for ln in f if ln.strip()]
+    except FileNotFoundError:
+        return None, []
+    if not lines:
+        return None, []
+    return lines[0][0], [(ln[0], ln[1]) for ln in lines[1:] if len(ln) >= 2]
+
+
+def next_version(used, today=None):
+    """本期版本号：当天日期；当天已有版本（在 used 中）时加序号后缀（2026-10-18-2）。"""
+    day = (today or datetime.date.today()).isoformat()
+    version, n = day, 1
+    while version in used:
+        n += 1
+        version = f'{day}-{n}'
+    return version
+
+
+def write_delta(mapping, previous, out_dir, version=None, keep=DEFAULT_KEEP):
+    """以 out_dir/data_version.txt 中的上一期版本为起点写出补丁并更新版本链，返回本期版本。
+
+    previous 为上一期 [persons, aliases]。链中补丁文件已不在 out_dir 的旧版本（及更早的）被截断，
+    保证链上每一步都可下载；最多保留 keep 个补丁。
+    """
+    version_path = os.path.join(out_dir, VERSION_FILE)
+    prev_version, chain = read_chain(version_path)
+    version = version or next_version({prev_version, *(v for v, _ in chain)})
+    entries = []
+    if prev_version and prev_version != version:
+        delta = make_delta(previous, mapping, prev_version, version)
+        name = delta_file_name(prev_version)
+        with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(delta, f, ensure_ascii=False, separators=(',', ':'))
+        entries.append((prev_version, name))
+        for old_version, old_name in chain:
+            if (len(entries) >= keep or old_version == version
+                    or not os.path.exists(os.path.join(out_dir, old_name))):
+                break
+            entries.append((old_version, old_name))
+
+    with open(version_path, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+        for old_version, name in entries:
+            f.write(f'{old_version} {name}\n')
+    live = {name for _, name in entries}
+    for name in os.listdir(out_dir):
+        if _DELTA_FILE.fullmatch(name) and name not in live:
+            os.remove(os.path.join(out_dir, name))
+    return version
@@ -0,0 +1,228 @@
+"""人物别名的紧凑二进制索引（person_alias.bin），与 person_alias.json 内容相同。
+
+别名键按 UTF-8 字节序排成有序字符串表，每个别名对应的人物下标存为定长整数数组，
+各部分用偏移表定位。读取方可以直接 mmap 文件并二分查找，不需要先解析整个文件、建立哈希表。
+
+文件布局（小端序，各节起始按 4 字节对齐，节之间用 0 填充）:
+
+    头部 32 字节:
+        magic        8 字节  b'BGMALIAS'
+        version      uint32  FORMAT_VERSION
+        persons      uint32  人物数 P
+        aliases      uint32  别名数 A
+        postings     uint32  人物下标总数 N
+        names_len    uint32  人物名字节数
+        keys_len     uint32  别名键字节数
+    person_ids       uint32[P]     人物 ID；0 为已删除人物留下的空位（见 alias_delta.py，名称为空，不被任何别名引用）
+    name_offsets     uint32[P+1]   第 i 个人物名为 names[name_offsets[i]:name_offsets[i+1]]
+    names            bytes         人物名（UTF-8）
+    key_offsets      uint32[A+1]   第 j 个别名键为 keys[key_offsets[j]:key_offsets[j+1]]
+    keys             bytes         别名键（UTF-8，已归一化，按字节序升序）
+    posting_offsets  uint32[A+1]   第 j 个别名的人物下标为 postings[posting_offsets[j]:posting_offsets[j+1]]
+    postings         uint32[N]     人物下标（指向 person_ids / names）
+
+用法:
+    write_alias_index([persons, aliases], 'person_alias.bin')
+    with AliasIndex('person_alias.bin') as index:
+        index.lookup('みずきなな')   # [(name, id), ...]
+        index.prefix('みずき')       # 键以该前缀开头的 (别名键, [(name, id), ...])
+
+命令行查询（person_alias.py 的 query 子命令，索引由 ``person_alias.py --bin`` 生成）:
+    uv run person_alias.py --bin
+    uv run person_alias.py query みずきなな
+    uv run person_alias.py query --prefix みずき --limit 20
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from name_normalize import normalize_alias
+
+MAGIC = b'BGMALIAS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8s6I')
+
+
+def _u32(values):
+    a = array('I', values)
+    if sys.byteorder != 'little':
+        a.byteswap()
+    return a.tobytes()
+
+
+def _pad(n):
+    return b'\0' * (-n % 4)
+
+
+def write_alias_index(mapping, path):
+    """把 person_alias.py 生成的 [persons, aliases] 写成二进制索引，返回写入字节数。"""
+    persons, aliases = mapping
+    names = [p[0].encode('utf-8') if p else b'' for p in persons]
+    name_offsets = [0]
+    for n in names:
+        name_offsets.append(name_offsets[-1] + len(n))
+
+    entries = sorted((k.encode('utf-8'), v) for k, v in aliases.items())
+    key_offsets = [0]
+    posting_offsets = [0]
+    postings = []
+    for key, indices in entries:
+        key_offsets.append(key_offsets[-1] + len(key))
+        postings.extend(indices)
+        posting_offsets.append(len(postings))
+
+    names_blob = b''.join(names)
+    keys_blob = b''.join(k for k, _ in entries)
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(persons), len(entries), len(postings),
+                    len(names_blob), len(keys_blob)),
+        _u32(p[1] if p else 0 for p in persons),
+        _u32(name_offsets),
+        names_blob, _pad(len(names_blob)),
+        _u32(key_offsets),
+        keys_blob, _pad(len(keys_blob)),
+        _u32(posting_offsets),
+        _u32(postings),
+    ]
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        for part in parts:
+            f.write(part)
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+class _KeyTable:
+    """把有序键表包装成序列，供 bisect 二分查找。"""
+
+    def __init__(self, keys, offsets):
+        self.keys = keys
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.keys[self.offsets[i]:self.offsets[i + 1]])
+
+
+class AliasIndex:
+    """mmap 打开的 person_alias.bin，按需二分查找，不整体解析。"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mm)
+        magic, version, p, a, n, names_len, keys_len = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f'{path} 不是别名索引文件')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'{path} 格式版本 {version} 不受支持（需要 {FORMAT_VERSION}）')
+        if sys.byteorder != 'little':
+            raise ValueError('AliasIndex 只支持小端平台')
+        self.persons, self.aliases, self.postings = p, a, n
+
+        pos = HEADER.size
+        sections = {}
+        for name, size in [('person_ids', 4 * p), ('name_offsets', 4 * (p + 1)), ('names', names_len),
+                           ('key_offsets', 4 * (a + 1)), ('keys', keys_len),
+                           ('posting_offsets', 4 * (a + 1)), ('postings', 4 * n)]:
+            sections[name] = view[pos:pos + size]
+            if len(sections[name]) != size:
+                raise ValueError(f'{path} 已截断')
+            pos += size + (-size % 4)
+        self._person_ids = sections['person_ids'].cast('I')
+        self._name_offsets = sections['name_offsets'].cast('I')
+        self._names = sections['names']
+        self._keys = _KeyTable(sections['keys'], sections['key_offsets'].cast('I'))
+        self._posting_offsets = sections['posting_offsets'].cast('I')
+        self._postings = sections['postings'].cast('I')
+        self._views = [view, *sections.values(), self._person_ids, self._name_offsets,
+                       self._keys.offsets, self._posting_offsets, self._postings]
+
+    def close(self):
+        for v in reversed(self._views):
+            v.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def person(self, i):
+        """第 i 个人物的 (name, id)。"""
+        name = bytes(self._names[self._name_offsets[i]:self._name_offsets[i + 1]]).decode('utf-8')
+        return name, self._person_ids[i]
+
+    def indices(self, key):
+        """已归一化别名键对应的人物下标列表，不存在时为空列表。"""
+        raw = key.encode('utf-8')
+        j = bisect_left(self._keys, raw)
+        if j == len(self._keys) or self._keys[j] != raw:
+            return []
+        return list(self._postings[self._posting_offsets[j]:self._posting_offsets[j + 1]])
+
+    def lookup(self, alias):
+        """按原始别名查询（先归一化），返回 [(name, id), ...]。"""
+        return [self.person(i) for i in self.indices(normalize_alias(alias))]
+
+    def prefix(self, prefix, limit=None):
+        """别名键以 prefix（先归一化）开头的 (别名键, [(name, id), ...])，按键序，最多 limit 个。"""
+        raw = normalize_alias(prefix).encode('utf-8')
+        j = bisect_left(self._keys, raw)
+        end = len(self._keys) if limit is None else min(len(self._keys), j + limit)
+        while j < end:
+            key = self._keys[j]
+            if not key.startswith(raw):
+                break
+            indices = self._postings[self._posting_offsets[j]:self._posting_offsets[j + 1]]
+            yield key.decode('utf-8'), [self.person(i) for i in indices]
+            j += 1
+
+    def items(self):
+        """按键序给出 (别名键, 人物下标列表)。"""
+        for j in range(len(self._keys)):
+            key = self._keys[j].decode('utf-8')
+            yield key, list(self._postings[self._posting_offsets[j]:self._posting_offsets[j + 1]])
+
+
+def query_main(argv=None):
+    """person_alias.py query：在 person_alias.bin 中精确或按前缀查询别名，不加载整个映射。"""
+    parser = argparse.ArgumentParser(prog='person_alias.py query', description='在人物别名二进制索引中查询别名')
+    parser.add_argument('aliases', nargs='+', help='要查询的别名（查询前归一化）')
+    parser.add_argument('--index', default='person_alias.bin',
+                        help='二进制索引路径（默认 person_alias.bin，由 person_alias.py --bin 生成）')
+    parser.add_argument('--prefix', action='store_true', help='按前缀查询，列出所有以其开头的别名')
+    parser.add_argument('--limit', type=int, default=50, help='--prefix 时每个前缀最多列出的别名数（默认 50）')
+    parser.add_argument('--json', action='store_true', help='输出 JSON（{查询: {别名键: [[name, id], ...]}}）')
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.index):
+        parser.error(f'{args.index} 不存在，先运行 person_alias.py --bin 生成')
+
+    results = {}
+    with AliasIndex(args.index) as index:
+        for alias in args.aliases:
+            if args.prefix:
+                results[alias] = dict(index.prefix(alias, args.limit))
+            else:
+                persons = index.lookup(alias)
+                results[alias] = {normalize_alias(alias): persons} if persons else {}
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False))
+        return
+    for alias, matches in results.items():
+        if not matches:
+            print(f'{alias}\t（未找到）')
+        for key, persons in matches.items():
+            for name, person_id in persons:
+                print(f'{key}\t{person_id}\t{name}')
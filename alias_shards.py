@@ -0,0 +1,192 @@
+"""人物别名按哈希分片输出，附带清单（manifest.json）和每个分片的布隆过滤器，供前端按需加载。
+
+别名键（已归一化）的 UTF-8 字节取 32 位 FNV-1a 哈希 h，按 h 所在区间分到 N 个分片之一：
+分片 i 负责 [i * 2^32 / N, (i + 1) * 2^32 / N)。查询方先取清单，算出 h、找到分片，再取该分片的布隆过滤器：
+不命中即可确定别名不存在，不必请求分片；命中才下载这一个分片（有极小概率是误判，分片中查不到即可）。
+清单只记录各分片的区间和文件名，大小与别名数无关；过滤器按分片单独存放，一次查询只下载用到的那一个。
+
+分片文件为紧凑 JSON ``{别名键: [[name, id], ...]}``，不依赖全局人物数组，单独即可回答查询。
+过滤器文件为 m / 8 字节的位数组，位 b 存在第 b >> 3 字节的 1 << (b & 7)。
+文件名以内容哈希结尾（``aliases-003-<sha256 前 12 位>.json``、``bloom-003-<sha256 前 12 位>.bin``，
+即分片序号后接文件内容 SHA-256 的前 12 位），内容不变则文件名不变，可长期缓存。
+
+清单格式:
+
+    {
+      "version": 2,
+      "hash": "fnv1a32",
+      "shards": [
+        {
+          "file": "aliases-000-....json",
+          "hash_range": [lo, hi],     # 负责的哈希区间 [lo, hi)
+          "keys": 1234,               # 别名数
+          "sha256": "...",            # 分片文件内容的 SHA-256
+          "bytes": 56789,
+          "bloom": {"file": "bloom-000-....bin", "m": 位数, "k": 哈希函数个数}
+        },
+        ...
+      ]
+    }
+
+布隆过滤器用双重哈希：h1 = fnv1a32(键)，h2 = fnv1a32(键, FNV_SEED2) | 1，
+第 j 个位为 (h1 + j * h2) mod 2^32 mod m（j = 0..k-1）。
+
+用法:
+    write_alias_shards([persons, aliases], 'person-alias', shards=64)
+    index = ShardedAliases('person-alias')
+    index.lookup('みずきなな')   # [(name, id), ...]
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+
+from name_normalize import normalize_alias
+
+FORMAT_VERSION = 2
+MANIFEST = 'manifest.json'
+DEFAULT_SHARDS = 64
+DEFAULT_FPR = 0.01
+
+FNV_OFFSET = 0x811c9dc5
+FNV_PRIME = 0x01000193
+FNV_SEED2 = 0x5bd1e995
+_SHARD_FILE = re.compile(r'(?:aliases-\d{3}-[0-9a-f]{12}\.json|bloom-\d{3}-[0-9a-f]{12}\.bin)')
+
+
+def fnv1a32(data, seed=FNV_OFFSET):
+    h = seed
+    for b in data:
+        h = ((h ^ b) * FNV_PRIME) & 0xffffffff
+    return h
+
+
+def shard_of(h, shards):
+    """哈希值 h 所在的分片序号（按区间划分，分片 i 负责 [i * 2^32 / N, (i + 1) * 2^32 / N)）。"""
+    return (h * shards) >> 32
+
+
+def _bloom_positions(raw, h1, m, k):
+    h2 = fnv1a32(raw, FNV_SEED2) | 1
+    return [((h1 + j * h2) & 0xffffffff) % m for j in range(k)]
+
+
+def _bloom_size(n, fpr):
+    m = max(8, math.ceil(-n * math.log(fpr) / math.log(2) ** 2))
+    m = -(-m // 8) * 8
+    k = max(1, round(m / max(n, 1) * math.log(2)))
+    return m, k
+
+
+def write_alias_shards(mapping, out_dir, shards=DEFAULT_SHARDS, fpr=DEFAULT_FPR):
+    """把 [persons, aliases] 写成 out_dir 下的分片与清单，返回清单 dict。
+
+    先写分片和过滤器、最后替换清单，读取方不会看到指向不存在文件的清单；旧的、不再被引用的文件随后删除。
+    """
+    if not 1 <= shards <= 1000:
+        raise ValueError(f'分片数须在 1..1000 之间: {shards}')
+    persons, aliases = mapping
+    os.makedirs(out_dir, exist_ok=True)
+
+    buckets = [[] for _ in range(shards)]
+    for key in aliases:
+        raw = key.encode('utf-8')
+        h = fnv1a32(raw)
+        buckets[shard_of(h, shards)].append((key, raw, h))
+
+    entries = []
+    for i, bucket in enumerate(buckets):
+        bucket.sort()
+        body = {key: [persons[p] for p in aliases[key]] for key, _, _ in bucket}
+        data = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        name = _write_content(out_dir, f'aliases-{i:03d}', '.json', data, digest)
+
+        m, k = _bloom_size(len(bucket), fpr)
+        bits = bytearray(m // 8)
+        for _, raw, h in bucket:
+            for b in _bloom_positions(raw, h, m, k):
+                bits[b >> 3] |= 1 << (b & 7)
+        bloom_name = _write_content(out_dir, f'bloom-{i:03d}', '.bin', bytes(bits))
+        entries.append({
+            'file': name,
+            'hash_range': [-(-(i << 32) // shards), -(-((i + 1) << 32) // shards)],
+            'keys': len(bucket),
+            'sha256': digest,
+            'bytes': len(data),
+            'bloom': {'file': bloom_name, 'm': m, 'k': k},
+        })
+
+    manifest = {'version': FORMAT_VERSION, 'hash': 'fnv1a32', 'shards': entries}
+    tmp = os.path.join(out_dir, MANIFEST + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+    live = {e['file'] for e in entries} | {e['bloom']['file'] for e in entries}
+    for name in os.listdir(out_dir):
+        if _SHARD_FILE.fullmatch(name) and name not in live:
+            os.remove(os.path.join(out_dir, name))
+    return manifest
+
+
+def _write_content(out_dir, stem, suffix, data, digest=None):
+    """以内容哈希命名写出 data（已存在则不重写），返回文件名。"""
+    digest = digest or hashlib.sha256(data).hexdigest()
+    name = f'{stem}-{digest[:12]}{suffix}'
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    return name
+
+
+class ShardedAliases:
+    """按清单查询分片目录：用到的分片的布隆过滤器判定不存在时不读分片，读过的过滤器和分片缓存在内存中。"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f'{out_dir} 清单格式版本 {manifest.get("version")} 不受支持（需要 {FORMAT_VERSION}）')
+        self.shards = manifest['shards']
+        self._bloom = {}
+        self._loaded = {}
+        self.fetches = 0
+        self.bloom_fetches = 0
+
+    def _bloom_bits(self, i):
+        if i not in self._bloom:
+            with open(os.path.join(self.out_dir, self.shards[i]['bloom']['file']), 'rb') as f:
+                self._bloom[i] = f.read()
+            self.bloom_fetches += 1
+        return self._bloom[i]
+
+    def might_contain(self, key):
+        """布隆过滤器判定：False 表示已归一化的别名键一定不存在。"""
+        raw = key.encode('utf-8')
+        h = fnv1a32(raw)
+        i = shard_of(h, len(self.shards))
+        bloom, bits = self.shards[i]['bloom'], self._bloom_bits(i)
+        return all(bits[b >> 3] >> (b & 7) & 1 for b in _bloom_positions(raw, h, bloom['m'], bloom['k']))
+
+    def _shard(self, i):
+        if i not in self._loaded:
+            with open(os.path.join(self.out_dir, self.shards[i]['file']), encoding='utf-8') as f:
+                self._loaded[i] = json.load(f)
+            self.fetches += 1
+        return self._loaded[i]
+
+    def get(self, key):
+        """已归一化别名键对应的 [[name, id], ...]，不存在时为空列表。"""
+        if not self.might_contain(key):
+            return []
+        return self._shard(shard_of(fnv1a32(key.encode('utf-8')), len(self.shards))).get(key, [])
+
+    def lookup(self, alias):
+        """按原始别名查询（先归一化），返回 [(name, id), ...]。"""
+        return [tuple(p) for p in self.get(normalize_alias(alias))]
@@ -0,0 +1,265 @@
+"""Archive jsonlines 的列式本地缓存。
+
+每个脚本用 Projection 声明自己要的列，首次运行时解析原始 jsonlines 并把这些列写成
+紧凑的二进制列文件，之后只要源文件未变就直接读取缓存，不再解析 JSON。
+
+缓存按源文件内容寻址：目录名取自源文件的 SHA-256，另存一份指针记录源文件的
+大小、mtime 和哈希。指针按源文件的绝对路径区分（文件名后附路径哈希），不同目录下的同名
+文件（本期与上一期 Archive、合成数据）各有各的指针。大小与 mtime 未变时直接使用指针；
+否则重新计算哈希，哈希相同的缓存（例如重新下载了同一份 Archive）仍然有效。压缩或 zip 内的
+数据源按解压后的内容计算哈希。
+指针指向新的哈希或投影升级版本后，该数据源原先引用的条目若不再被任何指针引用随即删除，
+缓存目录不会逐周增长；其他数据源的条目不受影响。
+
+列类型:
+    'i'  整数（int64），缺失或 null 读回 None
+    'b'  布尔，缺失或 null 读回 None
+    's'  字符串（UTF-8 + 偏移表），缺失或 null 读回 ''
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from array import array
+
+from archive_scan import DEFAULT_WORKERS, iter_chunks, scan, source_stat
+
+DEFAULT_CACHE_DIR = '.cache/archive'
+
+INT_NULL = -2 ** 63
+BOOL_NULL = -1
+
+
+class Column:
+    def __init__(self, name, kind, get=None):
+        """get(obj) 返回列值，默认取 obj.get(name)；需可 pickle（模块级函数），以便并行构建。"""
+        if kind not in ('i', 'b', 's'):
+            raise ValueError(f'未知列类型: {kind}')
+        self.name = name
+        self.kind = kind
+        self.get = get
+
+    def value(self, obj):
+        v = self.get(obj) if self.get else obj.get(self.name)
+        if v is None and self.kind == 's':
+            return ''
+        return v
+
+
+class Projection:
+    def __init__(self, name, version, columns, keep=None, prefilter=None):
+        """keep(obj) 为 False 的记录不进入缓存；version 在列的含义变化时递增以作废旧缓存。
+
+        prefilter 同 ArchiveScanner 消费者的 prefilter，只能拒绝 keep 也会拒绝的行。
+        """
+        self.name = name
+        self.version = version
+        self.columns = columns
+        self.keep = keep
+        self.prefilter = prefilter
+
+    @property
+    def key(self):
+        return f'{self.name}-v{self.version}'
+
+
+class ColumnBuilder:
+    """按 Projection 收集列值，供 ArchiveScanner 调用。"""
+
+    def __init__(self, projection):
+        self.projection = projection
+        self.prefilter = projection.prefilter
+        self.values = {c.name: [] for c in projection.columns}
+
+    def feed(self, ln, obj):
+        if self.projection.keep and not self.projection.keep(obj):
+            return
+        for c in self.projection.columns:
+            self.values[c.name].append(c.value(obj))
+
+    def merge(self, other):
+        for name, vals in other.values.items():
+            self.values[name].extend(vals)
+
+
+class Table:
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    for chunk in iter_chunks(path):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def load_table(source, projection, cache_dir=DEFAULT_CACHE_DIR, workers=DEFAULT_WORKERS):
+    """返回 source 按 projection 投影后的 Table，缓存有效时直接读取，否则解析并写入缓存。
+
+    cache_dir 为 None 时不使用缓存。
+    """
+    if cache_dir is None:
+        return _build(source, projection, workers)
+
+    size, mtime_ns = source_stat(source)
+    pointer_base = _pointer_base(source)
+    pointer_path = os.path.join(cache_dir, f'{pointer_base}.{projection.key}.json')
+    pointer = _read_json(pointer_path)
+    if pointer and pointer['size'] == size and pointer['mtime_ns'] == mtime_ns:
+        digest = pointer['sha256']
+    else:
+        digest = file_sha256(source)
+
+    entry_dir = os.path.join(cache_dir, f'{digest[:16]}-{projection.key}')
+    manifest = _read_json(os.path.join(entry_dir, 'manifest.json'))
+    if manifest and manifest['sha256'] == digest:
+        table = _read_entry(entry_dir, manifest)
+        print(f'已从缓存加载 {source}（{table.rows} 行，{entry_dir}）', file=sys.stderr)
+    else:
+        table = _build(source, projection, workers)
+        _write_entry(entry_dir, projection, digest, table)
+        print(f'已写入缓存 {entry_dir}', file=sys.stderr)
+
+    if not pointer or pointer.get('sha256') != digest or pointer['mtime_ns'] != mtime_ns:
+        _write_json(pointer_path, {'size': size, 'mtime_ns': mtime_ns, 'sha256': digest})
+        if not pointer or pointer.get('sha256') != digest:
+            _prune(cache_dir, pointer_base, projection, pointer)
+    return table
+
+
+def _pointer_base(source):
+    """指针文件名前缀：源文件名加其绝对路径的短哈希。"""
+    path_hash = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:12]
+    return f'{os.path.basename(source)}-{path_hash}'
+
+
+def _prune(cache_dir, pointer_base, projection, previous):
+    """删除被本数据源取代的缓存：本数据源同名投影旧版本的指针（含只按文件名命名的旧式指针），
+    以及上一次指针和这些旧指针引用过、现已无任何指针引用的条目。"""
+    stale = set()
+    if previous and previous.get('sha256'):
+        stale.add(f"{previous['sha256'][:16]}-{projection.key}")
+    base = pointer_base.rpartition('-')[0]
+    old_pointer = re.compile(f'(?:{re.escape(pointer_base)}|{re.escape(base)})'
+                             + re.escape(f'.{projection.name}-v') + r'\d+\.json')
+    referenced = set()
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.json'):
+            continue
+        key = name[:-5].rpartition('.')[2]
+        pointer = _read_json(os.path.join(cache_dir, name))
+        if not pointer or 'sha256' not in pointer:
+            continue
+        entry = f"{pointer['sha256'][:16]}-{key}"
+        if old_pointer.fullmatch(name) and name != f'{pointer_base}.{projection.key}.json':
+            os.remove(os.path.join(cache_dir, name))
+            stale.add(entry)
+        else:
+            referenced.add(entry)
+    for name in sorted(stale - referenced):
+        entry_dir = os.path.join(cache_dir, name)
+        if os.path.isdir(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            print(f'已删除过期缓存 {entry_dir}', file=sys.stderr)
+
+
+def _build(source, projection, workers):
+    builder, = scan(source, ColumnBuilder(projection), workers=workers)
+    columns = builder.values
+    rows = len(next(iter(columns.values()))) if columns else 0
+    return Table(rows, columns)
+
+
+def _write_entry(entry_dir, projection, digest, table):
+    parent = os.path.dirname(entry_dir) or '.'
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        for c in projection.columns:
+            _write_column(os.path.join(tmp, c.name), c.kind, table[c.name])
+        _write_json(os.path.join(tmp, 'manifest.json'), {
+            'sha256': digest,
+            'projection': projection.key,
+            'rows': table.rows,
+            'columns': {c.name: c.kind for c in projection.columns},
+        })
+        if os.path.isdir(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp, entry_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _write_column(base, kind, values):
+    if kind == 'i':
+        data = array('q', (INT_NULL if v is None else v for v in values))
+        with open(base + '.bin', 'wb') as f:
+            data.tofile(f)
+    elif kind == 'b':
+        data = array('b', (BOOL_NULL if v is None else int(bool(v)) for v in values))
+        with open(base + '.bin', 'wb') as f:
+            data.tofile(f)
+    else:
+        offsets = array('q', [0])
+        with open(base + '.bin', 'wb') as f:
+            pos = 0
+            for v in values:
+                b = (v or '').encode('utf-8')
+                f.write(b)
+                pos += len(b)
+                offsets.append(pos)
+        with open(base + '.off', 'wb') as f:
+            offsets.tofile(f)
+
+
+def _read_entry(entry_dir, manifest):
+    rows = manifest['rows']
+    columns = {}
+    for name, kind in manifest['columns'].items():
+        columns[name] = _read_column(os.path.join(entry_dir, name), kind, rows)
+    return Table(rows, columns)
+
+
+def _read_column(base, kind, rows):
+    if kind == 's':
+        offsets = array('q')
+        with open(base + '.off', 'rb') as f:
+            offsets.fromfile(f, rows + 1)
+        with open(base + '.bin', 'rb') as f:
+            blob = f.read()
+        return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(rows)]
+    data = array('q' if kind == 'i' else 'b')
+    with open(base + '.bin', 'rb') as f:
+        data.fromfile(f, rows)
+    null = INT_NULL if kind == 'i' else BOOL_NULL
+    if kind == 'b':
+        return [None if v == null else bool(v) for v in data]
+    if null in data:
+        return [None if v == null else v for v in data]
+    return data
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, obj):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
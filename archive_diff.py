@@ -0,0 +1,327 @@
+# /// script
+# requires-python = ">=3.10"
+# ///
+"""比较两期 Archive，输出各实体新增、删除、修改的 ID 集合，以及关联表变动涉及的端点。
+
+每个文件在一次流式扫描中为每条记录计算内容哈希（原始行的 64 位 BLAKE2b），
+按键排序后存为索引文件；排序采用外部归并（分段排序写入临时文件，再 heapq.merge），
+内存占用与文件大小无关。两期索引同样按序归并比较，因此对比本身也只需常数内存。
+
+- subject / person / character 以 id 为键，哈希不同即为修改
+- 关联表以整行哈希为键，只有新增和删除两种变动（修改表现为删旧增新），
+  同时汇总变动行两端涉及的条目、人物、角色 ID
+
+默认与上次运行保存的索引（--state）比较，比较后用本期索引替换；也可用 --old 直接指定上一期数据目录。
+
+用法:
+    uv run archive_diff.py bangumi_archive --output archive_diff.json
+    uv run archive_diff.py bangumi_archive --old bangumi_archive_prev --no-update
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+from archive_scan import open_source, source_exists
+from profiling import Profiler, add_profile_args
+
+DEFAULT_STATE_DIR = '.cache/archive-diff'
+DEFAULT_RUN_SIZE = 500_000
+INDEX_VERSION = 1
+
+
+class EntitySpec:
+    """以 id 为键的实体文件，索引记录为 (id, hash)。"""
+
+    kind = 'entity'
+    fmt = struct.Struct('<qQ')
+
+    def __init__(self, name):
+        self.name = name
+
+    def record(self, obj, digest):
+        obj_id = obj.get('id')
+        if not isinstance(obj_id, int):
+            return None
+        return obj_id, digest
+
+
+class RelationSpec:
+    """关联表，以整行哈希为键，索引记录为 (hash, 端点..., 端点类别)。
+
+    endpoints 为端点字段名；entities 为各端点所属的实体，
+    若端点实体取决于行内字段（如 person-relations 的 person_type），
+    用 entity_field 指定该字段，entities 为 {字段值: 实体元组}。
+    """
+
+    kind = 'relation'
+
+    def __init__(self, name, endpoints, entities, entity_field=None):
+        self.name = name
+        self.endpoints = endpoints
+        self.entity_field = entity_field
+        if entity_field is None:
+            self.groups = [entities]
+        else:
+            self.group_keys = list(entities)
+            self.groups = [entities[k] for k in self.group_keys]
+        self.fmt = struct.Struct('<Q' + 'q' * len(endpoints) + 'B')
+
+    def record(self, obj, digest):
+        values = [obj.get(f) for f in self.endpoints]
+        if not all(isinstance(v, int) for v in values):
+            return None
+        group = 0
+        if self.entity_field is not None:
+            try:
+                group = self.group_keys.index(obj.get(self.entity_field))
+            except ValueError:
+                return None
+        return (digest, *values, group)
+
+
+SPECS = [
+    EntitySpec('subject'),
+    EntitySpec('person'),
+    EntitySpec('character'),
+    RelationSpec('subject-relations', ('subject_id', 'related_subject_id'), ('subject', 'subject')),
+    RelationSpec('subject-persons', ('subject_id', 'person_id'), ('subject', 'person')),
+    RelationSpec('subject-characters', ('subject_id', 'character_id'), ('subject', 'character')),
+    RelationSpec('person-characters', ('person_id', 'subject_id', 'character_id'), ('person', 'subject', 'character')),
+    RelationSpec('person-relations', ('person_id', 'related_person_id'),
+                 {'prsn': ('person', 'person'), 'crt': ('character', 'character')}, entity_field='person_type'),
+]
+
+
+def line_digest(line):
+    return int.from_bytes(hashlib.blake2b(line.rstrip(), digest_size=8).digest(), 'little')
+
+
+def build_index(source, spec, out_path, run_size=DEFAULT_RUN_SIZE):
+    """流式扫描 source，写出按键排序的索引文件，返回记录数。"""
+    tmp_dir = tempfile.mkdtemp(prefix='archive-diff-', dir=os.path.dirname(out_path) or '.')
+    runs = []
+    buf = []
+    try:
+        with open_source(source) as f:
+            for ln, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"警告: {source} 第 {ln} 行 JSON 解析失败", file=sys.stderr)
+                    continue
+                rec = spec.record(obj, line_digest(line))
+                if rec is None:
+                    print(f"警告: {source} 第 {ln} 行缺少键字段，已跳过", file=sys.stderr)
+                    continue
+                buf.append(rec)
+                if len(buf) >= run_size:
+                    runs.append(_write_run(tmp_dir, len(runs), spec.fmt, buf))
+                    buf = []
+        buf.sort()
+        if not runs:
+            count = _write_records(out_path, spec.fmt, buf)
+        else:
+            if buf:
+                runs.append(_write_run(tmp_dir, len(runs), spec.fmt, buf))
+            count = _write_records(out_path, spec.fmt, heapq.merge(*(iter_index(p, spec.fmt) for p in runs)))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return count
+
+
+def _write_run(tmp_dir, n, fmt, buf):
+    buf.sort()
+    path = os.path.join(tmp_dir, f'run-{n}.idx')
+    _write_records(path, fmt, buf)
+    return path
+
+
+def _write_records(path, fmt, records):
+    count = 0
+    with open(path, 'wb') as f:
+        pack = fmt.pack
+        for rec in records:
+            f.write(pack(*rec))
+            count += 1
+    return count
+
+
+def iter_index(path, fmt, chunk_records=65536):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(fmt.size * chunk_records)
+            if not chunk:
+                break
+            yield from fmt.iter_unpack(chunk)
+
+
+def diff_entities(old_path, new_path, spec):
+    """按 id 归并两份有序索引，返回 (added, removed, modified) 三个有序 id 列表。"""
+    added, removed, modified = [], [], []
+    old_it = iter_index(old_path, spec.fmt)
+    new_it = iter_index(new_path, spec.fmt)
+    old = next(old_it, None)
+    new = next(new_it, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            removed.append(old[0])
+            old = next(old_it, None)
+        elif old is None or new[0] < old[0]:
+            added.append(new[0])
+            new = next(new_it, None)
+        else:
+            if old[1] != new[1]:
+                modified.append(new[0])
+            old = next(old_it, None)
+            new = next(new_it, None)
+    return added, removed, modified
+
+
+def diff_relations(old_path, new_path, spec):
+    """按整行哈希归并两份有序索引，返回 (新增行数, 删除行数, {实体: 受影响 id 集合})。"""
+    added = removed = 0
+    affected = {}
+
+    def touch(rec):
+        for entity, value in zip(spec.groups[rec[-1]], rec[1:-1]):
+            affected.setdefault(entity, set()).add(value)
+
+    old_it = iter_index(old_path, spec.fmt)
+    new_it = iter_index(new_path, spec.fmt)
+    old = next(old_it, None)
+    new = next(new_it, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old < new):
+            removed += 1
+            touch(old)
+            old = next(old_it, None)
+        elif old is None or new < old:
+            added += 1
+            touch(new)
+            new = next(new_it, None)
+        else:
+            old = next(old_it, None)
+            new = next(new_it, None)
+    return added, removed, affected
+
+
+def read_data_version(archive_dir):
+    try:
+        with open(os.path.join(archive_dir, 'data_version.json'), encoding='utf-8') as f:
+            return json.load(f).get('created_at')
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较两期 Archive，输出各实体与关联表的变动')
+    parser.add_argument('archive_dir', nargs='?', default='bangumi_archive', help='本期数据目录或 Archive zip（默认 bangumi_archive）')
+    parser.add_argument('--old', default=None, metavar='DIR',
+                        help='上一期数据目录或 Archive zip；不指定时与 --state 中保存的索引比较')
+    parser.add_argument('--state', default=DEFAULT_STATE_DIR, help=f'索引保存目录（默认 {DEFAULT_STATE_DIR}）')
+    parser.add_argument('--output', default='archive_diff.json', help='变动结果 JSON（默认 archive_diff.json）')
+    parser.add_argument('--no-update', action='store_true', help='比较后不用本期索引替换 --state 中的索引')
+    parser.add_argument('--run-size', type=int, default=DEFAULT_RUN_SIZE,
+                        help=f'外部排序每段的记录数，决定内存上限（默认 {DEFAULT_RUN_SIZE}）')
+    add_profile_args(parser)
+    args = parser.parse_args()
+    prof = Profiler.from_args(args, os.path.splitext(args.output)[0] + '.profile.json')
+
+    os.makedirs(args.state, exist_ok=True)
+    manifest_path = os.path.join(args.state, 'manifest.json')
+    manifest = _read_json(manifest_path) or {}
+    if manifest.get('index_version') != INDEX_VERSION:
+        manifest = {}
+
+    work_dir = tempfile.mkdtemp(prefix='.work-', dir=args.state)
+    result = {
+        'old_version': read_data_version(args.old) if args.old else manifest.get('data_version'),
+        'new_version': read_data_version(args.archive_dir),
+        'files': {},
+    }
+    new_files = {}
+    try:
+        for spec in SPECS:
+            source = os.path.join(args.archive_dir, f'{spec.name}.jsonlines')
+            if not source_exists(source):
+                print(f'{source} 不存在，跳过', file=sys.stderr)
+                continue
+            new_index = os.path.join(work_dir, f'{spec.name}.idx')
+            with prof.stage(f'index_{spec.name}') as st:
+                total = st.records = build_index(source, spec, new_index, args.run_size)
+            new_files[spec.name] = total
+
+            if args.old:
+                old_source = os.path.join(args.old, f'{spec.name}.jsonlines')
+                old_index = os.path.join(work_dir, f'{spec.name}.old.idx')
+                if source_exists(old_source):
+                    with prof.stage(f'index_old_{spec.name}') as st:
+                        st.records = build_index(old_source, spec, old_index, args.run_size)
+                else:
+                    old_index = None
+            else:
+                old_index = os.path.join(args.state, f'{spec.name}.idx')
+                if spec.name not in manifest.get('files', {}) or not os.path.isfile(old_index):
+                    old_index = None
+
+            entry = {'total': total}
+            if old_index is None:
+                entry['baseline'] = True
+                print(f'{spec.name}: {total} 条，无上一期索引，仅建立基线', file=sys.stderr)
+            elif spec.kind == 'entity':
+                with prof.stage(f'diff_{spec.name}', total):
+                    added, removed, modified = diff_entities(old_index, new_index, spec)
+                entry.update(added=added, removed=removed, modified=modified)
+                print(f'{spec.name}: +{len(added)} -{len(removed)} ~{len(modified)} / {total}', file=sys.stderr)
+            else:
+                with prof.stage(f'diff_{spec.name}', total):
+                    added, removed, affected = diff_relations(old_index, new_index, spec)
+                entry.update(added=added, removed=removed,
+                             affected={k: sorted(v) for k, v in sorted(affected.items())})
+                touched = ', '.join(f'{k} {len(v)}' for k, v in sorted(affected.items()))
+                print(f'{spec.name}: +{added} -{removed} 行 / {total}'
+                      + (f'，涉及 {touched}' if touched else ''), file=sys.stderr)
+            result['files'][spec.name] = entry
+
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+        print(f'结果已保存至 {args.output}', file=sys.stderr)
+
+        if not args.no_update:
+            for name in new_files:
+                os.replace(os.path.join(work_dir, f'{name}.idx'), os.path.join(args.state, f'{name}.idx'))
+            _write_json(manifest_path, {
+                'index_version': INDEX_VERSION,
+                'data_version': result['new_version'],
+                'files': new_files,
+            })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, obj):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""Archive jsonlines 单遍扫描：每行只读取、解码一次，依次分发给所有注册的消费者。
+
+消费者只需实现 ``feed(ln, obj)``，``ln`` 为从 1 开始的行号，``obj`` 为解码后的记录。
+
+消费者可另外声明 ``prefilter(raw) -> bool``，在 ``json.loads`` 之前检查原始字节行：
+返回 False 的行不会交给该消费者；所有消费者都拒绝的行直接跳过解码。prefilter 只能拒绝
+``feed`` 本来也会丢弃的行，拿不准时应返回 True。
+
+并行扫描（workers > 1）时，文件按换行对齐切成若干字节段，每段在子进程中用注册时的
+消费者副本解析，再按段顺序依次 ``merge(other)`` 回主进程的消费者，结果与串行扫描一致。
+因此并行扫描的消费者还需实现 ``merge``，且可被 pickle；注册时应处于初始状态。
+子进程用 spawn 启动（调用方可能在其他线程中同时扫描或转换，fork 有死锁风险），
+消费者的类及其引用的函数须定义在可导入的模块顶层。
+
+数据源除了解压后的 ``.jsonlines``，也可以是同名的 ``.jsonlines.gz`` / ``.jsonlines.zst``，
+或 Archive 下载的 zip 包里的成员（``dump.zip/person.jsonlines``，或数据目录下的
+``archive.zip``）。压缩数据源在后台线程解压，与主线程的解析重叠；只有未压缩文件支持并行扫描。
+
+用法:
+    scanner = ArchiveScanner('bangumi_archive/person.jsonlines', workers=4)
+    dup = scanner.register(DupNameGrouper())
+    alias = scanner.register(AliasBuilder())
+    scanner.run()
+"""
+
+import gzip
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# 小于该大小的文件直接串行扫描，进程池的启动和回传开销不划算
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+# bgq/download-archive.sh 下载的 zip 文件名
+ARCHIVE_ZIP = 'archive.zip'
+
+CHUNK_SIZE = 1 << 20
+
+
+class ArchiveScanner:
+    def __init__(self, path, workers=1):
+        self.path = path
+        self.workers = workers or DEFAULT_WORKERS
+        self.consumers = []
+
+    def register(self, consumer):
+        """注册消费者，返回消费者本身以便链式取用结果。"""
+        self.consumers.append(consumer)
+        return consumer
+
+    def run(self):
+        """扫描整个文件，返回处理的行数。"""
+        kind, file, _ = require_source(self.path)
+        if kind == 'plain' and self.workers > 1 and os.path.getsize(file) >= PARALLEL_MIN_BYTES:
+            return self._run_parallel(file)
+        with open_source(self.path) as f:
+            return _feed_lines(self.path, f, self.consumers, 1, None)
+
+    def _run_parallel(self, file):
+        ranges = split_ranges(file, self.workers)
+        # 进程池在后台线程中才序列化参数，此时主线程可能已在 merge 前面的结果；
+        # 先把初始状态的消费者序列化一次，各段都从这份快照开始
+        initial = pickle.dumps(self.consumers)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            counts = list(pool.map(_count_lines, [file] * len(ranges), *zip(*ranges)))
+            first_lns = [1]
+            for n in counts[:-1]:
+                first_lns.append(first_lns[-1] + n)
+            futures = [
+                pool.submit(_scan_range, file, start, end, first_ln, initial)
+                for (start, end), first_ln in zip(ranges, first_lns)
+            ]
+            for fut in futures:
+                for c, part in zip(self.consumers, fut.result()):
+                    c.merge(part)
+        return sum(counts)
+
+
+def scan(path, *consumers, workers=1):
+    """以给定消费者扫描一次 path，返回消费者元组。"""
+    scanner = ArchiveScanner(path, workers)
+    for c in consumers:
+        scanner.register(c)
+    scanner.run()
+    return consumers
+
+
+def resolve_source(path):
+    """定位 path 对应的实际数据，返回 (kind, file, member)，找不到时返回 None。
+
+    kind 为 'plain'、'gz'、'zst' 或 'zip'；member 仅 zip 时为包内成员名。
+    """
+    if os.path.isfile(path):
+        for suffix in ('.gz', '.zst'):
+            if path.endswith(suffix):
+                return suffix[1:], path, None
+        return 'plain', path, None
+    for suffix in ('.gz', '.zst'):
+        if os.path.isfile(path + suffix):
+            return suffix[1:], path + suffix, None
+    parent, name = os.path.split(path)
+    for zip_path in (parent, os.path.join(parent, ARCHIVE_ZIP)):
+        if os.path.isfile(zip_path) and zipfile.is_zipfile(zip_path):
+            member = _find_zip_member(zip_path, name)
+            if member:
+                return 'zip', zip_path, member
+    return None
+
+
+def require_source(path):
+    source = resolve_source(path)
+    if source is None:
+        raise FileNotFoundError(f'找不到数据文件 {path}（也没有 .gz/.zst 或 zip 中的同名文件）')
+    return source
+
+
+def source_exists(path):
+    return resolve_source(path) is not None
+
+
+def source_stat(path):
+    """返回 (size, mtime_ns)；zip 成员取解压后大小和 zip 文件的 mtime。"""
+    kind, file, member = require_source(path)
+    st = os.stat(file)
+    if kind == 'zip':
+        with zipfile.ZipFile(file) as zf:
+            return zf.getinfo(member).file_size, st.st_mtime_ns
+    return st.st_size, st.st_mtime_ns
+
+
+def open_source(path):
+    """以二进制方式打开数据源，可逐行迭代；压缩数据源在后台线程解压。"""
+    kind, file, member = require_source(path)
+    if kind == 'plain':
+        return open(file, 'rb')
+    if kind == 'gz':
+        return ThreadedReader(gzip.open(file, 'rb'))
+    if kind == 'zst':
+        return ThreadedReader(_open_zstd(file))
+    zf = zipfile.ZipFile(file)
+    return ThreadedReader(zf.open(member), close_also=zf)
+
+
+def iter_chunks(path, size=CHUNK_SIZE):
+    """按块读取数据源（压缩数据源读出的是解压后的内容）。"""
+    with open_source(path) as f:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class ThreadedReader:
+    """后台线程从 raw 读取（解压）数据块，主线程按行迭代，解压与解析得以重叠。"""
+
+    def __init__(self, raw, close_also=None, chunk_size=CHUNK_SIZE, depth=8):
+        self._raw = raw
+        self._close_also = close_also
+        self._queue = queue.Queue(depth)
+        self._closed = threading.Event()
+        self._pending = b''
+        self._eof = False
+        self._thread = threading.Thread(target=self._pump, args=(chunk_size,), daemon=True)
+        self._thread.start()
+
+    def _pump(self, chunk_size):
+        try:
+            while not self._closed.is_set():
+                chunk = self._raw.read(chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _next_chunk(self):
+        if self._eof:
+            return b''
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+            raise item
+        if not item:
+            self._eof = True
+        return item
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or len(self._pending) < size):
+            self._pending += self._next_chunk()
+        if size < 0:
+            data, self._pending = self._pending, b''
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def __iter__(self):
+        pending = self._pending
+        self._pending = b''
+        while True:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + b'\n'
+        if pending:
+            yield pending
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+        self._raw.close()
+        if self._close_also is not None:
+            self._close_also.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _find_zip_member(zip_path, name):
+    with zipfile.ZipFile(zip_path) as zf:
+        for member in zf.namelist():
+            if member == name or member.endswith('/' + name):
+                return member
+    return None
+
+
+def _open_zstd(file):
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(open(file, 'rb'), read_across_frames=True, closefd=True)
+    try:
+        from compression import zstd  # Python 3.14+
+    except ImportError:
+        raise RuntimeError(f'读取 {file} 需要 zstandard 库（pip install zstandard）') from None
+    return zstd.open(file, 'rb')
+
+
+def split_ranges(path, n):
+    """把文件切成至多 n 个 [start, end) 字节段，段边界对齐到行首。"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, n):
+            f.seek(size * i // n)
+            f.readline()
+            pos = min(f.tell(), size)
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def raw_string_field(raw, key):
+    """在原始 JSON 行中定位字符串字段 key 的内容，返回 (start, end) 字节偏移。
+
+    仅支持紧凑格式（``"key":"``），找不到或值不是字符串时返回 None。
+    """
+    i = raw.find(b'"' + key + b'":"')
+    if i < 0:
+        return None
+    start = i + len(key) + 4
+    j = start
+    while True:
+        j = raw.find(b'"', j)
+        if j < 0:
+            return None
+        k = j
+        while raw[k - 1] == 0x5c:  # 反斜杠
+            k -= 1
+        if (j - k) % 2 == 0:
+            return start, j
+        j += 1
+
+
+def _feed_lines(path, f, consumers, first_ln, limit):
+    """从 f 当前位置逐行解码并分发，读满 limit 字节（None 为读到文件尾）后停止。"""
+    filters = [getattr(c, 'prefilter', None) for c in consumers]
+    filtered = any(filters)
+    ln = first_ln - 1
+    remaining = limit
+    for ln, line in enumerate(f, first_ln):
+        if filtered:
+            targets = [c for c, pf in zip(consumers, filters) if pf is None or pf(line)]
+        else:
+            targets = consumers
+        if targets:
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"警告: {path} 第 {ln} 行 JSON 解析失败", file=sys.stderr)
+                obj = None
+            if obj is not None:
+                for c in targets:
+                    c.feed(ln, obj)
+        if remaining is not None:
+            remaining -= len(line)
+            if remaining <= 0:
+                break
+    return ln - first_ln + 1
+
+
+def _count_lines(path, start, end):
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            count += chunk.count(b'\n')
+            remaining -= len(chunk)
+    # 最后一段可能没有结尾换行
+    if end > start and end == os.path.getsize(path):
+        with open(path, 'rb') as f:
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                count += 1
+    return count
+
+
+def _scan_range(path, start, end, first_ln, initial):
+    consumers = pickle.loads(initial)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        _feed_lines(path, f, consumers, first_ln, end - start)
+    return consumers
@@ -0,0 +1,283 @@
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#   "requests",
+#   "beautifulsoup4",
+# ]
+# ///
+"""热点文本函数的微基准，与基线比较，变慢超过阈值时以非零状态退出。
+
+语料固定在 bench/corpus.json（由 --build-corpus 从 bgq 测试数据生成，平时不需要重新生成）。
+每个函数在整份语料上重复调用，取多轮的中位数按进程 CPU 时间计算 ns/call，并记录各轮的离散程度
+（四分位距 / 中位数）；另用 tracemalloc 统计单次调用的平均分配字节数和一轮调用中的分配峰值。
+
+基线只在本机有意义，不提交到仓库：先在改动前 --update 生成 bench/baseline.json，改动后再比较。
+比较时用同一次运行测得的参考负载（纯 Python 循环）做归一化以抵消机器负载的变化，
+实际阈值取 --threshold 与本次、基线离散程度三倍中的较大者，噪声大的函数不会误报。
+
+用法:
+    uv run bench/bench_text.py --update        # 在本机生成基线
+    uv run bench/bench_text.py                 # 与 bench/baseline.json 比较
+    uv run bench/bench_text.py --threshold 10 --only normalize_text
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import check_volume_order  # noqa: E402
+import extract_col  # noqa: E402
+import find_duplicate_isbns  # noqa: E402
+import person_alias  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(BENCH_DIR, 'corpus.json')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+TESTDATA_DIR = os.path.join(ROOT, 'bgq', 'internal', 'query', 'testdata', 'archive')
+
+DEFAULT_THRESHOLD = 20.0
+DEFAULT_REPEAT = 21
+NOISE_FACTOR = 3
+MIN_ROUND_SECONDS = 0.02
+
+def _uncached(func):
+    """带 lru_cache 的函数取原函数，测单次计算的开销而不是缓存命中。"""
+    return getattr(func, '__wrapped__', func)
+
+
+# 名称 -> (语料键, 以单条语料调用目标函数)；函数在调用时才从模块上取，测到的总是当前实现
+BENCHMARKS = {
+    'extract_number_with_method': (
+        'volume_pairs', lambda item: check_volume_order.extract_number_with_method(item[0], item[1])),
+    'normalize_text': (
+        'titles', lambda item: _uncached(check_volume_order.normalize_text)(item)),
+    'split_aliases': (
+        'aliases', lambda item: person_alias.split_aliases(item, False)),
+    'process_brackets': (
+        'aliases', lambda item: person_alias.process_brackets(item, False)),
+    'extract_key_from_cell': (
+        'cells', lambda item: extract_col.extract_key_from_cell(item[0], item[1])),
+    'normalize_title': (
+        'titles', lambda item: find_duplicate_isbns.normalize_title(item)),
+    'extract_japanese_isbns': (
+        'infoboxes', lambda item: find_duplicate_isbns.extract_japanese_isbns(item)),
+}
+
+
+def reference_workload(s):
+    """与被测函数无关的纯 Python 负载，用于抵消机器速度差异。"""
+    total = 0
+    for ch in s:
+        total += ord(ch) & 7
+    return total
+
+
+def time_round(func, items):
+    start = time.process_time_ns()
+    for item in items:
+        func(item)
+    return time.process_time_ns() - start
+
+
+def measure(func, items, repeat):
+    """返回 (ns/call, 各轮离散程度, 平均每次调用分配字节, 一轮调用的分配峰值字节)。"""
+    # 预热，同时确定每轮把语料重复几遍
+    loops = 1
+    while time_round(func, items * loops) < MIN_ROUND_SECONDS * 1e9:
+        loops *= 2
+    batch = items * loops
+    rounds = sorted(time_round(func, batch) for _ in range(repeat))
+    median = rounds[len(rounds) // 2]
+    spread = (rounds[len(rounds) * 3 // 4] - rounds[len(rounds) // 4]) / median if median else 0.0
+
+    allocated = 0
+    tracemalloc.start()
+    for item in items:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        func(item)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - base
+    tracemalloc.reset_peak()
+    for item in items:
+        func(item)
+    _, round_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return median / len(batch), spread, allocated / len(items), round_peak
+
+
+def run(corpus, names, repeat):
+    """返回 (参考负载平均 ns/call, 各函数结果)。参考负载紧挨每个函数测量，以减少机器负载波动的影响。"""
+    results = {}
+    ref_total = 0
+    for name in names:
+        key, func = BENCHMARKS[name]
+        ref_ns, ref_spread, _, _ = measure(reference_workload, corpus['titles'], repeat)
+        ns, spread, alloc, peak = measure(func, corpus[key], repeat)
+        ref_total += ref_ns
+        results[name] = {
+            'ns_per_call': round(ns, 1),
+            'relative': round(ns / ref_ns, 4),
+            'spread': round(spread + ref_spread, 4),
+            'alloc_bytes_per_call': round(alloc, 1),
+            'round_peak_bytes': peak,
+            'calls_per_round': len(corpus[key]),
+        }
+    return ref_total / len(names), results
+
+
+def report(results, baseline, threshold):
+    """打印结果表，返回变慢超过阈值的函数名列表。
+
+    各函数的实际阈值为 threshold 与 NOISE_FACTOR 倍离散程度（本次与基线取大者）中的较大者。
+    """
+    regressions = []
+    print(f"{'函数':<28}{'ns/call':>10}{'基线':>10}{'变化':>9}{'阈值':>8}{'B/call':>9}{'峰值KiB':>9}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base:
+            change = (r['relative'] / base['relative'] - 1) * 100
+            limit = max(threshold, NOISE_FACTOR * 100 * max(r['spread'], base.get('spread', 0)))
+            base_ns = f"{base['ns_per_call']:.0f}"
+            limit_text = f'{limit:.0f}%'
+            change_text = f'{change:+.1f}%'
+            if change > limit:
+                regressions.append(name)
+                change_text += ' ✗'
+        else:
+            base_ns, limit_text, change_text = '-', '-', '新增'
+        print(f"{name:<28}{r['ns_per_call']:>10.0f}{base_ns:>10}{change_text:>9}{limit_text:>8}"
+              f"{r['alloc_bytes_per_call']:>9.0f}{r['round_peak_bytes'] / 1024:>9.1f}")
+    return regressions
+
+
+def build_corpus(archive_dir, seed=0):
+    """从 Archive 样本生成固定语料：条目标题、卷名与系列名、infobox、别名、CSV 单元格。"""
+    try:
+        from bgm_tv_wiki import parse
+    except ImportError:
+        raise RuntimeError('--build-corpus 需要 bgm-tv-wiki 库（pip install bgm-tv-wiki）') from None
+
+    from gen_archive import VOLUME_STYLES
+
+    rng = random.Random(seed)
+
+    def read(name):
+        with open(os.path.join(archive_dir, f'{name}.jsonlines'), encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    subjects = read('subject')
+    people = read('person') + read('character')
+
+    titles = [s['name'] for s in subjects if s.get('name')]
+    infoboxes = [s['infobox'] for s in subjects if s.get('infobox')]
+
+    volume_pairs = []
+    for title in rng.sample(titles, 40):
+        for style in VOLUME_STYLES:
+            n = rng.randint(1, 24)
+            volume_pairs.append([style(title, n), title])
+    volume_pairs.extend([t, ''] for t in titles)
+
+    aliases = []
+    cells = []
+    for p in people:
+        try:
+            wiki = parse(p.get('infobox') or '')
+        except Exception:
+            continue
+        fields = []
+        for f in wiki.fields:
+            if f.key == '别名' and isinstance(f.value, tuple):
+                aliases.extend(item.value for item in f.value if item.value)
+            elif isinstance(f.value, str) and f.value:
+                fields.append((f.key, f.value))
+        # 模拟 bgq 导出 CSV 的 “key：value；key：value” 与 “名字（职位）” 格式
+        if len(fields) >= 2:
+            key = rng.choice(fields)[0]
+            cells.append(['；'.join(f'{k}：{v}' for k, v in fields), key])
+            cells.append(['、'.join(f'{p["name"]}（{k}）' for k, _ in fields[:3]), fields[0][0]])
+    aliases.extend(p['name'] for p in people if p.get('name'))
+    # 补充带 ／ 分隔和 ＝ 连接的别名
+    kana = [a for a in aliases if any('ァ' <= c <= 'ヺ' for c in a)]
+    for _ in range(100):
+        a, b = rng.sample(kana, 2)
+        aliases.append(f'{a}＝{b}' if rng.random() < 0.5 else f'{a} ／ {b}')
+
+    return {
+        'source': os.path.relpath(archive_dir, ROOT),
+        'seed': seed,
+        'titles': titles,
+        'volume_pairs': volume_pairs,
+        'infoboxes': infoboxes,
+        'aliases': aliases,
+        'cells': cells,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点文本函数微基准')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'相对基线变慢超过该百分比时失败（默认 {DEFAULT_THRESHOLD:g}）')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f'计时轮数，取中位数（默认 {DEFAULT_REPEAT}）')
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS), metavar='NAME',
+                        help='只测指定函数，可多次指定')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='基线文件（默认 bench/baseline.json，本机 --update 生成，不提交）')
+    parser.add_argument('--update', action='store_true', help='用本次结果更新基线')
+    parser.add_argument('--build-corpus', nargs='?', const=TESTDATA_DIR, metavar='ARCHIVE_DIR',
+                        help='从 Archive 目录重新生成 bench/corpus.json（默认 bgq 测试数据）')
+    args = parser.parse_args()
+
+    if args.build_corpus:
+        corpus = build_corpus(args.build_corpus)
+        with open(CORPUS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(corpus, f, ensure_ascii=False, indent=0)
+        print(f'语料已保存至 {CORPUS_FILE}', file=sys.stderr)
+        return
+
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        corpus = json.load(f)
+    names = args.only or list(BENCHMARKS)
+    ref_ns, results = run(corpus, names, args.repeat)
+
+    baseline = {}
+    if not args.update:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        else:
+            print(f'没有基线 {args.baseline}：先在改动前运行 --update 生成本机基线，本次只输出结果', file=sys.stderr)
+    regressions = report(results, baseline, args.threshold)
+    print(f'参考负载 {ref_ns:.0f} ns/call（Python {platform.python_version()}）')
+
+    if args.update:
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                merged = json.load(f)['results']
+            merged.update(results)
+            results = merged
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'reference_ns': round(ref_ns, 1),
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f'基线已保存至 {args.baseline}')
+        return
+
+    if regressions:
+        print(f"以下函数比基线慢 {args.threshold:g}% 以上: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+package main
+
+import (
+	"bytes"
+	"encoding/binary"
+	"fmt"
+	"sort"
+)
+
+// person_alias.bin 的读取，格式见仓库根目录 alias_index.py：
+// 别名键为按字节序排好的字符串表，人物下标为 uint32 数组，查询时直接二分查找，不建哈希表。
+const (
+	aliasIndexMagic      = "BGMALIAS"
+	aliasIndexVersion    = 1
+	aliasIndexHeaderSize = 32
+)
+
+type aliasIndex struct {
+	data []byte
+
+	persons  int
+	aliases  int
+	postings int
+
+	personIDs      int
+	nameOffsets    int
+	names          int
+	keyOffsets     int
+	keys           int
+	postingOffsets int
+	postingData    int
+}
+
+func isAliasIndex(head []byte) bool {
+	return bytes.HasPrefix(head, []byte(aliasIndexMagic))
+}
+
+func parseAliasIndex(data []byte) (*aliasIndex, error) {
+	if len(data) < aliasIndexHeaderSize || !isAliasIndex(data) {
+		return nil, fmt.Errorf("不是别名索引文件")
+	}
+	le := binary.LittleEndian
+	if v := le.Uint32(data[8:]); v != aliasIndexVersion {
+		return nil, fmt.Errorf("别名索引格式版本 %d 不受支持（需要 %d）", v, aliasIndexVersion)
+	}
+	x := &aliasIndex{
+		data:     data,
+		persons:  int(le.Uint32(data[12:])),
+		aliases:  int(le.Uint32(data[16:])),
+		postings: int(le.Uint32(data[20:])),
+	}
+	namesLen := int(le.Uint32(data[24:]))
+	keysLen := int(le.Uint32(data[28:]))
+
+	pos := aliasIndexHeaderSize
+	section := func(size int) int {
+		start := pos
+		pos += size + (4-size%4)%4
+		return start
+	}
+	x.personIDs = section(4 * x.persons)
+	x.nameOffsets = section(4 * (x.persons + 1))
+	x.names = section(namesLen)
+	x.keyOffsets = section(4 * (x.aliases + 1))
+	x.keys = section(keysLen)
+	x.postingOffsets = section(4 * (x.aliases + 1))
+	x.postingData = section(4 * x.postings)
+	if x.postingData+4*x.postings > len(data) {
+		return nil, fmt.Errorf("别名索引文件已截断")
+	}
+	return x, nil
+}
+
+func (x *aliasIndex) u32(section, i int) int {
+	return int(binary.LittleEndian.Uint32(x.data[section+4*i:]))
+}
+
+func (x *aliasIndex) key(j int) []byte {
+	return x.data[x.keys+x.u32(x.keyOffsets, j) : x.keys+x.u32(x.keyOffsets, j+1)]
+}
+
+func (x *aliasIndex) person(i int) personAliasEntry {
+	name := x.data[x.names+x.u32(x.nameOffsets, i) : x.names+x.u32(x.nameOffsets, i+1)]
+	return personAliasEntry{Name: string(name), ID: x.u32(x.personIDs, i)}
+}
+
+func (x *aliasIndex) personEntries() []personAliasEntry {
+	persons := make([]personAliasEntry, x.persons)
+	for i := range persons {
+		persons[i] = x.person(i)
+	}
+	return persons
+}
+
+func (x *aliasIndex) indices(j int) []int {
+	start, end := x.u32(x.postingOffsets, j), x.u32(x.postingOffsets, j+1)
+	out := make([]int, end-start)
+	for k := range out {
+		out[k] = x.u32(x.postingData, start+k)
+	}
+	return out
+}
+
+// lookup 查找已归一化的别名键。
+func (x *aliasIndex) lookup(key string) ([]int, bool) {
+	kb := []byte(key)
+	j := sort.Search(x.aliases, func(j int) bool { return bytes.Compare(x.key(j), kb) >= 0 })
+	if j == x.aliases || !bytes.Equal(x.key(j), kb) {
+		return nil, false
+	}
+	return x.indices(j), true
+}
+
+func (x *aliasIndex) forEach(fn func(alias string, indices []int)) {
+	for j := 0; j < x.aliases; j++ {
+		fn(string(x.key(j)), x.indices(j))
+	}
+}
@@ -1,8 +1,10 @@
 package main
 
 import (
+	"bufio"
 	"encoding/json"
 	"fmt"
+	"io"
 	"log"
 	"net/http"
 	"os"
@@ -18,10 +20,29 @@ type personAliasEntry struct {
 
 type aliasData struct {
 	persons []personAliasEntry
-	aliases map[string][]int
+	aliases map[string][]int // person_alias.json
+	index   *aliasIndex      // person_alias.bin，不建 map，直接二分查找
 	modTime time.Time
 }
 
+func (ad *aliasData) lookup(key string) ([]int, bool) {
+	if ad.index != nil {
+		return ad.index.lookup(key)
+	}
+	indices, ok := ad.aliases[key]
+	return indices, ok
+}
+
+func (ad *aliasData) forEach(fn func(alias string, indices []int)) {
+	if ad.index != nil {
+		ad.index.forEach(fn)
+		return
+	}
+	for alias, indices := range ad.aliases {
+		fn(alias, indices)
+	}
+}
+
 var aliasesReloadMu sync.Mutex
 
 func loadAliasesFile(path string) (*aliasData, error) {
@@ -36,8 +57,22 @@ func loadAliasesFile(path string) (*aliasData, error) {
 		return nil, fmt.Errorf("获取 aliases 文件状态失败: %w", err)
 	}
 
+	br := bufio.NewReader(f)
+	if head, _ := br.Peek(len(aliasIndexMagic)); isAliasIndex(head) {
+		data, err := io.ReadAll(br)
+		if err != nil {
+			return nil, fmt.Errorf("读取 aliases 文件失败: %w", err)
+		}
+		idx, err := parseAliasIndex(data)
+		if err != nil {
+			return nil, err
+		}
+		log.Printf("已加载 %d 个别名（二进制索引），映射到 %d 个人物", idx.aliases, idx.persons)
+		return &aliasData{persons: idx.personEntries(), index: idx, modTime: fi.ModTime()}, nil
+	}
+
 	var raw []any
-	if err := json.NewDecoder(f).Decode(&raw); err != nil {
+	if err := json.NewDecoder(br).Decode(&raw); err != nil {
 		return nil, fmt.Errorf("解析 aliases JSON 失败: %w", err)
 	}
 
@@ -140,7 +175,7 @@ func (s *server) handleAliases(w http.ResponseWriter, r *http.Request) {
 	aliasesReloadMu.Unlock()
 
 	if ad == nil {
-		writeJSON(w, http.StatusServiceUnavailable, apiError{Error: "别名数据未加载，请使用 --aliases-file 参数指定 person_alias.json 文件"})
+		writeJSON(w, http.StatusServiceUnavailable, apiError{Error: "别名数据未加载，请使用 --aliases-file 参数指定 person_alias.json 或 person_alias.bin 文件"})
 		return
 	}
 
@@ -151,7 +186,7 @@ func (s *server) handleAliases(w http.ResponseWriter, r *http.Request) {
 	}
 
 	key := normalizeAlias(alias)
-	indices, ok := ad.aliases[key]
+	indices, ok := ad.lookup(key)
 	if !ok {
 		writeJSON(w, http.StatusOK, []personAliasEntry{})
 		return
@@ -314,7 +314,7 @@ func cmdServe(args []string) {
 	}
 
 	if aliasesFile == "" {
-		for _, p := range []string{"../person_alias.json", "person_alias.json"} {
+		for _, p := range []string{"../person_alias.bin", "person_alias.bin", "../person_alias.json", "person_alias.json"} {
 			if fi, err := os.Stat(p); err == nil && !fi.IsDir() {
 				aliasesFile = p
 				break
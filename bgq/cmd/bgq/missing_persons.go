@@ -298,7 +298,7 @@ var personNameVariantMap = map[rune]rune{
 	'\u8207': '\u4e0e', // 與 → 与
 	'\u9435': '\u9244', // 鐵 → 鉄
 	'\u5dbd': '\u5cb3', // 嶽 → 岳
-	'\u7adc': '\u4e26', // 竝 → 並
+	'\u7add': '\u4e26', // 竝 → 並
 }
 
 // normalizePersonNameVariant maps variant characters in an alias-normalized
@@ -438,12 +438,11 @@ func loadKnownPersons(personFile, aliasFile string) (map[string]bool, map[string
 	if aliasFile != "" {
 		ad, err := loadAliasesFile(aliasFile)
 		if err == nil {
-			for alias := range ad.aliases {
+			ad.forEach(func(alias string, indices []int) {
 				if !known[alias] {
 					aliasNorm[alias] = true
 				}
 				known[alias] = true
-				indices := ad.aliases[alias]
 				for _, idx := range indices {
 					if idx >= 0 && idx < len(ad.persons) {
 						pid := ad.persons[idx].ID
@@ -459,7 +458,7 @@ func loadKnownPersons(personFile, aliasFile string) (map[string]bool, map[string
 						}
 					}
 				}
-			}
+			})
 		}
 	}
 
@@ -2,6 +2,8 @@
 set -e
 
 DATA_DIR="${1:-./bangumi_archive}"
+# ZIP_ONLY=1: keep archive.zip in DATA_DIR without extracting (Python scripts read it directly; bgq still needs extracted files)
+ZIP_ONLY="${ZIP_ONLY:-0}"
 
 echo "=== Downloading Bangumi Archive ==="
 mkdir -p "$DATA_DIR"
@@ -47,8 +49,13 @@ if [ -n "$EXPECTED_HASH" ]; then
   echo "Integrity check passed"
 fi
 
-echo "Extracting to ${DATA_DIR}..."
-unzip -o archive.zip -d "$DATA_DIR"
+if [ "$ZIP_ONLY" = "1" ]; then
+  echo "Saving archive.zip to ${DATA_DIR}..."
+  mv archive.zip "$DATA_DIR/archive.zip"
+else
+  echo "Extracting to ${DATA_DIR}..."
+  unzip -o archive.zip -d "$DATA_DIR"
+fi
 
 # Save data version metadata
 if [ -n "$CREATED_AT" ]; then
@@ -8,10 +8,14 @@ import os
 import re
 import shutil
 import subprocess
-import unicodedata
 from collections import defaultdict, Counter
 from datetime import datetime
 
+from archive_cache import DEFAULT_CACHE_DIR, Column, Projection, load_table
+from archive_scan import DEFAULT_WORKERS, source_exists
+from name_normalize import normalize_text, normalize_texts
+from profiling import Profiler, add_profile_args
+
 CHINESE_NUMBERS = {
     '零': 0, '一': 1, '二': 2, '三': 3, '四': 4,
     '五': 5, '六': 6, '七': 7, '八': 8, '九': 9,
@@ -63,16 +67,6 @@ EXTRACTION_METHODS = {
 }
 
 
-def normalize_text(text):
-    if not text:
-        return ""
-    text = text.lower()
-    text = re.sub(r'\s+', '', text)
-    text = unicodedata.normalize('NFKC', text)
-    text = re.sub(r'[^\w\s]', '', text)
-    return text
-
-
 def get_common_prefix(strings):
     if not strings:
         return ""
@@ -87,59 +81,74 @@ def get_common_prefix(strings):
     return ''.join(prefix)
 
 
-def load_subjects(file_path):
-    subjects = {}
-    if not os.path.exists(file_path):
+def _subject_normalized_name(data):
+    return normalize_text(data.get('name', ''))
+
+
+def _has_subject_id(data):
+    return bool(data.get('id'))
+
+
+def _is_valid_relation(data):
+    return bool(data.get('subject_id') and data.get('related_subject_id')
+                and data.get('relation_type') is not None)
+
+
+def _relation_order(data):
+    return data.get('order', 0)
+
+
+# 与 load_subjects_from_db 查询的列保持一致
+SUBJECT_PROJECTION = Projection('volume-order-subjects', 1, [
+    Column('id', 'i'),
+    Column('name', 's'),
+    Column('type', 'i'),
+    Column('series', 'b'),
+    Column('normalized_name', 's', _subject_normalized_name),
+], keep=_has_subject_id)
+
+RELATION_PROJECTION = Projection('volume-order-relations', 1, [
+    Column('subject_id', 'i'),
+    Column('related_subject_id', 'i'),
+    Column('relation_type', 'i'),
+    Column('order', 'i', _relation_order),
+], keep=_is_valid_relation)
+
+
+def load_subjects(file_path, workers=DEFAULT_WORKERS, cache_dir=DEFAULT_CACHE_DIR):
+    if not source_exists(file_path):
         print(f"错误：条目文件 {file_path} 不存在")
         return None
     print(f"正在加载条目数据 {file_path}...")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        total = sum(1 for _ in f)
-    count = 0
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                data = json.loads(line.strip())
-                subject_id = data.get('id')
-                if subject_id:
-                    name = data.get('name', '')
-                    data['normalized_name'] = normalize_text(name)
-                    subjects[subject_id] = data
-            except json.JSONDecodeError:
-                continue
-            count += 1
-            if count % 50000 == 0:
-                print(f"  已加载 {count}/{total} 条目")
+    table = load_table(file_path, SUBJECT_PROJECTION, cache_dir, workers)
+    subjects = {}
+    for subject_id, name, subject_type, series, normalized_name in zip(
+            table['id'], table['name'], table['type'], table['series'], table['normalized_name']):
+        subjects[subject_id] = {
+            'id': subject_id,
+            'name': name,
+            'type': subject_type,
+            'series': series,
+            'normalized_name': normalized_name
+        }
     print(f"成功加载 {len(subjects)} 个条目")
     return subjects
 
 
-def load_relations(file_path):
-    relations = defaultdict(list)
-    if not os.path.exists(file_path):
+def load_relations(file_path, workers=DEFAULT_WORKERS, cache_dir=DEFAULT_CACHE_DIR):
+    if not source_exists(file_path):
         print(f"错误：关系文件 {file_path} 不存在")
         return None
     print(f"正在加载关系数据 {file_path}...")
-    count = 0
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                data = json.loads(line.strip())
-                subject_id = data.get('subject_id')
-                related_id = data.get('related_subject_id')
-                relation_type = data.get('relation_type')
-                order = data.get('order', 0)
-                if subject_id and related_id and relation_type is not None:
-                    relations[subject_id].append({
-                        'related_id': related_id,
-                        'relation_type': relation_type,
-                        'order': order
-                    })
-            except json.JSONDecodeError:
-                continue
-            count += 1
-            if count % 500000 == 0:
-                print(f"  已加载 {count} 行")
+    table = load_table(file_path, RELATION_PROJECTION, cache_dir, workers)
+    relations = defaultdict(list)
+    for subject_id, related_id, relation_type, order in zip(
+            table['subject_id'], table['related_subject_id'], table['relation_type'], table['order']):
+        relations[subject_id].append({
+            'related_id': related_id,
+            'relation_type': relation_type,
+            'order': order
+        })
     print(f"成功加载 {len(relations)} 组关系数据")
     return relations
 
@@ -174,10 +183,9 @@ def load_subjects_from_db(db_path, duckdb_path):
         print(f"解析 DuckDB 输出失败: {e}")
         return None
     subjects = {}
-    for row in rows:
-        subject_id = row['id']
-        row['normalized_name'] = normalize_text(row.get('name', ''))
-        subjects[subject_id] = row
+    for row, normalized_name in zip(rows, normalize_texts(row.get('name') for row in rows)):
+        row['normalized_name'] = normalized_name
+        subjects[row['id']] = row
     print(f"成功加载 {len(subjects)} 个条目")
     return subjects
 
@@ -580,8 +588,7 @@ def check_single_volume_order(main_subjects, all_subjects, relations, single_vol
             related_subject = all_subjects.get(item['related_id'])
             if not related_subject:
                 continue
-            related_name = related_subject.get('name', '')
-            related_normalized = normalize_text(related_name)
+            related_normalized = related_subject.get('normalized_name', '')
             if main_normalized and main_normalized in related_normalized:
                 filtered_items.append(item)
         if len(filtered_items) < 2:
@@ -716,7 +723,7 @@ def resolve_data_source(archive_dir, db_path):
     if archive_dir:
         subjects_file = os.path.join(archive_dir, "subject.jsonlines")
         relations_file = os.path.join(archive_dir, "subject-relations.jsonlines")
-        if os.path.isfile(subjects_file) and os.path.isfile(relations_file):
+        if source_exists(subjects_file) and source_exists(relations_file):
             return ('jsonlines', archive_dir)
     for candidate in ('bgq/bangumi.db', 'bangumi.db'):
         if os.path.isfile(candidate):
@@ -724,7 +731,7 @@ def resolve_data_source(archive_dir, db_path):
     for candidate in ('bangumi_archive', '.'):
         subjects_file = os.path.join(candidate, "subject.jsonlines")
         relations_file = os.path.join(candidate, "subject-relations.jsonlines")
-        if os.path.isfile(subjects_file) and os.path.isfile(relations_file):
+        if source_exists(subjects_file) and source_exists(relations_file):
             return ('jsonlines', candidate)
     return ('jsonlines', archive_dir or 'bangumi_archive')
 
@@ -732,19 +739,30 @@ def resolve_data_source(archive_dir, db_path):
 def main():
     parser = argparse.ArgumentParser(description='检查单行本卷序一致性')
     parser.add_argument('--archive-dir', default=None,
-                        help='数据文件夹路径（默认自动查找）')
+                        help='数据文件夹或 Archive zip 路径（默认自动查找）')
     parser.add_argument('--db', default=None,
                         help='DuckDB 数据库路径（默认自动查找 bgq/bangumi.db）')
     parser.add_argument('--output', default='_site/volume_order_report.html',
                         help='输出 HTML 文件路径（默认: _site/volume_order_report.html）')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'解析 jsonlines 的进程数（默认: {DEFAULT_WORKERS}）')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'jsonlines 列式缓存目录（默认: {DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不读写列式缓存，每次重新解析 jsonlines')
+    add_profile_args(parser)
     args = parser.parse_args()
 
+    prof = Profiler.from_args(args, os.path.splitext(args.output)[0] + '.profile.json')
+    cache_dir = None if args.no_cache else args.cache_dir
     source_type, source_path = resolve_data_source(args.archive_dir, args.db)
     print(f"数据源: {source_type} ({source_path})")
 
     if source_type == 'db':
         duck = find_duckdb()
-        all_subjects = load_subjects_from_db(source_path, duck)
+        with prof.stage('load_subjects') as st:
+            all_subjects = load_subjects_from_db(source_path, duck)
+            st.records = len(all_subjects or ())
         if not all_subjects:
             return
         main_subjects = [
@@ -755,14 +773,18 @@ def main():
         if not main_subjects:
             print("没有找到符合条件的主条目，程序退出")
             return
-        relations = load_relations_from_db(source_path, duck)
+        with prof.stage('load_relations') as st:
+            relations = load_relations_from_db(source_path, duck)
+            st.records = sum(len(v) for v in (relations or {}).values())
         if not relations:
             return
     else:
         subjects_file = os.path.join(source_path, "subject.jsonlines")
         relations_file = os.path.join(source_path, "subject-relations.jsonlines")
 
-        all_subjects = load_subjects(subjects_file)
+        with prof.stage('load_subjects') as st:
+            all_subjects = load_subjects(subjects_file, args.workers, cache_dir)
+            st.records = len(all_subjects or ())
         if not all_subjects:
             return
 
@@ -775,19 +797,23 @@ def main():
             print("没有找到符合条件的主条目，程序退出")
             return
 
-        relations = load_relations(relations_file)
+        with prof.stage('load_relations') as st:
+            relations = load_relations(relations_file, args.workers, cache_dir)
+            st.records = sum(len(v) for v in (relations or {}).values())
         if not relations:
             return
 
-    problematic_series = check_single_volume_order(
-        main_subjects, all_subjects, relations, 1003
-    )
+    with prof.stage('check', len(main_subjects)):
+        problematic_series = check_single_volume_order(
+            main_subjects, all_subjects, relations, 1003
+        )
 
-    html_content = generate_html_report(problematic_series)
+    with prof.stage('render', len(problematic_series)):
+        html_content = generate_html_report(problematic_series)
 
-    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
-    with open(args.output, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(html_content)
 
     print(f"结果已保存至 {args.output}")
 
@@ -0,0 +1,145 @@
+"""opencc-cn-name 人名转换结果的持久缓存。
+
+缺少简体中文名的人物 / 角色每周变化很少，转换结果按 名称→结果 存在 ``<cache_dir>/<key>.json``，
+下次运行只转换新出现的名称；同一次运行中重名的条目也只转换一次。
+未缓存的名称可按批交给进程池转换（refined_to_cn 是纯 CPU 计算），结果仍按输入顺序给出。
+
+key 取自 opencc-cn-name 与 OpenCC 的版本号，以及两者的代码和词典文件（.py / .json / .ocd2）内容的
+SHA-256，任一方升级或词典变化都会换一个新文件，旧文件在保存时删除。
+
+用法:
+    cache = CnNameCache('.cache/opencc-cn-name')
+    converted = cache.convert_all(names)   # {name: refined_to_cn(name)}
+    with conversion_pool(4) as pool:
+        for key, name, result in cache.convert_stream(items, pool, 4):   # items 为 (key, name)
+            ...
+    cache.save()
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from importlib import metadata
+
+from opencc_cn_name import refined_to_cn
+
+DEFAULT_CACHE_DIR = '.cache/opencc-cn-name'
+_DISTRIBUTIONS = ('opencc-cn-name', 'OpenCC')
+_HASHED_SUFFIXES = ('.py', '.json', '.ocd2')
+BATCH_SIZE = 2000
+
+
+def converter_key():
+    """转换器的版本与词典指纹，用作缓存文件名。"""
+    h = hashlib.sha256()
+    for name in _DISTRIBUTIONS:
+        dist = metadata.distribution(name)
+        h.update(f'{name}=={dist.version}\n'.encode())
+        files = sorted(str(f) for f in dist.files or () if str(f).endswith(_HASHED_SUFFIXES))
+        for f in files:
+            h.update(f.encode() + b'\0')
+            with open(dist.locate_file(f), 'rb') as fp:
+                h.update(hashlib.sha256(fp.read()).digest())
+    return h.hexdigest()[:16]
+
+
+def _convert_batch(names):
+    return [refined_to_cn(name) for name in names]
+
+
+def conversion_pool(workers):
+    """转换用的进程池；workers <= 1 时返回空的上下文（值为 None），即在本进程内转换。
+
+    子进程用 spawn 启动：调用方可能在其他线程中同时扫描文件，fork 有死锁风险。
+    """
+    if workers <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+class CnNameCache:
+    """名称→refined_to_cn(名称) 的缓存；cache_dir 为 None 时只在内存中去重，不读写文件。"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.path = None
+        self.table = {}
+        self.loaded = 0
+        if cache_dir is None:
+            return
+        self.path = os.path.join(cache_dir, f'{converter_key()}.json')
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.table = json.load(f)
+        except (OSError, ValueError):
+            self.table = {}
+        self.loaded = len(self.table)
+
+    def convert(self, name):
+        result = self.table.get(name)
+        if result is None:
+            result = self.table[name] = refined_to_cn(name)
+        return result
+
+    def convert_all(self, names):
+        """返回 {名称: 转换结果}，只转换缓存中没有的名称。"""
+        return {name: self.convert(name) for name in set(names)}
+
+    def convert_stream(self, items, pool=None, workers=1, batch_size=BATCH_SIZE):
+        """items 为 (key, name) 序列，按原顺序给出 (key, name, 转换结果)。
+
+        每凑满 batch_size 个未缓存的新名称提交一批给 pool，同时继续读取后面的条目；
+        各批按提交顺序取回，已取回批次之前的条目即可给出。未取回的批次不超过 workers（pool 的进程数）的两倍。
+        pool 为 None 时在本进程内逐个转换，结果相同。
+        """
+        if pool is None:
+            for key, name in items:
+                yield key, name, self.convert(name)
+            return
+        depth = 2 * max(1, workers)
+        pending = deque()
+        batch, names, submitted = [], [], set()
+        for item in items:
+            batch.append(item)
+            name = item[1]
+            if name not in self.table and name not in submitted:
+                submitted.add(name)
+                names.append(name)
+                if len(names) >= batch_size:
+                    pending.append((batch, names, pool.submit(_convert_batch, names)))
+                    batch, names = [], []
+                    while len(pending) > depth:
+                        yield from self._finish(*pending.popleft())
+        if batch:
+            pending.append((batch, names, pool.submit(_convert_batch, names) if names else None))
+        while pending:
+            yield from self._finish(*pending.popleft())
+
+    def _finish(self, batch, names, future):
+        if future is not None:
+            self.table.update(zip(names, future.result()))
+        table = self.table
+        for key, name in batch:
+            yield key, name, table[name]
+
+    def save(self):
+        """有新转换的名称时写回缓存文件，并删除其他版本的旧缓存。"""
+        added = len(self.table) - self.loaded
+        if self.path is None or not added:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.table, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        keep = os.path.basename(self.path)
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json') and name != keep:
+                os.remove(os.path.join(self.cache_dir, name))
+        print(f'已写入转换缓存 {self.path}（新增 {added} 个，共 {len(self.table)} 个名称）', file=sys.stderr)
+        self.loaded = len(self.table)
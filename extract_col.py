@@ -3,7 +3,7 @@
 Extract entries matching a key pattern from a semicolon-separated column into a new column.
 
 Usage:
-    python3 extract_col.py <csv_file> <src_col> <extract_key> [--new-col NAME] [--out FILE] [--fail FILE]
+    python3 extract_col.py <csv_file> <src_col> <key[:new_col]> [<key[:new_col]> ...] [--new-col NAME] [--out FILE] [--fail FILE]
 
 Examples:
     # Extract 音响制作担当 from 音响 column, output to bangumi_results_extracted.csv
@@ -15,122 +15,501 @@ Examples:
     # Custom output and failure files
     python3 extract_col.py data.csv col1 制作 --out result.csv --fail errors.csv
 
+    # Several keys in one pass, each into its own column (key:new_col renames)
+    python3 extract_col.py bangumi_results.csv 制作人员 原画 作画监督 辅佐:演出助手
+
+    # Streaming: read CSV from stdin, write the result to stdout, failures to a side file
+    bgq query --config x.yaml --format csv | python3 extract_col.py - 制作人员 辅佐 --fail failed.csv \
+        | python sync_index.py --index 12345
+
+    # Batch: apply a JSON spec to every matching CSV in results/, files in parallel
+    python3 extract_col.py batch extract_spec.json results/ --out-dir results/extracted
+
 Logic:
     For each cell in <src_col>, find patterns like:
         ；<extract_key>：value   (standard format with ； separator)
         （<extract_key>：value） (parenthetical format)
         <extract_key>：value     (at start, no prefix)
     Remove the matched portion from the original cell, and place value into the new column.
+
+    With several keys, they are applied in order to the progressively cleaned cell. A key that is
+    not found leaves its column empty; a row goes to the failure file only if none of the keys is
+    found. Each key is still its own regex search over the cell; the cell is not tokenized once and
+    shared between keys.
+
+    Rows are read, processed and written one at a time (the dialect is sniffed from a buffered
+    prefix), so memory stays flat regardless of input size.
+
+Batch mode:
+    The spec is a JSON list of {"match": <file name glob>, "column": <src_col>, "keys": [<key[:new_col]>, ...]};
+    the first entry matching a file's name applies, unmatched files are skipped. Files go to a process pool;
+    files over 16 MiB are split into row chunks whose outputs are written back in order. Each file gets the
+    same <stem>_extracted / <stem>_failed outputs as a single run, byte for byte.
 """
 
 import argparse
 import csv
+import fnmatch
+import glob
+import io
+import itertools
+import json
+import os
 import re
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+from profiling import Profiler, add_profile_args
+
+SNIFF_SIZE = 8192
+EDGE_SEPARATORS = re.compile(r'^[、；]+|[、；]+$')
+DOUBLE_SEPARATORS = re.compile(r'([、；])\s*[、；]')
+
+
+class KeyPatterns:
+    """Patterns for one key, compiled once and reused for every cell."""
+
+    def __init__(self, key: str):
+        k = re.escape(key)
+        self.key = key
+        self.paren = re.compile(r'[（(]' + k + r'[：:](.+?)[）)]')
+        self.paren_sub = re.compile(r'[（(]' + k + r'[：:].+?[）)]')
+        self.std = re.compile(r'(?:；|^)' + k + r'[：:](.+?)(?:；|$)')
+        self.std_sub = re.compile(r'；?' + k + r'[：:].+?(?=；|$)')
+        self.nocolon = re.compile(r'(?:^|[、；])([^、；（）()]*?)[（(]' + k + r'[）)]')
+        self.nocolon_tail = r'[（(]' + k + r'[）)]'
+
+    def extract(self, cell: str):
+        # Every pattern contains the key literally; most cells lack it, so skip the regexes.
+        if self.key not in cell:
+            return None, 'key not found'
+
+        m_paren = self.paren.search(cell)
+        if m_paren:
+            value = m_paren.group(1).strip()
+            new_cell = self.paren_sub.sub('', cell).strip()
+            return new_cell, value
+
+        m = self.std.search(cell)
+        if m:
+            value = m.group(1).strip()
+            new_cell = self.std_sub.sub('', cell).strip()
+            return new_cell, value
+
+        m_nocolon = self.nocolon.search(cell)
+        if m_nocolon:
+            name = m_nocolon.group(1).strip()
+            new_cell = re.sub(r'[、；]?' + re.escape(name) + self.nocolon_tail, '', cell).strip()
+            new_cell = EDGE_SEPARATORS.sub('', new_cell).strip()
+            new_cell = DOUBLE_SEPARATORS.sub(r'\1', new_cell).strip()
+            return new_cell, name
+
+        return None, 'key not found'
+
+
+@lru_cache(maxsize=256)
+def key_patterns(key: str) -> KeyPatterns:
+    return KeyPatterns(key)
+
 
 def extract_key_from_cell(cell: str, key: str):
-    m_paren = re.search(r'[（(]' + re.escape(key) + r'[：:](.+?)[）)]', cell)
-    if m_paren:
-        value = m_paren.group(1).strip()
-        new_cell = re.sub(r'[（(]' + re.escape(key) + r'[：:].+?[）)]', '', cell).strip()
-        return new_cell, value
+    return key_patterns(key).extract(cell)
 
-    m = re.search(r'(?:；|^)' + re.escape(key) + r'[：:](.+?)(?:；|$)', cell)
-    if m:
-        value = m.group(1).strip()
-        new_cell = re.sub(r'；?' + re.escape(key) + r'[：:].+?(?=；|$)', '', cell).strip()
-        return new_cell, value
 
-    m_nocolon = re.search(r'(?:^|[、；])([^、；（）()]*?)[（(]' + re.escape(key) + r'[）)]', cell)
-    if m_nocolon:
-        name = m_nocolon.group(1).strip()
-        new_cell = re.sub(r'[、；]?' + re.escape(name) + r'[（(]' + re.escape(key) + r'[）)]', '', cell).strip()
-        new_cell = re.sub(r'^[、；]+|[、；]+$', '', new_cell).strip()
-        new_cell = re.sub(r'([、；])\s*[、；]', r'\1', new_cell).strip()
-        return new_cell, name
+def extract_keys_from_cell(cell: str, keys):
+    """Apply each key in turn to the progressively cleaned cell.
 
-    return None, 'key not found'
+    Returns (new_cell, values) with one value per key ('' where the key was not found),
+    or (None, 'key not found') if none of the keys matched.
+    """
+    values = []
+    found = False
+    for key in keys:
+        new_cell, value = key_patterns(key).extract(cell)
+        if new_cell is None:
+            values.append('')
+        else:
+            cell = new_cell
+            values.append(value)
+            found = True
+    if not found:
+        return None, 'key not found'
+    return cell, values
 
 
-def detect_dialect(path: str):
-    with open(path, encoding='utf-8-sig') as f:
-        sample = f.read(8192)
+def parse_spec(spec: str):
+    """Split a `key[:new_col]` spec into (key, new_col)."""
+    key, sep, new_col = spec.partition(':')
+    return key, (new_col if sep and new_col else key)
+
+
+def sniff_dialect(sample: str):
     try:
         return csv.Sniffer().sniff(sample)
     except csv.Error:
         return csv.excel()
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Extract key:value from semicolon-separated column')
-    parser.add_argument('csv_file', help='Input CSV file')
-    parser.add_argument('src_col', help='Source column name')
-    parser.add_argument('extract_key', help='Key to extract (e.g. 音响制作担当)')
-    parser.add_argument('--new-col', help='New column name (default: same as extract_key, e.g. --new-col 演出助手)')
-    parser.add_argument('--out', help='Output CSV file (default: <input>_extracted.csv)')
-    parser.add_argument('--fail', help='Failure output file (default: <input>_failed.csv)')
-    args = parser.parse_args()
+def detect_dialect(path: str):
+    with open(path, encoding='utf-8-sig') as f:
+        return sniff_dialect(f.read(SNIFF_SIZE))
 
-    new_col = args.new_col or args.extract_key
-    stem = Path(args.csv_file).stem
-    ext = Path(args.csv_file).suffix
-    out_file = args.out or f'{stem}_extracted{ext}'
-    fail_file = args.fail or f'{stem}_failed{ext}'
 
-    dialect = detect_dialect(args.csv_file)
+def open_input(path: str):
+    """Open path ('-' for stdin) and sniff its dialect from a buffered prefix.
 
-    with open(args.csv_file, encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f, dialect=dialect)
-        rows = list(reader)
-        fieldnames = reader.fieldnames or []
+    Returns (file, lines, dialect); lines yields the prefix followed by the rest of the
+    stream, so nothing is read twice and pipes work.
+    """
+    if path == '-':
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig')
+    else:
+        f = open(path, encoding='utf-8-sig')
+    sample = f.read(SNIFF_SIZE)
+    dialect = sniff_dialect(sample)
+    if sample and not sample.endswith('\n'):
+        sample += f.readline()  # finish the partial line so the reader sees whole lines
+    return f, itertools.chain(io.StringIO(sample), f), dialect
 
-    if args.src_col not in fieldnames:
-        print(f'Error: column "{args.src_col}" not found in {args.csv_file}', file=sys.stderr)
-        print(f'Available columns: {fieldnames}', file=sys.stderr)
-        sys.exit(1)
 
-    if new_col in fieldnames:
-        print(f'Error: column "{new_col}" already exists in {args.csv_file}', file=sys.stderr)
-        sys.exit(1)
+def open_output(path: str):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=True)
+    return open(path, 'w', encoding='utf-8-sig', newline='')
+
+
+class LazyWriter:
+    """DictWriter that creates its file only when the first row arrives."""
 
-    new_rows = []
-    failed_rows = []
+    def __init__(self, path, fieldnames, dialect):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.dialect = dialect
+        self.f = None
+        self.writer = None
 
+    def open(self):
+        """Create the file and write the header now (a no-op if already open)."""
+        if self.writer is None:
+            self.f = open_output(self.path)
+            self.writer = csv.DictWriter(self.f, fieldnames=self.fieldnames, dialect=self.dialect,
+                                         extrasaction='ignore', restval='')
+            self.writer.writeheader()
+
+    def writerow(self, row):
+        if self.writer is None:
+            self.open()
+        self.writer.writerow(row)
+
+    def write(self, text):
+        """Append rows already formatted with the same dialect."""
+        if self.writer is None:
+            self.open()
+        self.f.write(text)
+
+    def close(self):
+        if self.f is None:
+            return
+        if self.path == '-':
+            self.f.flush()
+            self.f.detach()  # leave sys.stdout usable
+        else:
+            self.f.close()
+
+
+def extract_rows(rows, src_col, keys, new_cols, out, fail):
+    """Run the extraction row by row, writing successes to out and failures to fail; returns (ok, failed)."""
+    ok = failed = 0
     for row in rows:
-        cell = row.get(args.src_col, '') or ''
-        if not cell:
-            new_rows.append(row)
+        cell = row.get(src_col, '') or ''
+        if cell:
+            new_cell, values = extract_keys_from_cell(cell, keys)
+            if new_cell is None:
+                fail.writerow(row)
+                failed += 1
+                continue
+            row[src_col] = new_cell
+            row.update(zip(new_cols, values))
+        out.writerow(row)
+        ok += 1
+    return ok, failed
+
+
+def resolve_specs(specs, new_col=None):
+    """Turn `key[:new_col]` specs into (keys, new_cols); new_col renames a single key."""
+    pairs = [parse_spec(spec) for spec in specs]
+    if new_col:
+        if len(pairs) > 1:
+            raise ValueError('--new-col only applies to a single key; use key:new_col instead')
+        pairs = [(pairs[0][0], new_col)]
+    keys = [key for key, _ in pairs]
+    new_cols = [col for _, col in pairs]
+    if len(set(new_cols)) != len(new_cols):
+        raise ValueError(f'duplicate new column names: {new_cols}')
+    return keys, new_cols
+
+
+def check_columns(fieldnames, src_col, new_cols, source):
+    if src_col not in fieldnames:
+        raise ValueError(f'column "{src_col}" not found in {source}\nAvailable columns: {fieldnames}')
+    for new_col in new_cols:
+        if new_col in fieldnames:
+            raise ValueError(f'column "{new_col}" already exists in {source}')
+
+
+def default_outputs(csv_file, out_dir=''):
+    stem = Path(csv_file).stem
+    ext = Path(csv_file).suffix
+    return os.path.join(out_dir, f'{stem}_extracted{ext}'), os.path.join(out_dir, f'{stem}_failed{ext}')
+
+
+def extract_file(csv_file, out_file, fail_file, src_col, keys, new_cols):
+    """Extract keys from src_col of csv_file ('-' for stdin); returns (ok, failed).
+
+    Raises ValueError (before creating any output) if the columns don't fit.
+    """
+    f, lines, dialect = open_input(csv_file)
+    with f:
+        reader = csv.DictReader(lines, dialect=dialect)
+        fieldnames = reader.fieldnames or []
+        check_columns(fieldnames, src_col, new_cols, csv_file)
+        out = LazyWriter(out_file, fieldnames + new_cols, dialect)
+        fail = LazyWriter(fail_file, fieldnames, dialect)
+        try:
+            out.open()  # the output always gets a header, even with no rows
+            return extract_rows(reader, src_col, keys, new_cols, out, fail)
+        finally:
+            out.close()
+            fail.close()
+
+
+SPLIT_BYTES = 16 * 1024 * 1024
+DEFAULT_CHUNK_ROWS = 20000
+DEFAULT_JOBS = os.cpu_count() or 1
+
+
+def dialect_params(dialect):
+    """Sniffed dialects are classes created on the fly and can't be pickled; pass their fields instead."""
+    return {name: getattr(dialect, name) for name in (
+        'delimiter', 'quotechar', 'escapechar', 'doublequote', 'skipinitialspace', 'lineterminator', 'quoting')}
+
+
+def load_batch_spec(path):
+    """Read a batch spec: a JSON list of {"match": glob, "column": src_col, "keys": [key[:new_col], ...]}.
+
+    match is an fnmatch pattern on the file name; the first entry that matches a file applies.
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f'{path}: expected a JSON list of {{"match", "column", "keys"}} objects')
+    spec = []
+    for i, entry in enumerate(entries):
+        try:
+            keys, new_cols = resolve_specs(entry['keys'])
+            spec.append((entry['match'], entry['column'], keys, new_cols))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f'{path}: entry {i} needs "match", "column" and "keys" ({e!r})') from None
+    return spec
+
+
+def expand_inputs(inputs):
+    """Directories give their *.csv files; anything else is a glob pattern (or a plain path)."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(sorted(glob.glob(os.path.join(glob.escape(item), '*.csv'))))
+        else:
+            matched = sorted(glob.glob(item))
+            if not matched:
+                raise ValueError(f'{item}: no such file')
+            files.extend(matched)
+    return list(dict.fromkeys(files))
+
+
+def _extract_file_job(job):
+    csv_file, out_file, fail_file, src_col, keys, new_cols = job
+    try:
+        return extract_file(csv_file, out_file, fail_file, src_col, keys, new_cols), None
+    except (OSError, ValueError) as e:
+        return None, str(e)
+
+
+def _extract_chunk(rows, fieldnames, src_col, keys, new_cols, params):
+    """Extract a chunk of rows in a worker; returns the formatted CSV text of its outputs and the counts."""
+    out_buf, fail_buf = io.StringIO(), io.StringIO()
+    out = csv.DictWriter(out_buf, fieldnames=fieldnames + new_cols, extrasaction='ignore', restval='', **params)
+    fail = csv.DictWriter(fail_buf, fieldnames=fieldnames, extrasaction='ignore', restval='', **params)
+    ok, failed = extract_rows(rows, src_col, keys, new_cols, out, fail)
+    return out_buf.getvalue(), fail_buf.getvalue(), ok, failed
+
+
+def extract_file_chunked(job, pool, jobs, chunk_rows):
+    """Like extract_file, but rows are sent to pool in chunks and the outputs reassembled in order."""
+    csv_file, out_file, fail_file, src_col, keys, new_cols = job
+    f, lines, dialect = open_input(csv_file)
+    with f:
+        reader = csv.DictReader(lines, dialect=dialect)
+        fieldnames = reader.fieldnames or []
+        check_columns(fieldnames, src_col, new_cols, csv_file)
+        params = dialect_params(dialect)
+        out = LazyWriter(out_file, fieldnames + new_cols, dialect)
+        fail = LazyWriter(fail_file, fieldnames, dialect)
+        ok = failed = 0
+        pending = deque()
+
+        def collect():
+            nonlocal ok, failed
+            out_text, fail_text, n_ok, n_failed = pending.popleft().result()
+            out.write(out_text)
+            if fail_text:
+                fail.write(fail_text)
+            ok += n_ok
+            failed += n_failed
+
+        try:
+            out.open()
+            while True:
+                rows = list(itertools.islice(reader, chunk_rows))
+                if not rows:
+                    break
+                pending.append(pool.submit(_extract_chunk, rows, fieldnames, src_col, keys, new_cols, params))
+                while len(pending) > 2 * jobs:
+                    collect()
+            while pending:
+                collect()
+        finally:
+            out.close()
+            fail.close()
+    return ok, failed
+
+
+def batch_main(argv=None):
+    """extract_col.py batch: apply a spec file to many CSVs, one file per worker, big files split into row chunks."""
+    parser = argparse.ArgumentParser(
+        prog='extract_col.py batch',
+        description='Run the extraction over many CSVs in parallel; output matches running the files one by one',
+    )
+    parser.add_argument('spec', help='JSON spec: [{"match": "staff*.csv", "column": "制作人员", "keys": ["原画", "辅佐:演出助手"]}, ...]')
+    parser.add_argument('inputs', nargs='+', help='CSV files, glob patterns or directories (their *.csv)')
+    parser.add_argument('--out-dir', default='.', help='Directory for <stem>_extracted / <stem>_failed files (default: current directory)')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help=f'Worker processes (default: {DEFAULT_JOBS})')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f'Files over {SPLIT_BYTES >> 20} MiB are split into chunks of this many rows (default: {DEFAULT_CHUNK_ROWS})')
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        spec = load_batch_spec(args.spec)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    prof = Profiler.from_args(args, os.path.join(args.out_dir, 'extract_col_batch.profile.json'))
+
+    try:
+        inputs = expand_inputs(args.inputs)
+    except ValueError as e:
+        parser.error(str(e))
+    batch = []
+    outputs = {}
+    for csv_file in inputs:
+        name = os.path.basename(csv_file)
+        entry = next((e for e in spec if fnmatch.fnmatch(name, e[0])), None)
+        if entry is None:
+            print(f'Skip: {csv_file} (no matching spec entry)', file=sys.stderr)
             continue
+        out_file, fail_file = default_outputs(csv_file, args.out_dir)
+        if out_file in outputs:
+            parser.error(f'{csv_file} and {outputs[out_file]} would both write {out_file}')
+        outputs[out_file] = csv_file
+        batch.append((csv_file, out_file, fail_file, *entry[1:]))
+    if not batch:
+        parser.error('no input file matches the spec')
+    os.makedirs(args.out_dir, exist_ok=True)
 
-        result = extract_key_from_cell(cell, args.extract_key)
+    jobs = max(1, args.jobs)
+    results = {}
+    with prof.stage('extract') as st, ProcessPoolExecutor(jobs) as pool:
+        small = [job for job in batch if os.path.getsize(job[0]) <= SPLIT_BYTES]
+        futures = {job[0]: pool.submit(_extract_file_job, job) for job in small}
+        # Split big files while the pool works through the small ones
+        for job in batch:
+            if job[0] not in futures:
+                try:
+                    results[job[0]] = extract_file_chunked(job, pool, jobs, args.chunk_rows), None
+                except (OSError, ValueError) as e:
+                    results[job[0]] = None, str(e)
+        for csv_file, fut in futures.items():
+            results[csv_file] = fut.result()
+        st.records = sum(r[0][0] + r[0][1] for r in results.values() if r[0])
 
-        if result[0] is not None:
-            new_cell, value = result
-            row[args.src_col] = new_cell
-            row[new_col] = value
-            new_rows.append(row)
+    errors = 0
+    for csv_file, out_file, fail_file, *_ in batch:
+        counts, error = results[csv_file]
+        print(f'== {csv_file}')
+        if error:
+            print(f'Error: {error}', file=sys.stderr)
+            errors += 1
         else:
-            failed_rows.append(row)
-
-    out_fn = fieldnames + [new_col]
-    clean = [{k: r.get(k, '') for k in out_fn} for r in new_rows]
-    with open(out_file, 'w', encoding='utf-8-sig', newline='') as f:
-        w = csv.DictWriter(f, fieldnames=out_fn, dialect=dialect)
-        w.writeheader()
-        w.writerows(clean)
-    print(f'OK: {len(new_rows)} rows → {out_file}')
-
-    if failed_rows:
-        clean_fail = [{k: r.get(k, '') for k in fieldnames} for r in failed_rows]
-        with open(fail_file, 'w', encoding='utf-8-sig', newline='') as f:
-            w = csv.DictWriter(f, fieldnames=fieldnames, dialect=dialect)
-            w.writeheader()
-            w.writerows(clean_fail)
-        print(f'FAILED: {len(failed_rows)} rows → {fail_file}')
+            report(out_file, fail_file, *counts)
+    if errors:
+        sys.exit(1)
+
+
+def main():
+    if sys.argv[1:2] == ['batch']:
+        return batch_main(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description='Extract key:value from semicolon-separated column',
+                                     epilog='`extract_col.py batch SPEC INPUT ...` processes many CSVs in parallel (see batch -h)')
+    parser.add_argument('csv_file', help='Input CSV file, or - to stream from stdin (e.g. bgq query --format csv | ...)')
+    parser.add_argument('src_col', help='Source column name')
+    parser.add_argument('specs', nargs='+', metavar='key[:new_col]',
+                        help='Key to extract (e.g. 音响制作担当), optionally renamed (e.g. 辅佐:演出助手); '
+                             'several keys are extracted in one pass')
+    parser.add_argument('--new-col', help='New column name for a single key (default: same as the key, e.g. --new-col 演出助手)')
+    parser.add_argument('--out', help='Output CSV file, - for stdout (default: <input>_extracted.csv; stdout when reading stdin)')
+    parser.add_argument('--fail', help='Failure output file (default: <input>_failed.csv; stdin_failed.csv when reading stdin)')
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    try:
+        keys, new_cols = resolve_specs(args.specs, args.new_col)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.csv_file == '-':
+        out_file = args.out or '-'
+        fail_file = args.fail or 'stdin_failed.csv'
+    else:
+        out_file, fail_file = default_outputs(args.csv_file)
+        out_file = args.out or out_file
+        fail_file = args.fail or fail_file
+    if fail_file == '-':
+        parser.error('--fail cannot be stdout')
+    # Status messages must not end up in the CSV when it goes to stdout
+    log = sys.stderr if out_file == '-' else sys.stdout
+    profile_base = 'extract_col' if out_file == '-' else Path(out_file).with_suffix('')
+    prof = Profiler.from_args(args, f'{profile_base}.profile.json')
+
+    with prof.stage('extract') as st:
+        try:
+            ok, failed = extract_file(args.csv_file, out_file, fail_file, args.src_col, keys, new_cols)
+        except ValueError as e:
+            print(f'Error: {e}', file=sys.stderr)
+            sys.exit(1)
+        st.records = ok + failed
+
+    report(out_file, fail_file, ok, failed, log)
+
+
+def report(out_file, fail_file, ok, failed, log=sys.stdout):
+    print(f'OK: {ok} rows → {out_file}', file=log)
+    if failed:
+        print(f'FAILED: {failed} rows → {fail_file}', file=log)
     else:
-        print('No failures')
+        print('No failures', file=log)
 
 
 if __name__ == '__main__':
@@ -3,107 +3,364 @@
 
 用法:
     python3 find_dup_person_name.py > dup_persons.csv
+    python3 find_dup_person_name.py --no-cache > dup_persons.csv   # 不读写 .cache/archive 列式缓存
     python3 find_dup_person_name.py | python3 sync_index.py --index <目录ID>
+    python3 find_dup_person_name.py --mode fuzzy --scores dup_scores.csv > dup_candidates.csv
 
-输出列:
+分组方式（--mode）:
+    exact  — 归一化后的 (name, 简体中文名) 完全相同（默认）
+    fuzzy  — 近似重复候选：名称、简体中文名、别名的字符 n-gram 做 MinHash，
+             LSH 分桶得到候选对，签名估计的相似度不低于 --threshold 的人物连成一组（见 minhash.py）
+    union  — 名称、简体中文名、别名各项（含纯假名、罗马字）归一化后任一相同即相连，输出连通分量；
+             合并后超过 --max-group 人时不再合并，避免常见别名把大量人物连成一片
+
+输出列（各模式相同，可直接交给 sync_index.py）:
     person_id  — 人物 ID（sync_index.py 自动识别为人物类型）
-    order      — 同名组序号（同名人物获得同一序号）
+    order      — 组序号（同组人物获得同一序号）
+
+fuzzy 模式的相似度另写到 --scores 指定的 CSV（order, size, score），每组一行，
+score 为组内相连人物对的平均估计相似度；不写进主输出，以免 sync_index.py 把它当作条目备注发布。
+
+组序号跨期稳定，新增或消失的组不会让其他组的序号移位（sync_index.py 只需为真正变化的组调用 API）:
+    默认取组内最小的人物 ID，按此排序输出
+    exact 模式可用 --order-state 改为按名称字母序的稀疏序号，序号保存在状态文件中；
+    新组插入相邻两组的序号之间，间隔用尽时才整体重新编号
 """
 
+import argparse
 import csv
 import json
+import os
 import re
 import sys
+from array import array
+
+from archive_cache import DEFAULT_CACHE_DIR, Column, Projection, load_table
+from infobox import InfoboxExtractor
+from minhash import DEFAULT_BANDS, DEFAULT_MAX_BUCKET, MinHashLSH, ngrams, signature
+from name_normalize import normalize_alias, normalize_name, normalize_names
+from person_alias import extract_aliases
+from profiling import Profiler, add_profile_args
+from union_find import UnionFind
 
-INFOBOX_CN_PATTERN = re.compile(r'\|\s*简体中文名\s*=\s*([^\n|]*)')
-
-# 日文中两种写法均可出现的等价字符 → 统一到常用写法（用于识别变体字造成的重复人物）
-NORMALIZE_MAP = str.maketrans({
-    '\u9ad9': '\u9ad8',  # 髙 → 高
-    '\u51a8': '\u5bcc',  # 冨 → 富
-    '\ufa11': '\u5d0e',  # 﨑 → 崎
-    '\u5d5c': '\u5d0e',  # 嵜 → 崎
-    '\u90de': '\u90ce',  # 郞 → 郎
-    '\u6801': '\u67f3',  # 栁 → 柳
-    '\u4ff1': '\u5036',  # 俱 → 倶
-    '\u59ec': '\u59eb',  # 姬 → 姫
-    '\u5154': '\u514e',  # 兔 → 兎
-    '\u820d': '\u820e',  # 舍 → 舎
-    '\u885e': '\u885b',  # 衞 → 衛
-    '\u615c': '\u614e',  # 愼 → 慎
-    '\u9089': '\u8fba',  # 邉 → 辺
-    '\u908a': '\u8fba',  # 邊 → 辺
-    '\u6ff5': '\u6d5c',  # 濵 → 浜
-    '\u6ff1': '\u6d5c',  # 濱 → 浜
-    '\u5d8b': '\u5cf6',  # 嶋 → 島
-    '\u6fa4': '\u6ca2',  # 澤 → 沢
-    '\u5ee3': '\u5e83',  # 廣 → 広
-    '\u703e': '\u702c',  # 瀨 → 瀬
-    '\u9f4a': '\u6589',  # 齊 → 斉
-    '\u9f52': '\u6592',  # 齋 → 斎
-    '\u6afb': '\u685c',  # 櫻 → 桜
-    '\u95dc': '\u95a2',  # 關 → 関
-    '\u9ed1': '\u9ed2',  # 黑 → 黒
-    '\u5fb7': '\u5fb3',  # 德 → 徳
-    '\u9f8d': '\u7adc',  # 龍 → 竜
-    '\u8207': '\u4e0e',  # 與 → 与
-    '\u9435': '\u9244',  # 鐵 → 鉄
-    '\u5dbd': '\u5cb3',  # 嶽 → 岳
-    '\u7adc': '\u4e26',  # 竝 → 並
-})
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_MAX_GROUP = 20
+ORDER_GAP = 1024
+
+CN_NAME_FIELD = InfoboxExtractor(['简体中文名'])
+CN_KEY_BYTES = '简体中文名'.encode()
+# JSON 中也可以写成 \uXXXX 转义（十六进制不区分大小写）
+CN_KEY_ESCAPED = re.compile(re.escape(json.dumps('简体中文名').strip('"').encode()), re.IGNORECASE)
 
 
 def extract_cn_name(infobox: str) -> str | None:
-    m = INFOBOX_CN_PATTERN.search(infobox)
-    if m:
-        val = m.group(1).strip()
-        return val if val else None
-    return None
+    # 与 Wiki.get 一致取第一个简体中文名字段；数组形式的值不视为名称，infobox 格式有误时为 None
+    val = CN_NAME_FIELD.get(infobox)
+    return val if isinstance(val, str) else None
 
 
-def normalize_name(s: str) -> str:
-    return s.translate(NORMALIZE_MAP)
+def mentions_cn_name(raw: bytes) -> bool:
+    # 原始行里没有“简体中文名”字样（原文或转义）的人物不可能进入任何分组
+    return CN_KEY_BYTES in raw or CN_KEY_ESCAPED.search(raw) is not None
 
 
-def main():
-    person_file = sys.argv[1] if len(sys.argv) > 1 else "bangumi_archive/person.jsonlines"
-
-    name_groups: dict[tuple[str, str], list[tuple[int, str]]] = {}
-
-    with open(person_file, 'r', encoding='utf-8') as f:
-        for ln, line in enumerate(f, 1):
-            try:
-                obj = json.loads(line.strip())
-                person_id = obj.get('id')
-                if person_id is None:
-                    continue
-                infobox = obj.get('infobox', '')
-                if not infobox:
-                    continue
-                name_cn = extract_cn_name(infobox)
-                if not name_cn:
-                    continue
-                name = obj.get('name', '')
-                name_norm = normalize_name(name)
-                name_cn_norm = normalize_name(name_cn)
-                key = (name_norm, name_cn_norm)
-                name_groups.setdefault(key, []).append((person_id, name))
-            except json.JSONDecodeError:
-                print(f"警告: 第 {ln} 行 JSON 解析失败", file=sys.stderr)
-                continue
+class DupNameGrouper:
+    """按归一化后的 (name, 简体中文名) 对人物分组，供 ArchiveScanner 调用。"""
+
+    def __init__(self):
+        self.name_groups: dict[tuple[str, str], list[tuple[int, str]]] = {}
+
+    def prefilter(self, raw: bytes) -> bool:
+        return mentions_cn_name(raw)
+
+    def feed(self, ln: int, obj: dict):
+        person_id = obj.get('id')
+        if person_id is None:
+            return
+        infobox = obj.get('infobox', '')
+        if not infobox:
+            return
+        name_cn = extract_cn_name(infobox)
+        if not name_cn:
+            return
+        self.add(person_id, obj.get('name', ''), name_cn)
+
+    def add(self, person_id: int, name: str, name_cn: str):
+        key = (normalize_name(name), normalize_name(name_cn))
+        self.name_groups.setdefault(key, []).append((person_id, name))
+
+    def add_many(self, person_ids, names, names_cn):
+        """批量 add，整列一次归一化。"""
+        keys = zip(normalize_names(names), normalize_names(names_cn))
+        for person_id, name, key in zip(person_ids, names, keys):
+            self.name_groups.setdefault(key, []).append((person_id, name))
+
+    def merge(self, other):
+        for key, members in other.name_groups.items():
+            self.name_groups.setdefault(key, []).extend(members)
+
+    def write(self, out, order_state=None):
+        """写出同名组；order_state 为稀疏序号状态文件路径，缺省时序号取组内最小人物 ID。"""
+        dup_groups = {k: v for k, v in self.name_groups.items() if len(v) >= 2}
+
+        sorted_keys = sorted(dup_groups.keys())
+        if order_state:
+            ranks = update_sparse_ranks(order_state, ['\t'.join(k) for k in sorted_keys])
+            numbered = [(rank, dup_groups[key]) for rank, key in zip(ranks, sorted_keys)]
+        else:
+            numbered = sorted(((min(pid for pid, _ in members), members) for members in dup_groups.values()),
+                              key=lambda g: g[0])
+
+        writer = csv.writer(out)
+        writer.writerow(['person_id', 'order'])
+        for order, members in numbered:
+            for person_id, _ in members:
+                writer.writerow([person_id, order])
+
+        stats = f"共 {sum(len(v) for v in dup_groups.values())} 个人物，{len(dup_groups)} 个同名组"
+        print(stats, file=sys.stderr)
+
+
+def sparse_ranks(keys, previous, gap=ORDER_GAP):
+    """为升序的 keys 分配严格递增的正整数序号，尽量沿用 previous（{key: 序号}）中已有的序号。
+
+    新 key 均匀插入前后两个已有序号之间；某处间隔不够时全部按 gap 重新编号。
+    """
+    ranks = [previous.get(k) for k in keys]
+    kept = [r for r in ranks if r is not None]
+    if any(a >= b for a, b in zip(kept, kept[1:])):
+        return [(i + 1) * gap for i in range(len(keys))]
+    i = 0
+    while i < len(keys):
+        if ranks[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(keys) and ranks[j] is None:
+            j += 1
+        lo = ranks[i - 1] if i else 0
+        n = j - i
+        if j < len(keys):
+            hi = ranks[j]
+            if hi - lo <= n:
+                return [(k + 1) * gap for k in range(len(keys))]
+            for t in range(n):
+                ranks[i + t] = lo + (hi - lo) * (t + 1) // (n + 1)
+        else:
+            for t in range(n):
+                ranks[i + t] = lo + gap * (t + 1)
+        i = j
+    return ranks
+
+
+def update_sparse_ranks(path, keys, gap=ORDER_GAP):
+    """读取状态文件中的序号，为 keys 分配稀疏序号并写回（只保留本次的 key）。"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        previous = {}
+    ranks = sparse_ranks(keys, previous, gap)
+    changed = sum(previous.get(k) != r for k, r in zip(keys, ranks))
+    print(f"组序号: {len(keys)} 组，{changed} 组序号有变化", file=sys.stderr)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(dict(zip(keys, ranks)), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+    return ranks
+
+
+def _person_cn_name(obj: dict) -> str | None:
+    return extract_cn_name(obj.get('infobox') or '')
+
+
+def _has_cn_name(obj: dict) -> bool:
+    return obj.get('id') is not None and bool(_person_cn_name(obj))
 
-    dup_groups = {k: v for k, v in name_groups.items() if len(v) >= 2}
 
-    sorted_keys = sorted(dup_groups.keys())
+PERSON_PROJECTION = Projection('dup-person-names', 4, [
+    Column('id', 'i'),
+    Column('name', 's'),
+    Column('name_cn', 's', _person_cn_name),
+], keep=_has_cn_name, prefilter=mentions_cn_name)
 
-    writer = csv.writer(sys.stdout)
+
+def _person_aliases(obj: dict) -> str:
+    # 与 person_alias.py 相同的别名提取（已归一化），换行连接存为一列
+    name, infobox = obj.get('name'), obj.get('infobox')
+    if not name or not infobox:
+        return ''
+    return '\n'.join(extract_aliases(name, infobox))
+
+
+def _has_name(obj: dict) -> bool:
+    return obj.get('id') is not None and bool(obj.get('name'))
+
+
+IDENTIFIER_PROJECTION = Projection('person-identifiers', 2, [
+    Column('id', 'i'),
+    Column('name', 's'),
+    Column('aliases', 's', _person_aliases),
+], keep=_has_name)
+
+
+def person_identifiers(name: str, aliases: str) -> set[str]:
+    """人物的归一化标识：原名与简体中文名、各别名（含纯假名、罗马字），再统一变体字。"""
+    idents = {normalize_name(normalize_alias(name))}
+    if aliases:
+        idents.update(normalize_names(aliases.split('\n')))
+    idents.discard('')
+    return idents
+
+
+def fuzzy_groups(person_ids, names, aliases, threshold=DEFAULT_THRESHOLD, ngram=2,
+                 bands=DEFAULT_BANDS, max_bucket=DEFAULT_MAX_BUCKET, max_group=DEFAULT_MAX_GROUP):
+    """MinHash/LSH 近似重复候选，返回按组内最小人物 ID 排序的 [(score, [person_id, ...]), ...]（成员升序）。
+
+    相似度达到阈值的候选对用并查集连成组；超过 max_group 人的组多由常见名字串联而成，舍弃。
+    """
+    lsh = MinHashLSH(bands, max_bucket)
+    ids = array('q')
+    for person_id, name, al in zip(person_ids, names, aliases):
+        grams = set()
+        for ident in person_identifiers(name, al):
+            grams |= ngrams(ident, ngram)
+        sig = signature(grams)
+        if sig is not None:
+            lsh.add(sig)
+            ids.append(person_id)
+
+    uf = UnionFind(len(lsh))
+    edges = []
+    for i, j, sim in lsh.pairs(threshold):
+        uf.union(i, j)
+        edges.append((i, sim))
+    score_sum, edge_count = {}, {}
+    for i, sim in edges:
+        root = uf.find(i)
+        score_sum[root] = score_sum.get(root, 0) + sim
+        edge_count[root] = edge_count.get(root, 0) + 1
+
+    groups, dropped = [], 0
+    for members in uf.components():
+        if len(members) > max_group:
+            dropped += 1
+            continue
+        root = uf.find(members[0])
+        member_ids = sorted(ids[i] for i in members)
+        groups.append((round(score_sum[root] / edge_count[root], 3), member_ids))
+    groups.sort(key=lambda g: g[1][0])
+    print(f"LSH: {len(lsh)} 个人物，跳过 {lsh.skipped_buckets} 个过大的桶，舍弃 {dropped} 个超过 {max_group} 人的组",
+          file=sys.stderr)
+    return groups
+
+
+def union_groups(person_ids, names, aliases, max_group=DEFAULT_MAX_GROUP):
+    """按共有的归一化标识把人物连成连通分量，返回按最小人物 ID 排序的 [[person_id, ...], ...]。
+
+    一遍扫描：每个标识记下第一个持有它的人物，之后持有者与其合并；合并后超过 max_group 人的不合并。
+    """
+    uf = UnionFind()
+    owner = {}
+    refused = 0
+    for name, al in zip(names, aliases):
+        i = uf.add()
+        for ident in person_identifiers(name, al):
+            j = owner.setdefault(ident, i)
+            if j == i:
+                continue
+            a, b = uf.find(i), uf.find(j)
+            if a == b:
+                continue
+            if uf.size[a] + uf.size[b] > max_group:
+                refused += 1
+                continue
+            uf.union(a, b)
+    groups = [sorted(person_ids[i] for i in members) for members in uf.components()]
+    groups.sort(key=lambda g: g[0])
+    print(f"并查集: {len(uf)} 个人物，{len(owner)} 个标识，{refused} 次合并因超过 {max_group} 人被拒绝",
+          file=sys.stderr)
+    return groups
+
+
+def write_groups(out, groups):
+    writer = csv.writer(out)
     writer.writerow(['person_id', 'order'])
-    for order, key in enumerate(sorted_keys, 1):
-        for person_id, _ in dup_groups[key]:
-            writer.writerow([person_id, order])
+    for members in groups:
+        for person_id in members:
+            writer.writerow([person_id, members[0]])  # 序号取组内最小人物 ID
+    print(f"共 {sum(len(m) for m in groups)} 个人物，{len(groups)} 个组", file=sys.stderr)
+
+
+def write_group_scores(path, groups):
+    """fuzzy_groups 结果中每组的序号、人数和平均相似度写到 path。"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['order', 'size', 'score'])
+        for score, members in groups:
+            writer.writerow([members[0], len(members), score])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查找简体中文名同名的人物，输出 CSV')
+    parser.add_argument('person_file', nargs='?', default='bangumi_archive/person.jsonlines',
+                        help='person.jsonlines 路径（默认 bangumi_archive/person.jsonlines）')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'jsonlines 列式缓存目录（默认 {DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true', help='不读写列式缓存，每次重新解析 jsonlines')
+    parser.add_argument('--mode', choices=['exact', 'fuzzy', 'union'], default='exact',
+                        help='exact：(name, 简体中文名) 归一化后相同；fuzzy：MinHash/LSH 近似重复候选；'
+                             'union：任一归一化标识相同即相连（默认 exact）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'fuzzy：估计相似度阈值（默认 {DEFAULT_THRESHOLD}）')
+    parser.add_argument('--ngram', type=int, default=2, help='fuzzy：字符 n-gram 长度（默认 2）')
+    parser.add_argument('--bands', type=int, default=DEFAULT_BANDS,
+                        help=f'fuzzy：LSH 段数，须整除签名长度（默认 {DEFAULT_BANDS}）')
+    parser.add_argument('--max-bucket', type=int, default=DEFAULT_MAX_BUCKET,
+                        help=f'fuzzy：超过此人数的 LSH 桶跳过（默认 {DEFAULT_MAX_BUCKET}）')
+    parser.add_argument('--max-group', type=int, default=DEFAULT_MAX_GROUP,
+                        help=f'fuzzy：超过此人数的候选组舍弃；union：合并后超过此人数时不合并（默认 {DEFAULT_MAX_GROUP}）')
+    parser.add_argument('--order-state', default=None, metavar='FILE',
+                        help='exact：组序号按名称排序并保存为稀疏序号（JSON 状态文件），跨期沿用；'
+                             '缺省时序号取组内最小人物 ID')
+    parser.add_argument('--scores', default=None, metavar='FILE',
+                        help='fuzzy：把每组的平均估计相似度写到 FILE（order,size,score）')
+    add_profile_args(parser)
+    args = parser.parse_args()
+    if args.order_state and args.mode != 'exact':
+        parser.error('--order-state 只用于 exact 模式')
+    if args.scores and args.mode != 'fuzzy':
+        parser.error('--scores 只用于 fuzzy 模式')
+
+    # 结果写到 stdout，摘要默认写在当前目录
+    prof = Profiler.from_args(args, 'find_dup_person_name.profile.json')
+    cache_dir = None if args.no_cache else args.cache_dir
+    if args.mode in ('fuzzy', 'union'):
+        with prof.stage('load') as st:
+            table = load_table(args.person_file, IDENTIFIER_PROJECTION, cache_dir)
+            st.records = table.rows
+        with prof.stage('group', table.rows):
+            if args.mode == 'fuzzy':
+                groups = fuzzy_groups(table['id'], table['name'], table['aliases'], args.threshold, args.ngram,
+                                      args.bands, args.max_bucket, args.max_group)
+            else:
+                groups = union_groups(table['id'], table['name'], table['aliases'], args.max_group)
+        with prof.stage('write', len(groups)):
+            if args.mode == 'fuzzy':
+                if args.scores:
+                    write_group_scores(args.scores, groups)
+                groups = [members for _, members in groups]
+            write_groups(sys.stdout, groups)
+        return
 
-    stats = f"共 {sum(len(v) for v in dup_groups.values())} 个人物，{len(dup_groups)} 个同名组"
-    print(stats, file=sys.stderr)
+    with prof.stage('load') as st:
+        table = load_table(args.person_file, PERSON_PROJECTION, cache_dir)
+        st.records = table.rows
+    with prof.stage('group', table.rows):
+        grouper = DupNameGrouper()
+        grouper.add_many(table['id'], table['name'], table['name_cn'])
+    with prof.stage('write'):
+        grouper.write(sys.stdout, args.order_state)
 
 
 if __name__ == "__main__":
@@ -5,19 +5,30 @@
 #   "beautifulsoup4",
 # ]
 # ///
-import json
+import argparse
 import os
 import re
 import requests
 from collections import defaultdict
 from datetime import datetime
 
+from archive_scan import DEFAULT_WORKERS, scan, source_exists
+from profiling import Profiler, add_profile_args
+
 # 配置
 WHITE_LIST = ['9784801921436', '9784150206130']
 # 从环境变量判断是否为自动化模式（默认手动模式）
 AUTO_MODE = os.getenv("AUTO_MODE", "false").lower() == "true"
 DEFAULT_INPUT = "bangumi_archive/subject.jsonlines"
 DEFAULT_OUTPUT = "duplicate_check_results.txt"
+# 原始行中不含 ISBN 字样的条目不可能提取出 ISBN，无需解码
+RAW_ISBN = re.compile(rb'isbn', re.IGNORECASE)
+# infobox 中任意位置的 ISBN: / ISBN= 文本（含 |ISBN= 字段），以及版本特性等数组中的 [ISBN|...] 项；
+# 直接在原文上匹配，不要求 wikitext 格式正确
+ISBN_PATTERNS = [
+    (re.compile(r'ISBN\s*[:=]\s*(\d[\d-]*\d)', re.IGNORECASE), False),
+    (re.compile(r'\[ISBN\s*\|\s*(\d[\d-]*\d)\]', re.IGNORECASE), True),
+]
 
 # 尝试导入可选库
 try:
@@ -57,18 +68,13 @@ def get_report_page_links() -> list:
 def extract_japanese_isbns(infobox: str) -> list:
     """提取ISBN-13（9784开头），记录是否来自版本信息"""
     isbns = []
-    patterns = [
-        (r'ISBN\s*[:=]\s*(\d[\d-]*\d)', False),
-        (r'\[ISBN\s*\|\s*(\d[\d-]*\d)\]', True)
-    ]
-    
-    for pattern, is_version in patterns:
-        for match in re.findall(pattern, infobox, re.IGNORECASE):
-            isbn = match.replace('-', '').replace(' ', '').strip()
+    for pattern, is_version in ISBN_PATTERNS:
+        for match in pattern.findall(infobox):
+            isbn = match.replace('-', '')
             if isbn.startswith('9784') and len(isbn) == 13:
                 if not any(item['isbn'] == isbn for item in isbns):
                     isbns.append({'isbn': isbn, 'is_version': is_version})
-    
+
     return isbns
 
 
@@ -154,67 +160,83 @@ def classify_duplicate_group(entries: list) -> str:
     return "疑似不同作品误填"
 
 
-def find_duplicate_isbns(jsonlines_file: str, reported_links: set) -> dict:
+class IsbnCollector:
+    """按 ISBN 收集条目，供 ArchiveScanner 调用。"""
+
+    def __init__(self, reported_links: set):
+        self.reported_links = reported_links
+        self.isbn_map = defaultdict(list)
+        self.total_books = 0
+        self.whitelisted = 0
+        self.multi_isbn = 0
+
+    def prefilter(self, raw: bytes) -> bool:
+        return RAW_ISBN.search(raw) is not None
+
+    def feed(self, line_num: int, data: dict):
+        try:
+            subject_id = data.get('id')
+            if not subject_id:
+                return
+
+            name = data.get('name', f"未知名称 (ID: {subject_id})")
+            is_series = data.get('series', False)
+            isbns = extract_japanese_isbns(data.get('infobox', ''))
+
+            if isbns:
+                if len(isbns) > 1:
+                    self.multi_isbn += 1
+
+                for info in isbns:
+                    isbn = info['isbn']
+                    if isbn in WHITE_LIST:
+                        self.whitelisted += 1
+                        continue
+
+                    self.total_books += 1
+                    url = f"https://bgm.tv/subject/{subject_id}"
+                    reported = url in self.reported_links
+
+                    if not any(e['id'] == subject_id for e in self.isbn_map[isbn]):
+                        self.isbn_map[isbn].append({
+                            "id": subject_id,
+                            "url": url,
+                            "name": name,
+                            "series": is_series,
+                            "reported": reported,
+                            "is_version": info['is_version']
+                        })
+
+        except Exception as e:
+            print(f"处理第 {line_num} 行出错: {str(e)}")
+
+    def merge(self, other: 'IsbnCollector'):
+        self.total_books += other.total_books
+        self.whitelisted += other.whitelisted
+        self.multi_isbn += other.multi_isbn
+        for isbn, entries in other.isbn_map.items():
+            merged = self.isbn_map[isbn]
+            for e in entries:
+                if not any(m['id'] == e['id'] for m in merged):
+                    merged.append(e)
+
+
+def find_duplicate_isbns(jsonlines_file: str, reported_links: set, workers: int = DEFAULT_WORKERS) -> dict:
     """查找重复ISBN并分类"""
-    isbn_map = defaultdict(list)
-    if not os.path.exists(jsonlines_file):
+    if not source_exists(jsonlines_file):
         print(f"错误：文件 {jsonlines_file} 不存在")
         return {}
     
-    total_lines = sum(1 for _ in open(jsonlines_file, 'r', encoding='utf-8')) if os.path.exists(jsonlines_file) else 0
-    print(f"\n正在分析 {jsonlines_file}（共 {total_lines} 行）...")
-    
-    total_books = 0
-    whitelisted = 0
-    multi_isbn = 0
+    print(f"\n正在分析 {jsonlines_file}...")
     
-    with open(jsonlines_file, 'r', encoding='utf-8') as f:
-        iterator = f
-        
-        for line_num, line in enumerate(iterator, 1):
-            try:
-                data = json.loads(line.strip())
-                subject_id = data.get('id')
-                if not subject_id:
-                    continue
-                
-                name = data.get('name', f"未知名称 (ID: {subject_id})")
-                is_series = data.get('series', False)
-                isbns = extract_japanese_isbns(data.get('infobox', ''))
-                
-                if isbns:
-                    if len(isbns) > 1:
-                        multi_isbn += 1
-                    
-                    for info in isbns:
-                        isbn = info['isbn']
-                        if isbn in WHITE_LIST:
-                            whitelisted += 1
-                            continue
-                        
-                        total_books += 1
-                        url = f"https://bgm.tv/subject/{subject_id}"
-                        reported = url in reported_links
-                        
-                        if not any(e['id'] == subject_id for e in isbn_map[isbn]):
-                            isbn_map[isbn].append({
-                                "id": subject_id,
-                                "url": url,
-                                "name": name,
-                                "series": is_series,
-                                "reported": reported,
-                                "is_version": info['is_version']
-                            })
-            
-            except Exception as e:
-                print(f"处理第 {line_num} 行出错: {str(e)}")
+    collector, = scan(jsonlines_file, IsbnCollector(reported_links), workers=workers)
     
-    print(f"发现 {total_books} 个ISBN，{multi_isbn} 个多ISBN条目")
-    if whitelisted:
-        print(f"已跳过 {whitelisted} 个白名单ISBN")
+    print(f"发现 {collector.total_books} 个ISBN，{collector.multi_isbn} 个多ISBN条目")
+    if collector.whitelisted:
+        print(f"已跳过 {collector.whitelisted} 个白名单ISBN")
     
     filtered = {}
-    for isbn, entries in isbn_map.items():
+    for isbn, entries in collector.isbn_map.items():
         if len(entries) >= 2:
             filtered[isbn] = {
                 "all": entries,
@@ -227,6 +249,16 @@ def find_duplicate_isbns(jsonlines_file: str, reported_links: set) -> dict:
 
 
 def main():
+    parser = argparse.ArgumentParser(description='查找重复 ISBN 的条目（限 9784 开头的日本出版物）')
+    parser.add_argument('--input', default=None,
+                        help=f'subject.jsonlines 路径（不指定时自动模式用 {DEFAULT_INPUT}，手动模式交互输入）')
+    parser.add_argument('--output', default=None,
+                        help=f'结果输出路径（不指定时自动模式用 {DEFAULT_OUTPUT}，手动模式交互输入）')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'解析 jsonlines 的进程数（默认 {DEFAULT_WORKERS}）')
+    add_profile_args(parser)
+    args = parser.parse_args()
+
     if not has_bs4:
         return
         
@@ -234,10 +266,15 @@ def main():
     
     # 获取汇报帖链接（自动/手动模式分别处理）
     report_links = get_report_page_links()
-    reported_links = fetch_and_extract_report_links(report_links)
+    prof = Profiler.from_args(args, os.path.splitext(args.output or DEFAULT_OUTPUT)[0] + '.profile.json')
+    with prof.stage('fetch_reports', len(report_links)):
+        reported_links = fetch_and_extract_report_links(report_links)
     
-    # 路径处理（自动模式用默认路径，手动模式允许输入）
-    if AUTO_MODE:
+    # 路径处理（命令行参数优先，自动模式用默认路径，手动模式允许输入）
+    if args.input or args.output:
+        input_file = args.input or DEFAULT_INPUT
+        output_file = args.output or DEFAULT_OUTPUT
+    elif AUTO_MODE:
         input_file = DEFAULT_INPUT
         output_file = DEFAULT_OUTPUT
         print(f"\n使用默认路径:")
@@ -257,7 +294,9 @@ def main():
         else:
             f.write("\n")
     
-    duplicates = find_duplicate_isbns(input_file, reported_links)
+    with prof.stage('scan') as st:
+        duplicates = find_duplicate_isbns(input_file, reported_links, args.workers)
+        st.records = len(duplicates)
     
     if not duplicates:
         msg = "未发现符合条件的重复ISBN"
@@ -14,19 +14,59 @@
     uv run find_missing_cn_name.py
     uv run find_missing_cn_name.py bangumi_archive results
     uv run find_missing_cn_name.py bangumi_archive results --whitelist whitelist.txt
+
+转换结果缓存在 .cache/opencc-cn-name（见 cn_name_cache.py），每周只需转换新出现的名称。
+人物与角色两个文件同时扫描，未缓存的名称按批交给进程池转换，CSV 按原顺序边转换边写出，
+结果与串行运行逐字节相同。
 """
 
 import argparse
 import csv
-import json
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-from opencc_cn_name import refined_to_cn
+from archive_scan import DEFAULT_WORKERS, raw_string_field, scan, source_exists
+from cn_name_cache import DEFAULT_CACHE_DIR, CnNameCache, conversion_pool
+from infobox import InfoboxExtractor, well_formed
+from profiling import Profiler, add_profile_args
 
 HAS_KANA = re.compile(r'[\u3040-\u30cd\u30cf-\u30ff\u31f0-\u31ff\u33a0-\u33ff]')
-INFOBOX_CN = re.compile(r'\|\s*简体中文名\s*=\s*([^\n|]*)')
+CN_NAME_FIELD = InfoboxExtractor(['简体中文名'])
+
+# 原始字节行上的预筛：infobox 里唯一一处“简体中文名”是字段行（`|` 位于行首且不是末行）、
+# 值以非空白字符开头时，解码后必被跳过。值首字节排除 ASCII 空白、转义符、`|`、`"`、`{`（可能是空数组）
+# 以及 Unicode 空白可能的 UTF-8 首字节（C2/E1/E2/E3）。
+CN_KEY_BYTES = '简体中文名'.encode()
+RAW_CN_FILLED = re.compile(rb'\|[ \t]*' + re.escape(CN_KEY_BYTES) + rb'[ \t]*=[ \t]*[^\s\\|"{\xc2\xe1\xe2\xe3]')
+# 换行转义之后、跳过空白后的第一个非空白字符
+RAW_LINE_CONTENT = re.compile(rb'(?:[ \t]|\\[rntf])*(?:[^ \t\\\xc2\xe1\xe2\xe3]|\\[^rntfu])')
+
+
+def _is_newline_escape(raw, i):
+    """raw[i:i + 2] 是否为 JSON 字符串中的 `\\n` 转义（而非转义反斜杠后跟 n）。"""
+    if raw[i:i + 2] != b'\\n':
+        return False
+    k = i
+    while raw[k - 1] == 0x5c:  # 反斜杠
+        k -= 1
+    return (i - k) % 2 == 0
+
+
+def _at_line_start(raw, start, pos):
+    while pos > start and raw[pos - 1] in b' \t':
+        pos -= 1
+    return pos == start or (pos - 2 >= start and _is_newline_escape(raw, pos - 2))
+
+
+def _has_next_line(raw, pos, end):
+    i = raw.find(b'\\n', pos, end)
+    while i >= 0:
+        if _is_newline_escape(raw, i) and RAW_LINE_CONTENT.match(raw, i + 2, end):
+            return True
+        i = raw.find(b'\\n', i + 1, end)
+    return False
 
 
 def load_whitelist(paths):
@@ -45,44 +85,110 @@ def load_whitelist(paths):
     return ids
 
 
-def scan_jsonlines(jsonlines_path, exclude_ids=None):
-    results = []
-    exclude_ids = exclude_ids or set()
-    with open(jsonlines_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                d = json.loads(line.strip())
-            except json.JSONDecodeError:
-                continue
+class MissingCnNameScanner:
+    """筛选缺少简体中文名、名称可转换的条目，供 ArchiveScanner 调用。
+
+    扫描时只收集候选 (id, 名称)，合并后由 write() / convert() 统一去重、转换。
+    """
+
+    def __init__(self, exclude_ids=None):
+        self.exclude_ids = exclude_ids or set()
+        self.candidates = []
+
+    def prefilter(self, raw):
+        """原始行必定会被 feed 丢弃时返回 False（infobox 为空、有填写的简体中文名字段行、名称为空或含假名）。"""
+        span = raw_string_field(raw, b'infobox')
+        if span is None:
+            return True
+        start, end = span
+        if start == end:
+            return False
+        if raw.count(CN_KEY_BYTES) == 1:
+            pos = raw.find(CN_KEY_BYTES)
+            if start <= pos < end:
+                bar = raw.rfind(b'|', start, pos)
+                if (bar >= 0 and RAW_CN_FILLED.match(raw, bar)
+                        and _at_line_start(raw, start, bar) and _has_next_line(raw, pos, end)):
+                    return False
+        span = raw_string_field(raw, b'name')
+        if span is None:
+            return True
+        name = raw[span[0]:span[1]]
+        if not name:
+            return False
+        if b'\\' not in name and HAS_KANA.search(name.decode('utf-8', 'replace')):
+            return False
+        return True
+
+    def feed(self, ln, d):
+        item_id = d.get('id')
+        if item_id is None or item_id in self.exclude_ids:
+            return
+
+        infobox = d.get('infobox', '')
+        if not infobox:
+            return
+
+        # 格式有误的 infobox 无从判断是否已有简体中文名（bgm_tv_wiki.parse 会报错），不作为候选
+        if not well_formed(infobox) or CN_NAME_FIELD.get(infobox):
+            return
+
+        name = d.get('name', '')
+        if not name or HAS_KANA.search(name):
+            return
+
+        self.candidates.append((item_id, name))
+
+    def merge(self, other):
+        self.candidates.extend(other.candidates)
+
+    def iter_results(self, cache=None, pool=None, workers=1):
+        """按扫描顺序给出转换结果与原名不同的 (id, 简体中文名)。
+
+        cache 为 CnNameCache，缺省时只在本次内去重；pool 为 conversion_pool(workers) 时分批并行转换。
+        """
+        cache = cache or CnNameCache(None)
+        for item_id, name, result in cache.convert_stream(self.candidates, pool, workers):
+            if result != name:
+                yield item_id, result
 
-            item_id = d.get('id')
-            if item_id is None or item_id in exclude_ids:
-                continue
+    def convert(self, cache=None, pool=None, workers=1):
+        return list(self.iter_results(cache, pool, workers))
 
-            infobox = d.get('infobox', '')
-            if not infobox:
-                continue
+    def write(self, output_path, entity_type, cache=None, pool=None, workers=1):
+        """边转换边写出 CSV，返回写出的条目数。"""
+        n = 0
+        with open(output_path, 'w', newline='') as out:
+            w = csv.writer(out)
+            w.writerow([f'{entity_type}_id', '简体中文名'])
+            for item_id, cn_name in self.iter_results(cache, pool, workers):
+                w.writerow([item_id, cn_name])
+                n += 1
+        return n
 
-            m = INFOBOX_CN.search(infobox)
-            if m and m.group(1).strip():
-                continue
 
-            name = d.get('name', '')
-            if not name or HAS_KANA.search(name):
-                continue
+def scan_jsonlines(jsonlines_path, exclude_ids=None, cache=None):
+    scanner, = scan(jsonlines_path, MissingCnNameScanner(exclude_ids))
+    return scanner.convert(cache)
 
-            result = refined_to_cn(name)
 
-            if result != name:
-                results.append((item_id, result))
-    return results
+def process_entity(prof, entity_type, jsonlines_path, output_path, exclude_ids, cache, pool, workers):
+    """扫描一个 jsonlines 并写出 CSV，返回写出的条目数；main 中人物、角色各在一个线程中运行。
+
+    并行扫描与转换的进程池都以 spawn 启动（见 archive_scan.py、cn_name_cache.py），可在线程中调用。
+    """
+    with prof.stage(entity_type) as st:
+        scanner, = scan(jsonlines_path, MissingCnNameScanner(exclude_ids), workers=workers)
+        st.records = len(scanner.candidates)
+    with prof.stage(f'{entity_type}_convert', len(scanner.candidates)):
+        return scanner.write(output_path, entity_type, cache, pool, workers)
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='查找没有简体中文名但可转换出简体中文名的人物/角色，输出 wikiBatch CSV。'
     )
-    parser.add_argument('archive_dir', nargs='?', default='bangumi_archive', help='数据目录（默认 bangumi_archive）')
+    parser.add_argument('archive_dir', nargs='?', default='bangumi_archive', help='数据目录或 Archive zip（默认 bangumi_archive）')
     parser.add_argument('output_dir', nargs='?', default='results', help='输出目录（默认 results）')
     parser.add_argument(
         '--whitelist',
@@ -91,30 +197,43 @@ def main():
         metavar='FILE',
         help='白名单文件，每行一个 ID（# 开头为注释），可多次指定；名单内 ID 的人物被排除',
     )
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'名称转换结果缓存目录（默认 {DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true', help='不读写转换缓存，每个名称都重新转换')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'解析 jsonlines 和转换名称的进程数，1 为串行（默认 {DEFAULT_WORKERS}）')
+    add_profile_args(parser)
     args = parser.parse_args()
 
     archive_dir = args.archive_dir
     output_dir = args.output_dir
     os.makedirs(output_dir, exist_ok=True)
 
+    prof = Profiler.from_args(args, os.path.join(output_dir, 'missing-cn-name.profile.json'))
     exclude_ids = load_whitelist(args.whitelist)
     print(f'已加载白名单 {len(exclude_ids)} 个 ID', file=sys.stderr)
+    cache = CnNameCache(None if args.no_cache else args.cache_dir)
 
+    entities = []
     for entity_type, label in [('person', '人物'), ('character', '角色')]:
         jsonlines_path = os.path.join(archive_dir, f'{entity_type}.jsonlines')
-        if not os.path.exists(jsonlines_path):
+        if not source_exists(jsonlines_path):
             print(f'{jsonlines_path} 不存在，跳过', file=sys.stderr)
             continue
-
-        results = scan_jsonlines(jsonlines_path, exclude_ids if entity_type == 'person' else None)
         output_path = os.path.join(output_dir, f'missing-cn-name-{entity_type}.csv')
-        with open(output_path, 'w', newline='') as out:
-            w = csv.writer(out)
-            w.writerow([f'{entity_type}_id', '简体中文名'])
-            for item_id, cn_name in results:
-                w.writerow([item_id, cn_name])
-
-        print(f'{label}: {len(results)} → {output_path}', file=sys.stderr)
+        entities.append((entity_type, label, jsonlines_path, output_path))
+
+    workers = max(1, args.workers)
+    with conversion_pool(workers) as pool, ThreadPoolExecutor(max(1, len(entities))) as threads:
+        futures = [
+            threads.submit(process_entity, prof, entity_type, jsonlines_path, output_path,
+                           exclude_ids if entity_type == 'person' else None, cache, pool, workers)
+            for entity_type, _, jsonlines_path, output_path in entities
+        ]
+        for (_, label, _, output_path), fut in zip(entities, futures):
+            print(f'{label}: {fut.result()} → {output_path}', file=sys.stderr)
+
+    cache.save()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,334 @@
+# /// script
+# requires-python = ">=3.10"
+# ///
+"""生成指定规模的合成 Archive，用于在大数据量下测试各脚本的性能。
+
+输出与官方 Archive 相同格式的 subject / person / character / subject-relations jsonlines：
+
+- 书籍条目按系列生成，系列条目（series=true）通过 1003（单行本）关联各卷，
+  卷名混用阿拉伯、汉字、罗马、全角、圆圈数字，少量系列混用格式或打乱 order，供卷序检查
+- 书籍 infobox 含 9784 开头的 ISBN，少量条目共用 ISBN，供重复 ISBN 检查
+- 人物、角色 infobox 含简体中文名和别名（日文名、纯假名、罗马字、昵称），
+  少量重名、缺失简体中文名，供同名人物、缺失简体中文名检查和别名生成
+
+相同的 --seed 与数量参数总是生成相同的数据。
+
+用法:
+    uv run gen_archive.py synthetic_archive
+    uv run gen_archive.py synthetic_archive --subjects 2000000 --persons 1000000 --relations 10000000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+
+from profiling import Profiler, add_profile_args
+
+# (日文写法, 简体写法, 假名, 罗马字)
+FAMILY_NAMES = [
+    ('佐藤', '佐藤', 'さとう', 'Satou'), ('鈴木', '铃木', 'すずき', 'Suzuki'),
+    ('高橋', '高桥', 'たかはし', 'Takahashi'), ('田中', '田中', 'たなか', 'Tanaka'),
+    ('伊藤', '伊藤', 'いとう', 'Itou'), ('渡辺', '渡边', 'わたなべ', 'Watanabe'),
+    ('山本', '山本', 'やまもと', 'Yamamoto'), ('中村', '中村', 'なかむら', 'Nakamura'),
+    ('小林', '小林', 'こばやし', 'Kobayashi'), ('加藤', '加藤', 'かとう', 'Katou'),
+    ('吉田', '吉田', 'よしだ', 'Yoshida'), ('山田', '山田', 'やまだ', 'Yamada'),
+    ('佐々木', '佐佐木', 'ささき', 'Sasaki'), ('斎藤', '斋藤', 'さいとう', 'Saitou'),
+    ('松本', '松本', 'まつもと', 'Matsumoto'), ('井上', '井上', 'いのうえ', 'Inoue'),
+    ('木村', '木村', 'きむら', 'Kimura'), ('林', '林', 'はやし', 'Hayashi'),
+    ('清水', '清水', 'しみず', 'Shimizu'), ('山崎', '山崎', 'やまざき', 'Yamazaki'),
+    ('森', '森', 'もり', 'Mori'), ('池田', '池田', 'いけだ', 'Ikeda'),
+    ('橋本', '桥本', 'はしもと', 'Hashimoto'), ('石川', '石川', 'いしかわ', 'Ishikawa'),
+    ('長谷川', '长谷川', 'はせがわ', 'Hasegawa'), ('近藤', '近藤', 'こんどう', 'Kondou'),
+    ('水樹', '水树', 'みずき', 'Mizuki'), ('藤沢', '藤泽', 'ふじさわ', 'Fujisawa'),
+    ('広瀬', '广濑', 'ひろせ', 'Hirose'), ('櫻井', '樱井', 'さくらい', 'Sakurai'),
+]
+GIVEN_NAMES = [
+    ('奈々', '奈奈', 'なな', 'Nana'), ('翔太', '翔太', 'しょうた', 'Shouta'),
+    ('美香', '美香', 'みか', 'Mika'), ('健一', '健一', 'けんいち', 'Ken\'ichi'),
+    ('愛', '爱', 'あい', 'Ai'), ('大輔', '大辅', 'だいすけ', 'Daisuke'),
+    ('真綾', '真绫', 'まあや', 'Maaya'), ('浩二', '浩二', 'こうじ', 'Kouji'),
+    ('陽子', '阳子', 'ようこ', 'Youko'), ('達也', '达也', 'たつや', 'Tatsuya'),
+    ('彩', '彩', 'あや', 'Aya'), ('亮', '亮', 'りょう', 'Ryou'),
+    ('恵', '惠', 'めぐみ', 'Megumi'), ('拓海', '拓海', 'たくみ', 'Takumi'),
+    ('由紀', '由纪', 'ゆき', 'Yuki'), ('誠', '诚', 'まこと', 'Makoto'),
+    ('千尋', '千寻', 'ちひろ', 'Chihiro'), ('隆', '隆', 'たかし', 'Takashi'),
+    ('麻衣', '麻衣', 'まい', 'Mai'), ('優', '优', 'ゆう', 'Yuu'),
+    ('花澤', '花泽', 'はなざわ', 'Hanazawa'), ('早見', '早见', 'はやみ', 'Hayami'),
+    ('和樹', '和树', 'かずき', 'Kazuki'), ('綾香', '绫香', 'あやか', 'Ayaka'),
+]
+KATAKANA_NAMES = ['ルルーシュ', 'スザク', 'アリス', 'エミリア', 'ジョン', 'マリア', 'レオン', 'クララ', 'ノア', 'ソフィア']
+NICKNAMES = ['ちゃん', 'さん', '様', 'たん', 'っち']
+TITLE_WORDS = [
+    '魔法', '少女', '学園', '物語', '恋', '空', '星', '夜', '月', '剣', '世界', '異世界', '旅', '約束',
+    '青春', '記憶', '花', '夏', '冬', '王国', '迷宮', '勇者', '姫', '騎士', '探偵', '日常', '放課後', '未来',
+]
+PUBLISHERS = ['KADOKAWA', '講談社', '集英社', '小学館', '秋田書店', '白泉社', 'スクウェア・エニックス', '一迅社', '芳文社']
+BOOK_INFOBOX_TYPES = ['animanga/Manga', 'animanga/Novel', 'animanga/Book']
+OTHER_SUBJECT_TYPES = [(2, 'animanga/TVAnime'), (3, 'Album'), (4, 'Game'), (6, 'real/Television')]
+OTHER_RELATION_TYPES = [1, 2, 3, 4, 6, 7, 8, 9, 11, 12, 14, 99, 4002, 4006]
+
+CHINESE_DIGITS = '〇一二三四五六七八九'
+CIRCLED = '①②③④⑤⑥⑦⑧⑨⑩⑪⑫⑬⑭⑮⑯⑰⑱⑲⑳'
+ROMAN = [(1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'), (100, 'C'), (90, 'XC'),
+         (50, 'L'), (40, 'XL'), (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')]
+
+
+def chinese_number(n):
+    if n < 10:
+        return CHINESE_DIGITS[n]
+    tens, ones = divmod(n, 10)
+    if n >= 100:
+        return str(n)
+    return ('' if tens == 1 else CHINESE_DIGITS[tens]) + '十' + ('' if ones == 0 else CHINESE_DIGITS[ones])
+
+
+def roman_number(n):
+    out = []
+    for value, numeral in ROMAN:
+        while n >= value:
+            out.append(numeral)
+            n -= value
+    return ''.join(out)
+
+
+def fullwidth_number(n):
+    return ''.join(chr(ord(c) + 0xFEE0) for c in str(n))
+
+
+def circled_number(n):
+    return CIRCLED[n - 1] if 1 <= n <= len(CIRCLED) else str(n)
+
+
+VOLUME_STYLES = [
+    lambda t, n: f'{t} ({n})',
+    lambda t, n: f'{t}（{chinese_number(n)}）',
+    lambda t, n: f'{t} {roman_number(n)}',
+    lambda t, n: f'{t} {fullwidth_number(n)}',
+    lambda t, n: f'{t} {circled_number(n)}',
+    lambda t, n: f'{t} {n}',
+    lambda t, n: f'{t} 第{chinese_number(n)}巻',
+    lambda t, n: f'{t}({n})',
+]
+
+
+def isbn13(rng):
+    body = '9784' + ''.join(rng.choice('0123456789') for _ in range(8))
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def infobox(template, fields):
+    """fields 为 (key, value) 列表，value 为列表时输出为数组（元素为 (name, value) 或 value）。"""
+    lines = [f'{{{{Infobox {template}']
+    for key, value in fields:
+        if isinstance(value, list):
+            lines.append(f'|{key}={{')
+            for item in value:
+                lines.append(f'[{item[0]}|{item[1]}]' if isinstance(item, tuple) else f'[{item}]')
+            lines.append('}')
+        else:
+            lines.append(f'|{key}= {value}')
+    lines.append('}}')
+    return '\r\n'.join(lines)
+
+
+class Writer:
+    def __init__(self, out_dir, name, compress):
+        path = os.path.join(out_dir, f'{name}.jsonlines' + ('.gz' if compress else ''))
+        self.path = path
+        self.f = gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) if compress else open(path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, obj):
+        self.f.write(json.dumps(obj, ensure_ascii=False, separators=(',', ':')))
+        self.f.write('\n')
+        self.count += 1
+
+    def close(self):
+        self.f.close()
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.recent_names = []
+
+    def title(self):
+        rng = self.rng
+        return ''.join(rng.sample(TITLE_WORDS, rng.randint(2, 3))) + rng.choice(['', '', 'の' + rng.choice(TITLE_WORDS)])
+
+    def subjects(self, subjects, relations):
+        """生成条目，并在同一遍中写出关联（1003 单行本关联 + 随机其他关联）。"""
+        args, rng = self.args, self.rng
+        n = args.subjects
+        isbn_pool = []
+        sid = 1
+        while sid <= n:
+            if rng.random() < args.book_ratio:
+                next_sid = self._series(subjects, relations, sid, n, isbn_pool)
+            else:
+                self._other_subject(subjects, sid)
+                next_sid = sid + 1
+            # 其余关联按剩余配额均摊到之后的每个条目
+            for s in range(sid, next_sid):
+                rate = max(0.0, (args.relations - relations.count) / (n - s + 1))
+                self._extra_relations(relations, s, n, rate)
+            sid = next_sid
+
+    def _series(self, subjects, relations, sid, n, isbn_pool):
+        rng = self.rng
+        volumes = min(rng.choice([1, 2, 3, 5, 8, 12, 20, 40]), n - sid)
+        base = self.title()
+        style = rng.randrange(len(VOLUME_STYLES))
+        template = rng.choice(BOOK_INFOBOX_TYPES)
+        publisher = rng.choice(PUBLISHERS)
+        head = sid
+        subjects.write(self._book(head, base, template, publisher, True, None))
+        orders = list(range(volumes))
+        if volumes > 2 and rng.random() < 0.03:
+            i = rng.randrange(volumes - 1)
+            orders[i], orders[i + 1] = orders[i + 1], orders[i]
+        for k in range(volumes):
+            vol_style = style if rng.random() > 0.02 else rng.randrange(len(VOLUME_STYLES))
+            name = VOLUME_STYLES[vol_style](base, k + 1)
+            if rng.random() < 0.01 and isbn_pool:
+                isbn = rng.choice(isbn_pool)
+            else:
+                isbn = isbn13(rng)
+                if len(isbn_pool) < 10000:
+                    isbn_pool.append(isbn)
+                else:
+                    isbn_pool[rng.randrange(10000)] = isbn
+            subjects.write(self._book(head + 1 + k, name, template, publisher, False, isbn))
+            relations.write({'subject_id': head, 'relation_type': 1003,
+                             'related_subject_id': head + 1 + k, 'order': orders[k]})
+        return head + 1 + volumes
+
+    def _book(self, sid, name, template, publisher, series, isbn):
+        rng = self.rng
+        fields = [
+            ('中文名', name if rng.random() < 0.5 else ''),
+            ('别名', [name.replace(' ', '')] if rng.random() < 0.2 else []),
+            ('出版社', publisher),
+            ('发售日', f'{rng.randint(1990, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'),
+        ]
+        if isbn:
+            fields.append(('ISBN', isbn))
+            fields.append(('页数', str(rng.randint(150, 400))))
+            if rng.random() < 0.05:
+                fields.append(('版本特性', [('ISBN', isbn13(rng))]))
+        return {
+            'id': sid, 'type': 1, 'name': name, 'name_cn': '',
+            'infobox': infobox(template, fields), 'platform': 1001 if series else 1002,
+            'summary': '', 'nsfw': False, 'series': series,
+        }
+
+    def _other_subject(self, subjects, sid):
+        rng = self.rng
+        subject_type, template = rng.choice(OTHER_SUBJECT_TYPES)
+        name = self.title()
+        subjects.write({
+            'id': sid, 'type': subject_type, 'name': name, 'name_cn': '',
+            'infobox': infobox(template, [('中文名', name), ('别名', [])]),
+            'platform': 0, 'summary': '', 'nsfw': False, 'series': False,
+        })
+
+    def _extra_relations(self, relations, sid, n, rate):
+        rng = self.rng
+        count = int(rate) + (rng.random() < rate - int(rate))
+        for _ in range(count):
+            relations.write({'subject_id': sid, 'relation_type': rng.choice(OTHER_RELATION_TYPES),
+                             'related_subject_id': rng.randint(1, n), 'order': 0})
+
+    def name(self):
+        """返回 (日文名, 简体中文名, 纯假名, 罗马字)，少量复用近期的名字以产生重名。"""
+        rng = self.rng
+        if self.recent_names and rng.random() < self.args.dup_ratio:
+            return rng.choice(self.recent_names)
+        if rng.random() < 0.1:
+            kata = rng.choice(KATAKANA_NAMES) + '・' + rng.choice(KATAKANA_NAMES)
+            result = (kata, '', '', '')
+        else:
+            fam = rng.choice(FAMILY_NAMES)
+            given = rng.choice(GIVEN_NAMES)
+            if rng.random() < 0.15:
+                given2 = rng.choice(GIVEN_NAMES)
+                given = tuple(a + b for a, b in zip(given, given2[:3])) + (given[3] + given2[3].lower(),)
+            result = (fam[0] + given[0], fam[1] + given[1], f'{fam[2]} {given[2]}', f'{fam[3]} {given[3]}')
+        if len(self.recent_names) < 5000:
+            self.recent_names.append(result)
+        else:
+            self.recent_names[rng.randrange(5000)] = result
+        return result
+
+    def people(self, writer, count, template, extra):
+        rng = self.rng
+        for pid in range(1, count + 1):
+            jp, cn, kana, romaji = self.name()
+            if rng.random() < self.args.missing_cn_ratio:
+                cn = ''
+            aliases = [('第二中文名', ''), ('英文名', ''), ('日文名', jp if rng.random() < 0.3 else ''),
+                       ('纯假名', kana), ('罗马字', romaji)]
+            if kana and rng.random() < 0.2:
+                aliases.append(('昵称', '、'.join(kana.split()[-1] + s for s in rng.sample(NICKNAMES, 2))))
+            if rng.random() < 0.1:
+                aliases.append(jp.replace('・', ''))
+            fields = [('简体中文名', cn), ('别名', aliases), ('性别', rng.choice(['男', '女']))]
+            writer.write({'id': pid, 'name': jp, **extra(pid), 'infobox': infobox(template, fields),
+                          'summary': '', 'comments': rng.randint(0, 50), 'collects': rng.randint(0, 500)})
+
+    def person_extra(self, pid):
+        return {'type': 1, 'career': [self.rng.choice(['artist', 'seiyu', 'mangaka', 'writer', 'producer'])]}
+
+    def character_extra(self, pid):
+        return {'role': 1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成 Archive，用于大数据量性能测试')
+    parser.add_argument('output_dir', nargs='?', default='synthetic_archive', help='输出目录（默认 synthetic_archive）')
+    parser.add_argument('--subjects', type=int, default=200000, help='条目数（默认 200000）')
+    parser.add_argument('--persons', type=int, default=100000, help='人物数（默认 100000）')
+    parser.add_argument('--characters', type=int, default=100000, help='角色数（默认 100000）')
+    parser.add_argument('--relations', type=int, default=1000000,
+                        help='条目关联数（默认 1000000，含 1003 单行本关联；实际数量为近似值）')
+    parser.add_argument('--book-ratio', type=float, default=0.6, help='书籍（单行本）条目占比（默认 0.6）')
+    parser.add_argument('--dup-ratio', type=float, default=0.02, help='人物、角色重名比例（默认 0.02）')
+    parser.add_argument('--missing-cn-ratio', type=float, default=0.3, help='缺失简体中文名比例（默认 0.3）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（默认 0）')
+    parser.add_argument('--gz', action='store_true', help='输出 .jsonlines.gz')
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    prof = Profiler.from_args(args, os.path.join(args.output_dir, 'gen_archive.profile.json'))
+    gen = Generator(args)
+
+    subjects = Writer(args.output_dir, 'subject', args.gz)
+    relations = Writer(args.output_dir, 'subject-relations', args.gz)
+    with prof.stage('subject') as st:
+        gen.subjects(subjects, relations)
+        st.records = subjects.count + relations.count
+    for w in (subjects, relations):
+        w.close()
+        print(f'{w.path}: {w.count} 行', file=sys.stderr)
+
+    for name, count, template, extra in (
+            ('person', args.persons, 'Person', gen.person_extra),
+            ('character', args.characters, 'Crt', gen.character_extra)):
+        with prof.stage(name, count):
+            w = Writer(args.output_dir, name, args.gz)
+            gen.people(w, count, template, extra)
+            w.close()
+        print(f'{w.path}: {w.count} 行', file=sys.stderr)
+
+    with open(os.path.join(args.output_dir, 'data_version.json'), 'w', encoding='utf-8') as f:
+        json.dump({'created_at': f'synthetic-seed-{args.seed}'}, f)
+
+
+if __name__ == '__main__':
+    main()
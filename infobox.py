@@ -0,0 +1,151 @@
+"""按需提取 wiki infobox 字段，各脚本共用。
+
+    CN_NAME = InfoboxExtractor(['简体中文名'])
+    CN_NAME.first(infobox)            # {'简体中文名': '张三'}，取到所需字段即停止扫描
+    list(ALIASES.fields(infobox))     # [(key, value), ...]，按文中顺序给出所需字段的每一次出现
+
+构造时给定所需字段名，编译成一个只匹配这些字段行的正则；匹配到的字段按 bgm_tv_wiki.parse
+的规则取值，其余字段行不再逐行解析：
+
+- 字段行为 ``|key=value``，key、value 两端空白去掉；value 为空时取 None
+- value 为 ``{`` 时为数组，直到单独的 ``}`` 行，每行 ``[name|value]`` 或 ``[value]``，
+  值为 Item(key=name, value=value) 元组（与 bgm_tv_wiki 的 Item 字段和 repr 一致）
+- 首行 ``{{Infobox ...`` 和末行 ``}}`` 不是字段
+
+结果与 ``bgm_tv_wiki.parse(text)`` 中同名字段一致。parse 遇到格式错误（缺少首行 ``{{Infobox``
+或末行 ``}}``、数组未以 ``}`` 结束、数组中出现字段行或非 ``[...]`` 行、数组外出现非字段行、
+字段行缺少 ``=``）时抛出异常，原先的脚本因此不从这条记录取任何字段；这里在找到第一个所需字段时
+用一个正则检查整体结构（well_formed），格式有误时同样不给出任何字段。
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class Item(NamedTuple):
+    key: str
+    value: str
+
+
+# [^\S\n] 即除换行外的空白（与 str.strip 同为 Unicode 空白）。
+# 多行模式下以 ^ 开头的正则要在每个位置尝试匹配，因此从 `|`、`[` 开始搜索，行首是否只有空白另行检查
+_FIELD_LINE = r'\|[^\S\n]*(?P<key>{keys})[^\S\n]*=(?P<value>[^\n]*)'
+_ITEM_LINE = r'\[[^\S\n]*(?P<key>{keys})[^\S\n]*\|(?P<value>[^\n]*)\][^\S\n]*$'
+
+# 与 bgm_tv_wiki.parse_ast 的检查一一对应：只含空格、制表符、换行的文本是空 infobox；否则开头
+# （跳过这些空白后）为 {{Infobox，去掉结尾空白后以 }} 结束，中间每行为空行、字段行（`|` 开头且含 `=`），
+# 或完整的数组（值为 `{` 的字段行，随后是空行或 `[...]` 行，以单独的 `}` 行结束）
+_WS = r'[^\S\n]'
+_WELL_FORMED = re.compile(
+    r'(?:[ \t\n]|\r\n)*(?:\{\{Infobox(?:[^\n]*\}\}|[^\n]*\n(?:'
+    + rf'{_WS}*\n'
+    + rf'|{_WS}*\|[^\n=]*=(?!{_WS}*\{{{_WS}*\n)[^\n]*\n'
+    + rf'|{_WS}*\|[^\n=]*={_WS}*\{{{_WS}*\n(?:{_WS}*\n|{_WS}*\[[^\n]*\]{_WS}*\n)*{_WS}*\}}{_WS}*\n'
+    + r')*[^\n]*\}\})\s*)?'
+)
+
+
+def well_formed(text):
+    """text 能否被 bgm_tv_wiki.parse 正常解析（空白文本视为没有字段的合法 infobox）。"""
+    return _WELL_FORMED.fullmatch(text) is not None
+
+
+def _alternation(keys):
+    return '|'.join(re.escape(k) for k in sorted(keys, key=len, reverse=True))
+
+
+class InfoboxExtractor:
+    """只提取 keys 中字段的 infobox 解析器；item_keys 用于在任意数组中查找指定名称的项。"""
+
+    def __init__(self, keys, item_keys=(), ignore_case=False):
+        self.keys = tuple(keys)
+        flags = re.M | (re.I if ignore_case else 0)
+        self._canonical = {k.lower() if ignore_case else k: k for k in self.keys}
+        self._fold = str.lower if ignore_case else None
+        self._field = re.compile(_FIELD_LINE.format(keys=_alternation(self.keys)), flags) if self.keys else None
+        self._item = re.compile(_ITEM_LINE.format(keys=_alternation(item_keys)), flags) if item_keys else None
+
+    def fields(self, text):
+        """按文中顺序逐个给出所需字段的 (key, value)，同名字段出现多次时每次都给出。"""
+        if not text or self._field is None:
+            return
+        end = None
+        for m in self._field.finditer(text):
+            if not _at_line_start(text, m.start()):
+                continue
+            if end is None:
+                if not well_formed(text):
+                    return
+                end = len(text.rstrip())
+            if m.end() >= end and text.endswith('}}', 0, end):
+                return  # 末行 `...}}`，parse 不把它当作字段
+            value = m.group('value').strip()
+            if value == '{':
+                yield m.group('key'), _read_array(text, m.end() + 1, end)
+            else:
+                yield m.group('key'), value or None
+
+    def first(self, text):
+        """返回 {字段名: 首次出现的值}，所需字段都已找到时即停止扫描；缺失的字段不在结果中。"""
+        found = {}
+        fold, canonical = self._fold, self._canonical
+        for key, value in self.fields(text):
+            key = canonical[fold(key) if fold else key]
+            if key not in found:
+                found[key] = value
+                if len(found) == len(self.keys):
+                    break
+        return found
+
+    def get(self, text, key=None):
+        """返回单个字段首次出现的值（Wiki.get 语义），缺失时为 None。"""
+        return self.first(text).get(self.keys[0] if key is None else key)
+
+    def items(self, text):
+        """按文中顺序给出所有数组中名称属于 item_keys 的项。"""
+        if not text or self._item is None:
+            return
+        checked = False
+        for m in self._item.finditer(text):
+            if _at_line_start(text, m.start()):
+                if not checked:
+                    if not well_formed(text):
+                        return
+                    checked = True
+                yield Item(m.group('key'), m.group('value').strip())
+
+
+def _at_line_start(text, pos):
+    start = text.rfind('\n', 0, pos) + 1
+    return start == pos or text[start:pos].isspace()
+
+
+def _read_array(text, pos, end):
+    """从 pos 所在行读取数组项直到 `}` 行，末行（`}}`）不计入。"""
+    items = []
+    while True:
+        nl = text.find('\n', pos)
+        if nl < 0 or nl >= end:
+            break
+        line = text[pos:nl].strip()
+        pos = nl + 1
+        if not line:
+            continue
+        if line == '}' or line[0] == '|':
+            break
+        if line[0] == '[' and line[-1] == ']':
+            name, sep, value = line[1:-1].partition('|')
+            items.append(Item(name.strip(), value.strip()) if sep else Item('', name.strip()))
+    return tuple(items)
+
+
+@lru_cache(maxsize=None)
+def extractor(*keys):
+    """按字段名缓存的 InfoboxExtractor，供只取一两个字段的简单场景使用。"""
+    return InfoboxExtractor(keys)
+
+
+def get_field(text, key):
+    """infobox 中 key 字段首次出现的值，缺失时为 None。"""
+    return extractor(key).get(text)
@@ -0,0 +1,102 @@
+"""字符 n-gram 的 MinHash 签名与分段局部敏感哈希（LSH），用于在大量短文本中找近似重复的候选。
+
+签名：每个 n-gram 用 BLAKE2b 一次得到 NUM_PERM 个 16 位哈希（相当于 NUM_PERM 个独立哈希函数），
+集合的签名为各位置上的最小值；两个集合签名中相同位置相等的比例即 Jaccard 相似度的估计。
+n-gram 的哈希向量有缓存，逐位置取最小值由 zip / map(min, ...) 在 C 层完成。
+
+LSH：签名切成 bands 段，每段 rows 个值；任一段完全相同的两个集合成为候选，
+Jaccard 为 s 时成为候选的概率为 1 - (1 - s^rows)^bands（默认 8×4，约 0.6 处陡升）。
+各段分别建桶、逐段处理，内存只需签名数组和一段的桶；超过 max_bucket 的桶区分度太低，直接跳过，
+每个桶内两两比较的次数有上界，总体与元素数成线性。
+"""
+
+import struct
+from array import array
+from functools import lru_cache
+from hashlib import blake2b
+from operator import eq
+
+NUM_PERM = 32
+DEFAULT_BANDS = 8
+DEFAULT_MAX_BUCKET = 50
+_HASHES = struct.Struct(f'<{NUM_PERM}H')
+
+
+def ngrams(text, n=2):
+    """带首尾标记的字符 n-gram 集合；短于 n 的文本也至少有一个 n-gram。"""
+    text = f'\x02{text}\x03'
+    return {text[i:i + n] for i in range(max(1, len(text) - n + 1))}
+
+
+@lru_cache(maxsize=1 << 18)
+def _hash_vector(gram):
+    return _HASHES.unpack(blake2b(gram.encode('utf-8'), digest_size=2 * NUM_PERM).digest())
+
+
+def signature(grams):
+    """n-gram 集合的 MinHash 签名（array('H')，长度 NUM_PERM）；空集合返回 None。"""
+    if not grams:
+        return None
+    return array('H', map(min, zip(*map(_hash_vector, grams))))
+
+
+class MinHashLSH:
+    """收集签名后按段建桶，给出相似度不低于阈值的候选对。"""
+
+    def __init__(self, bands=DEFAULT_BANDS, max_bucket=DEFAULT_MAX_BUCKET):
+        if NUM_PERM % bands:
+            raise ValueError(f'bands 须整除 {NUM_PERM}: {bands}')
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.max_bucket = max_bucket
+        self.signatures = array('H')
+        self.skipped_buckets = 0
+
+    def __len__(self):
+        return len(self.signatures) // NUM_PERM
+
+    def add(self, sig):
+        """追加一个签名，返回其序号。"""
+        self.signatures.extend(sig)
+        return len(self) - 1
+
+    def similarity(self, i, j):
+        """签名估计的 Jaccard 相似度。"""
+        sigs = self.signatures
+        a, b = i * NUM_PERM, j * NUM_PERM
+        return sum(map(eq, sigs[a:a + NUM_PERM], sigs[b:b + NUM_PERM])) / NUM_PERM
+
+    def pairs(self, threshold):
+        """逐段建桶，给出 (i, j, 相似度)，i < j 且相似度 >= threshold；同一对只给出一次。"""
+        seen = set()
+        data = self.signatures.tobytes()
+        width = 2 * self.rows
+        for band in range(self.bands):
+            buckets = {}
+            offset = band * width
+            for i in range(len(self)):
+                start = i * 2 * NUM_PERM + offset
+                key = data[start:start + width]
+                members = buckets.get(key)
+                if members is None:
+                    buckets[key] = i  # 绝大多数桶只有一个元素，不为其建列表
+                elif type(members) is int:
+                    buckets[key] = [members, i]
+                else:
+                    members.append(i)
+            for members in buckets.values():
+                if type(members) is int:
+                    continue
+                if len(members) > self.max_bucket:
+                    self.skipped_buckets += 1
+                    continue
+                for x, i in enumerate(members):
+                    for j in members[x + 1:]:
+                        key = i << 32 | j
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        sim = self.similarity(i, j)
+                        if sim >= threshold:
+                            yield i, j, sim
+            del buckets
@@ -0,0 +1,114 @@
+"""人名、别名、条目标题的归一化，各脚本共用。
+
+转换表和正则在导入时构建一次。单个字符串的函数带有有界 LRU 缓存（人名、别名、系列标题大量重复）；
+批量函数把整个列表用 ``\\x00`` 连接后一次完成各步转换再拆开，省去逐个调用的开销，结果与逐个调用相同。
+
+- normalize_name：变体字统一（髙 → 高 等），用于识别同名人物
+- normalize_alias：去空白和连字符，窄假名 / 全角片假名 → 平假名，全角字母 → 半角，再转小写，用于别名比较
+- normalize_text：转小写、去空白、NFKC、去标点，用于条目标题比较
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+CACHE_SIZE = 1 << 16
+_SEP = '\x00'
+
+# 日文中两种写法均可出现的等价字符 → 统一到常用写法（用于识别变体字造成的重复人物）
+NORMALIZE_MAP = str.maketrans({
+    '\u9ad9': '\u9ad8',  # 髙 → 高
+    '\u51a8': '\u5bcc',  # 冨 → 富
+    '\ufa11': '\u5d0e',  # 﨑 → 崎
+    '\u5d5c': '\u5d0e',  # 嵜 → 崎
+    '\u90de': '\u90ce',  # 郞 → 郎
+    '\u6801': '\u67f3',  # 栁 → 柳
+    '\u4ff1': '\u5036',  # 俱 → 倶
+    '\u59ec': '\u59eb',  # 姬 → 姫
+    '\u5154': '\u514e',  # 兔 → 兎
+    '\u820d': '\u820e',  # 舍 → 舎
+    '\u885e': '\u885b',  # 衞 → 衛
+    '\u615c': '\u614e',  # 愼 → 慎
+    '\u9089': '\u8fba',  # 邉 → 辺
+    '\u908a': '\u8fba',  # 邊 → 辺
+    '\u6ff5': '\u6d5c',  # 濵 → 浜
+    '\u6ff1': '\u6d5c',  # 濱 → 浜
+    '\u5d8b': '\u5cf6',  # 嶋 → 島
+    '\u6fa4': '\u6ca2',  # 澤 → 沢
+    '\u5ee3': '\u5e83',  # 廣 → 広
+    '\u703e': '\u702c',  # 瀨 → 瀬
+    '\u9f4a': '\u6589',  # 齊 → 斉
+    '\u9f52': '\u6592',  # 齋 → 斎
+    '\u6afb': '\u685c',  # 櫻 → 桜
+    '\u95dc': '\u95a2',  # 關 → 関
+    '\u9ed1': '\u9ed2',  # 黑 → 黒
+    '\u5fb7': '\u5fb3',  # 德 → 徳
+    '\u9f8d': '\u7adc',  # 龍 → 竜
+    '\u8207': '\u4e0e',  # 與 → 与
+    '\u9435': '\u9244',  # 鐵 → 鉄
+    '\u5dbd': '\u5cb3',  # 嶽 → 岳
+    '\u7add': '\u4e26',  # 竝 → 並
+})
+
+# 合并：窄假名→平假名、全角字母→半角、全角片假名→平假名
+ALIAS_TRANS = str.maketrans({
+    # 1. 窄假名（ｶﾈｼ等，Unicode：0xFF66-0xFF9D）→ 平假名
+    **{chr(c): chr(c - 0xFBE0) for c in range(0xFF66, 0xFF9E)},
+    # 2. 全角字母（０xFF21-0xFF5A）→ 半角
+    **{chr(c): chr(c - 0xFEE0) for c in range(0xFF21, 0xFF5B)},
+    # 3. 全角片假名（0x30A1-0x30F6）→ 平假名
+    **{chr(c): chr(c - 0x60) for c in range(0x30A1, 0x30F7)}
+})
+
+_ALIAS_STRIP = re.compile(r'[\s-]')
+_SPACES = re.compile(r'\s+')
+_PUNCT = re.compile(r'[^\w\s]')
+_PUNCT_BATCH = re.compile(r'[^\w\s\x00]')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_name(s):
+    return s.translate(NORMALIZE_MAP)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_alias(s):
+    return _ALIAS_STRIP.sub('', s).translate(ALIAS_TRANS).lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_text(text):
+    if not text:
+        return ""
+    text = text.lower()
+    text = _SPACES.sub('', text)
+    text = unicodedata.normalize('NFKC', text)
+    text = _PUNCT.sub('', text)
+    return text
+
+
+def normalize_names(texts):
+    return _batch(texts, normalize_name, lambda s: s.translate(NORMALIZE_MAP))
+
+
+def normalize_aliases(texts):
+    return _batch(texts, normalize_alias, lambda s: _ALIAS_STRIP.sub('', s).translate(ALIAS_TRANS).lower())
+
+
+def normalize_texts(texts):
+    """批量 normalize_text；None 与空串都得到空串。"""
+    texts = [t or '' for t in texts]
+    return _batch(texts, normalize_text, lambda s: _PUNCT_BATCH.sub(
+        '', unicodedata.normalize('NFKC', _SPACES.sub('', s.lower()))))
+
+
+def _batch(texts, single, joined):
+    """用 joined 一次转换以 \\x00 连接的整个列表；各步都不会产生或吞掉 \\x00，拆开后与逐个调用一致。"""
+    if not isinstance(texts, list):
+        texts = list(texts)
+    if len(texts) < 2:
+        return [single(t) for t in texts]
+    s = _SEP.join(texts)
+    if s.count(_SEP) != len(texts) - 1:  # 文本自身含 \x00
+        return [single(t) for t in texts]
+    return joined(s).split(_SEP)
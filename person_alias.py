@@ -1,15 +1,26 @@
 # /// script
 # requires-python = ">=3.9"
-# dependencies = [
-#   "bgm-tv-wiki",
-# ]
 # ///
+import argparse
 import json
+import os
 import re
-from bgm_tv_wiki import parse
+import sys
+from array import array
+
+from alias_delta import load_mapping, stabilize, write_delta
+from alias_index import query_main, write_alias_index
+from alias_shards import DEFAULT_SHARDS, write_alias_shards
+from archive_scan import DEFAULT_WORKERS, scan
+from infobox import InfoboxExtractor
+from name_normalize import normalize_alias
+from profiling import Profiler, add_profile_args
+from stream_compress import DEFAULT_THREADS, StreamOutputs
 
 # 匹配括号及内容的正则表达式（支持中英文括号）
 BRACKET_PATTERN = re.compile(r'([\(（])(.*?)([\)）])')
+ALIAS_SEPARATOR = re.compile(r'\s*[／/]\s*')
+KATAKANA = re.compile(r'[ァ-ヺ]')
 
 def process_brackets(text, is_primary_name):
     """
@@ -37,12 +48,12 @@ def process_brackets(text, is_primary_name):
     return text, brackets
 
 def split_aliases(alias, is_exception_name):
-    parts = [p.strip() for p in re.split(r'\s*[／/]\s*', alias) if p.strip()]
+    parts = [p.strip() for p in ALIAS_SEPARATOR.split(alias) if p.strip()]
     if not parts:
         return []
     if is_exception_name:
         return parts
-    final_parts, kp = [], re.compile(r'[ァ-ヺ]')
+    final_parts = []
     for part in parts:
         if "＝" not in part:
             final_parts.append(part)
@@ -58,7 +69,7 @@ def split_aliases(alias, is_exception_name):
                 if next_part:
                     cl = current[-1] if current else ""
                     nf = next_part[0] if next_part else ""
-                    if kp.match(cl) and kp.match(nf):
+                    if KATAKANA.match(cl) and KATAKANA.match(nf):
                         temp.append(f"{current}＝{next_part}")
                         i +=2
                         continue
@@ -67,102 +78,266 @@ def split_aliases(alias, is_exception_name):
         final_parts.extend(temp)
     return final_parts
 
-def parse_bangumi_person_jsonlines(file_path):
-    persons = []  # 人物对象数组
-    person_id_to_index = {}  # 人物ID到数组索引的映射
-    aliases = {}  # 别名到人物索引的映射
-
-    EXC_NAME = "2C＝がろあ"
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for ln, line in enumerate(f, 1):
-            try:
-                jd = json.loads(line.strip())
-                en = jd.get('name')
-                person_id = jd.get('id')
-
-                if not en or person_id is None:
-                    continue
-
-                # 处理人物信息
-                if person_id not in person_id_to_index:
-                    person_index = len(persons)
-                    persons.append([en, person_id])  # 使用数组而不是对象
-                    person_id_to_index[person_id] = person_index
-                else:
-                    person_index = person_id_to_index[person_id]
-
-                is_exc = (en == EXC_NAME)
-                ib = jd.get('infobox')
-                if not ib:
-                    continue
-
-                pr = parse(ib)
-                if not pr.fields:
-                    continue
-
-                qn = []
-                for f in pr.fields:
-                    # 处理简体中文名
-                    if f.key == '简体中文名' and f.value:
-                        cn = str(f.value).strip()
-                        if cn:
-                            # 处理括号，不将括号内容作为新别名
-                            processed_cn, _ = process_brackets(cn, is_primary_name=True)
-                            if processed_cn and processed_cn not in qn:
-                                qn.append(processed_cn)
-
-                    # 处理别名
-                    elif f.key == '别名' and f.value:
-                        ais = f.value if isinstance(f.value, tuple) else (f.value,)
-                        for item in ais:
-                            av = str(item.value).strip() if item.value else ""
-                            if av:
-                                split_als = split_aliases(av, is_exc)
-                                for a in split_als:
-                                    if a:
-                                        # 处理括号，将括号内容作为新别名
-                                        processed_a, bracket_contents = process_brackets(a, is_primary_name=False)
-                                        # 添加处理后的主别名
-                                        if processed_a and processed_a not in qn:
-                                            qn.append(processed_a)
-                                        # 添加括号内的内容作为新别名
-                                        for bc in bracket_contents:
-                                            if bc and bc not in qn:
-                                                qn.append(bc)
-
-                # 过滤空值和与原名相同的别名
-                # 合并：窄假名→平假名、全角字母→半角、全角片假名→平假名
-                trans = str.maketrans({
-                    # 1. 窄假名（ｶﾈｼ等，Unicode：0xFF66-0xFF9D）→ 平假名
-                    **{chr(c): chr(c - 0xFBE0) for c in range(0xFF66, 0xFF9E)},
-                    # 2. 全角字母（０xFF21-0xFF5A）→ 半角
-                    **{chr(c): chr(c - 0xFEE0) for c in range(0xFF21, 0xFF5B)},
-                    # 3. 全角片假名（0x30A1-0x30F6）→ 平假名
-                    **{chr(c): chr(c - 0x60) for c in range(0x30A1, 0x30F7)}
-                })
-
-                # 最终归一化列表推导
-                normalized_en = re.sub(r'[\s-]', '', en).translate(trans).lower()
-                qn = [re.sub(r'[\s-]', '', n).translate(trans).lower() for n in qn
-                      if n and n != en
-                      and re.sub(r'[\s-]', '', n).translate(trans).lower() != normalized_en]
-
-                # 将别名映射到人物索引（支持一对多）
-                for alias in qn:
-                    if alias not in aliases:
-                        aliases[alias] = []
-                    if person_index not in aliases[alias]:
-                        aliases[alias].append(person_index)
-
-            except Exception as e:
-                print(f"Line {ln} error: {e}")
-                continue
+EXC_NAME = "2C＝がろあ"
+ALIAS_FIELDS = InfoboxExtractor(['简体中文名', '别名'])
+
+
+class AliasBuilder:
+    """构建 [persons, aliases] 别名映射，供 ArchiveScanner 调用。"""
+
+    def __init__(self):
+        self.persons = []  # 人物对象数组
+        self.person_id_to_index = {}  # 人物ID到数组索引的映射
+        self.aliases = {}  # 别名到人物索引的映射
+
+    def feed(self, ln, jd):
+        try:
+            self._feed(jd)
+        except Exception as e:
+            print(f"Line {ln} error: {e}")
+
+    def _feed(self, jd):
+        en = jd.get('name')
+        person_id = jd.get('id')
+
+        if not en or person_id is None:
+            return
+
+        # 处理人物信息
+        person_index = self.person_id_to_index.get(person_id)
+        is_new = person_index is None
+        if is_new:
+            person_index = self._add_person(en, person_id)
+
+        ib = jd.get('infobox')
+        if not ib:
+            return
+        qn = extract_aliases(en, ib)
+
+        # 将别名映射到人物索引（支持一对多）
+        self._add_aliases(qn, person_index, is_new)
+
+    def _add_person(self, en, person_id):
+        person_index = len(self.persons)
+        self.persons.append([en, person_id])  # 使用数组而不是对象
+        self.person_id_to_index[person_id] = person_index
+        return person_index
+
+    def _add_aliases(self, qn, person_index, is_new):
+        aliases = self.aliases
+        for alias in qn:
+            if alias not in aliases:
+                aliases[alias] = []
+            if person_index not in aliases[alias]:
+                aliases[alias].append(person_index)
+
+    def merge(self, other):
+        """并入后续字节段的部分结果，人物索引按串行扫描的顺序重新编号。"""
+        remap = []
+        for entry in other.persons:
+            person_id = entry[1]
+            if person_id in self.person_id_to_index:
+                remap.append(self.person_id_to_index[person_id])
+            else:
+                remap.append(len(self.persons))
+                self.person_id_to_index[person_id] = len(self.persons)
+                self.persons.append(entry)
+        for alias, indices in other.aliases.items():
+            merged = self.aliases.setdefault(alias, [])
+            for i in indices:
+                if remap[i] not in merged:
+                    merged.append(remap[i])
+
+    def result(self):
+        return [self.persons, self.aliases]
+
+
+class CompactAliasBuilder(AliasBuilder):
+    """与 AliasBuilder 结果相同，扫描期间占用更少内存，人物多、别名热门时也不再逐个线性查重。
+
+    - 人物名和人物 ID 分存为列表和 array('i')，不为每个人物建两元素列表
+    - 只对应一个人物的别名（绝大多数）直接存 int，第二个人物出现时才换成 array('i')；
+      别名键只在字典中保存一份，后续查询用的临时字符串随即释放
+    - 同一人物的别名先用字典按首次出现顺序去重；人物首次出现时其下标不可能已在任何别名下，
+      直接追加，只有重复出现的人物 ID 才检查是否已存在，输出顺序与 AliasBuilder 一致
+
+    紧凑结构在多进程扫描回传（pickle）时也更小。result() 就地转换为 [persons, aliases]，之后不能再 feed。
+    """
+
+    def __init__(self):
+        self.names = []
+        self.ids = array('i')
+        self.person_id_to_index = {}
+        self.aliases = {}
+
+    def _add_person(self, en, person_id):
+        person_index = len(self.names)
+        self.ids.append(person_id)  # 先追加 ID：非整数 ID 在此抛出，不留下半条人物记录
+        self.names.append(en)
+        self.person_id_to_index[person_id] = person_index
+        return person_index
+
+    def _add_aliases(self, qn, person_index, is_new):
+        for alias in dict.fromkeys(qn):
+            self._add_posting(alias, person_index, not is_new)
+
+    def _add_posting(self, alias, person_index, check):
+        aliases = self.aliases
+        cur = aliases.get(alias)
+        if cur is None:
+            aliases[alias] = person_index
+        elif type(cur) is int:
+            if not (check and cur == person_index):
+                aliases[alias] = array('i', (cur, person_index))
+        elif not (check and person_index in cur):
+            cur.append(person_index)
+
+    def merge(self, other):
+        """并入后续字节段的部分结果，人物索引按串行扫描的顺序重新编号。"""
+        remap = array('i')
+        existing = set()  # 两段中都出现的人物，只有它们需要查重
+        for name, person_id in zip(other.names, other.ids):
+            person_index = self.person_id_to_index.get(person_id)
+            if person_index is None:
+                person_index = self._add_person(name, person_id)
+            else:
+                existing.add(person_index)
+            remap.append(person_index)
+        for alias, indices in other.aliases.items():
+            for i in ((indices,) if type(indices) is int else indices):
+                i = remap[i]
+                self._add_posting(alias, i, i in existing)
+
+    def result(self):
+        aliases = self.aliases
+        for alias, indices in aliases.items():
+            aliases[alias] = [indices] if type(indices) is int else indices.tolist()
+        return [[[name, person_id] for name, person_id in zip(self.names, self.ids)], aliases]
+
+
+def extract_aliases(en, ib):
+    """从 infobox 的简体中文名、别名字段提取归一化后的别名列表（可能含重复），不含与原名相同的。"""
+    is_exc = (en == EXC_NAME)
+    qn = []
+    for key, value in ALIAS_FIELDS.fields(ib):
+        # 处理简体中文名
+        if key == '简体中文名' and value:
+            cn = str(value).strip()
+            if cn:
+                # 处理括号，不将括号内容作为新别名
+                processed_cn, _ = process_brackets(cn, is_primary_name=True)
+                if processed_cn and processed_cn not in qn:
+                    qn.append(processed_cn)
+
+        # 处理别名
+        elif key == '别名' and value:
+            ais = value if isinstance(value, tuple) else (value,)
+            for item in ais:
+                av = str(item.value).strip() if item.value else ""
+                if av:
+                    split_als = split_aliases(av, is_exc)
+                    for a in split_als:
+                        if a:
+                            # 处理括号，将括号内容作为新别名
+                            processed_a, bracket_contents = process_brackets(a, is_primary_name=False)
+                            # 添加处理后的主别名
+                            if processed_a and processed_a not in qn:
+                                qn.append(processed_a)
+                            # 添加括号内的内容作为新别名
+                            for bc in bracket_contents:
+                                if bc and bc not in qn:
+                                    qn.append(bc)
+
+    # 过滤空值和与原名相同的别名，比较前归一化（见 name_normalize.normalize_alias）
+    normalized_en = normalize_alias(en)
+    return [na for n in qn
+            if n and n != en
+            and (na := normalize_alias(n)) != normalized_en]
+
+
+def parse_bangumi_person_jsonlines(file_path, workers=DEFAULT_WORKERS, compact=False):
+    builder, = scan(file_path, CompactAliasBuilder() if compact else AliasBuilder(), workers=workers)
+    return builder.result()
+
+
+def iter_alias_json(mapping, chunk=4096):
+    """逐段生成 [persons, aliases] 的紧凑 JSON，与
+    ``json.dumps(mapping, ensure_ascii=False, separators=(',', ':'), sort_keys=True)`` 逐字节相同。
+
+    别名按键的码点序排列；旧版直接 json.dump，别名按扫描时首次出现的顺序排列，内容相同而顺序不同。
+    """
+    persons, aliases = mapping
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    yield '[['
+    for i in range(0, len(persons), chunk):
+        yield (',' if i else '') + ','.join(encode(p) for p in persons[i:i + chunk])
+    yield '],{'
+    keys = sorted(aliases)
+    for i in range(0, len(keys), chunk):
+        yield (',' if i else '') + ','.join(
+            f'{encode(k)}:{encode(aliases[k])}' for k in keys[i:i + chunk])
+    yield '}]'
+
+
+def write_alias_json(mapping, path, compressed=(), threads=DEFAULT_THREADS):
+    """流式写出别名 JSON，同时写出 compressed 中的压缩版本（格式按扩展名，见 stream_compress.py）。"""
+    with StreamOutputs([path, *compressed], threads=threads) as out:
+        for part in iter_alias_json(mapping):
+            out.write(part)
+
+def main():
+    if sys.argv[1:2] == ['query']:
+        return query_main(sys.argv[2:])
+    parser = argparse.ArgumentParser(
+        description='生成人物别名 JSON（[persons, aliases]）；'
+                    '`person_alias.py query 别名 ...` 在生成的二进制索引中查询（见 query -h）')
+    parser.add_argument('person_file', nargs='?', default='bangumi_archive/person.jsonlines',
+                        help='person.jsonlines 路径（默认 bangumi_archive/person.jsonlines）')
+    parser.add_argument('--output', default='person_alias.json', help='输出 JSON（默认 person_alias.json）')
+    parser.add_argument('--compressed', action='append', default=[], metavar='PATH',
+                        help='同时写出压缩版本，格式按扩展名（.gz / .zst / .br），可多次指定')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f'压缩线程数（默认 {DEFAULT_THREADS}）')
+    parser.add_argument('--bin', nargs='?', const='', default=None, metavar='PATH',
+                        help='同时写出可 mmap 二分查找的二进制索引，供 query 子命令使用'
+                             '（省略 PATH 时为与 --output 同名的 .bin，格式见 alias_index.py）')
+    parser.add_argument('--shards-dir', default=None, metavar='DIR',
+                        help='另把别名按哈希分片写到 DIR，附清单和布隆过滤器，供按需加载（格式见 alias_shards.py）')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS,
+                        help=f'--shards-dir 的分片数（默认 {DEFAULT_SHARDS}）')
+    parser.add_argument('--previous', default=None, metavar='PATH',
+                        help='上一期 person_alias.json（或 .json.gz），给定时沿用其人物下标，新人物追加在末尾')
+    parser.add_argument('--delta-dir', default=None, metavar='DIR',
+                        help='与 --previous 同用：以 DIR/data_version.txt 的版本为起点写出增量补丁并更新版本链（见 alias_delta.py）')
+    parser.add_argument('--data-version', default=None, help='本期数据版本（默认当天日期）')
+    parser.add_argument('--compact', action='store_true',
+                        help='扫描时使用紧凑结构（CompactAliasBuilder），内存占用更低，输出相同')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'解析 jsonlines 的进程数（默认 {DEFAULT_WORKERS}）')
+    add_profile_args(parser)
+    args = parser.parse_args()
+    if args.delta_dir and not args.previous:
+        parser.error('--delta-dir 需要同时指定 --previous')
+
+    prof = Profiler.from_args(args, os.path.splitext(args.output)[0] + '.profile.json')
+    with prof.stage('parse') as st:
+        mapping = parse_bangumi_person_jsonlines(args.person_file, args.workers, args.compact)
+        st.records = len(mapping[0])
+    if args.previous:
+        with prof.stage('stabilize'):
+            previous = load_mapping(args.previous)
+            mapping = stabilize(mapping, previous)
+    with prof.stage('write', len(mapping[1])):
+        write_alias_json(mapping, args.output, args.compressed, args.threads)
+        if args.bin is not None:
+            write_alias_index(mapping, args.bin or os.path.splitext(args.output)[0] + '.bin')
+        if args.shards_dir:
+            write_alias_shards(mapping, args.shards_dir, args.shards)
+        if args.delta_dir:
+            version = write_delta(mapping, previous, args.delta_dir, args.data_version)
+            print(f"Data version {version}, chain in {args.delta_dir}")
+    print(f"Generated {len(mapping[1])} alias to {len(mapping[0])} persons. Saved to {args.output}")
 
-    return [persons, aliases]
 
 if __name__ == "__main__":
-    mapping = parse_bangumi_person_jsonlines("bangumi_archive/person.jsonlines")
-    with open("person_alias.json", "w", encoding="utf-8") as f:
-        json.dump(mapping, f, ensure_ascii=False, separators=(',', ':'))  # 紧凑格式输出
-    print(f"Generated {len(mapping[1])} alias to {len(mapping[0])} persons. Saved to person_alias.json")
+    main()
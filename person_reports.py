@@ -0,0 +1,133 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#   "opencc-cn-name",
+#   "zstandard",
+# ]
+# ///
+"""单遍扫描 person.jsonlines，同时生成同名人物 CSV、缺失简体中文名 CSV 和人物别名 JSON。
+
+等价于依次运行 find_dup_person_name.py、find_missing_cn_name.py、person_alias.py，
+但 person.jsonlines 只读取、解码一次；character.jsonlines 在另一线程中同时扫描。
+
+用法:
+    uv run person_reports.py
+    uv run person_reports.py bangumi_archive results --whitelist person_cn_name_whitelist.txt
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from alias_delta import load_mapping, stabilize, write_delta
+from alias_index import write_alias_index
+from alias_shards import DEFAULT_SHARDS, write_alias_shards
+from archive_scan import DEFAULT_WORKERS, ArchiveScanner, source_exists
+from cn_name_cache import DEFAULT_CACHE_DIR as CN_CACHE_DIR, CnNameCache, conversion_pool
+from find_dup_person_name import DupNameGrouper
+from find_missing_cn_name import MissingCnNameScanner, load_whitelist, process_entity
+from person_alias import AliasBuilder, CompactAliasBuilder, write_alias_json
+from profiling import Profiler, add_profile_args
+from stream_compress import DEFAULT_THREADS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单遍扫描 person.jsonlines，生成同名人物、缺失简体中文名、人物别名三份产物')
+    parser.add_argument('archive_dir', nargs='?', default='bangumi_archive', help='数据目录或 Archive zip（默认 bangumi_archive）')
+    parser.add_argument('output_dir', nargs='?', default='results', help='缺失简体中文名 CSV 输出目录（默认 results）')
+    parser.add_argument('--whitelist', action='append', default=[], metavar='FILE',
+                        help='缺失简体中文名白名单文件，可多次指定')
+    parser.add_argument('--cn-cache-dir', default=CN_CACHE_DIR,
+                        help=f'简体中文名转换结果缓存目录（默认 {CN_CACHE_DIR}）')
+    parser.add_argument('--no-cn-cache', action='store_true', help='不读写简体中文名转换缓存')
+    parser.add_argument('--dup-out', default='dup_persons.csv', help='同名人物 CSV（默认 dup_persons.csv）')
+    parser.add_argument('--dup-order-state', default=None, metavar='FILE',
+                        help='同名组序号按名称排序并保存为稀疏序号（见 find_dup_person_name.py --order-state）；'
+                             '缺省时序号取组内最小人物 ID')
+    parser.add_argument('--alias-out', default='person_alias.json', help='人物别名 JSON（默认 person_alias.json）')
+    parser.add_argument('--alias-compressed', action='append', default=[], metavar='PATH',
+                        help='同时写出人物别名 JSON 的压缩版本，格式按扩展名（.gz / .zst / .br），可多次指定')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f'压缩线程数（默认 {DEFAULT_THREADS}）')
+    parser.add_argument('--alias-bin', default=None, metavar='PATH',
+                        help='另写出人物别名二进制索引（如 person_alias.bin，格式见 alias_index.py）')
+    parser.add_argument('--alias-shards', default=None, metavar='DIR',
+                        help='另把人物别名按哈希分片写到 DIR，附清单和布隆过滤器（格式见 alias_shards.py）')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS,
+                        help=f'--alias-shards 的分片数（默认 {DEFAULT_SHARDS}）')
+    parser.add_argument('--alias-previous', default=None, metavar='PATH',
+                        help='上一期 person_alias.json（或 .json.gz），给定时沿用其人物下标')
+    parser.add_argument('--alias-delta-dir', default=None, metavar='DIR',
+                        help='与 --alias-previous 同用：写出增量补丁并更新 DIR/data_version.txt 版本链（见 alias_delta.py）')
+    parser.add_argument('--data-version', default=None, help='本期数据版本（默认当天日期）')
+    parser.add_argument('--compact', action='store_true',
+                        help='人物别名使用紧凑结构（CompactAliasBuilder），内存占用更低，输出相同')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'解析 jsonlines 和转换简体中文名的进程数（默认 {DEFAULT_WORKERS}）')
+    add_profile_args(parser)
+    args = parser.parse_args()
+    if args.alias_delta_dir and not args.alias_previous:
+        parser.error('--alias-delta-dir 需要同时指定 --alias-previous')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    prof = Profiler.from_args(args, os.path.join(args.output_dir, 'person_reports.profile.json'))
+    exclude_ids = load_whitelist(args.whitelist)
+    print(f'已加载白名单 {len(exclude_ids)} 个 ID', file=sys.stderr)
+    cn_cache = CnNameCache(None if args.no_cn_cache else args.cn_cache_dir)
+
+    workers = max(1, args.workers)
+    character_file = os.path.join(args.archive_dir, 'character.jsonlines')
+    character_output = os.path.join(args.output_dir, 'missing-cn-name-character.csv')
+    with conversion_pool(workers) as pool, ThreadPoolExecutor(1) as threads:
+        character = None
+        if source_exists(character_file):
+            # 角色文件在另一线程中与人物文件同时扫描、转换；扫描和转换的进程池都以 spawn 启动，不会在线程间 fork
+            character = threads.submit(process_entity, prof, 'character', character_file, character_output,
+                                       None, cn_cache, pool, workers)
+        else:
+            print(f'{character_file} 不存在，跳过', file=sys.stderr)
+        write_person_outputs(args, prof, exclude_ids, cn_cache, pool, workers)
+        if character is not None:
+            print(f'角色: {character.result()} → {character_output}', file=sys.stderr)
+    cn_cache.save()
+
+
+def write_person_outputs(args, prof, exclude_ids, cn_cache, pool, workers):
+    """扫描 person.jsonlines，写出同名人物、缺失简体中文名、人物别名三份产物。"""
+    person_file = os.path.join(args.archive_dir, 'person.jsonlines')
+    scanner = ArchiveScanner(person_file, workers)
+    dup = scanner.register(DupNameGrouper())
+    missing = scanner.register(MissingCnNameScanner(exclude_ids))
+    alias = scanner.register(CompactAliasBuilder() if args.compact else AliasBuilder())
+    with prof.stage('scan_person') as st:
+        st.records = scanner.run()
+
+    with prof.stage('write_dup'):
+        with open(args.dup_out, 'w', newline='', encoding='utf-8') as f:
+            dup.write(f, args.dup_order_state)
+
+    output_path = os.path.join(args.output_dir, 'missing-cn-name-person.csv')
+    with prof.stage('write_missing', len(missing.candidates)):
+        n = missing.write(output_path, 'person', cn_cache, pool, workers)
+    print(f'人物: {n} → {output_path}', file=sys.stderr)
+
+    mapping = alias.result()
+    if args.alias_previous:
+        with prof.stage('stabilize_alias'):
+            previous = load_mapping(args.alias_previous)
+            mapping = stabilize(mapping, previous)
+    with prof.stage('write_alias', len(mapping[1])):
+        write_alias_json(mapping, args.alias_out, args.alias_compressed, args.threads)
+        if args.alias_bin:
+            write_alias_index(mapping, args.alias_bin)
+        if args.alias_shards:
+            write_alias_shards(mapping, args.alias_shards, args.shards)
+        if args.alias_delta_dir:
+            version = write_delta(mapping, previous, args.alias_delta_dir, args.data_version)
+            print(f'数据版本 {version}，版本链见 {args.alias_delta_dir}', file=sys.stderr)
+    print(f"Generated {len(mapping[1])} alias to {len(mapping[0])} persons. Saved to {args.alias_out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""各脚本共用的 ``--profile`` 支持：按阶段记录耗时、CPU 时间、处理速度和峰值内存。
+
+    parser = argparse.ArgumentParser(...)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    prof = Profiler.from_args(args, default_path='results/xxx.profile.json')
+
+    with prof.stage('load') as st:
+        rows = load(...)
+        st.records = len(rows)
+
+未指定 --profile 时 stage() 只是空的上下文管理器。指定后每个阶段记录:
+
+- wall_s：墙钟时间
+- cpu_s：阶段内整个进程的 CPU 时间（包含已结束的子进程，即并行扫描的 worker）。
+  与其他线程中的阶段同时进行时，重叠部分会同时计入各阶段
+- thread_cpu_s：运行该阶段的线程自身的 CPU 时间（time.thread_time），不含其他线程和子进程，
+  同时进行的阶段不会重复计算
+- records / records_per_s：阶段内设置的记录数及处理速度
+- peak_rss_mib / children_peak_rss_mib：阶段结束时本进程与子进程自启动以来的峰值 RSS（ru_maxrss），
+  不是阶段内的峰值；只有比前面各阶段高时才说明是该阶段推高的
+
+程序退出时把摘要打印到 stderr，并写出 JSON（默认放在输出文件旁）。
+--profile-stage 对指定阶段运行 cProfile，结果写到摘要旁的 ``<摘要名>.<阶段>.prof``。
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def add_profile_args(parser):
+    group = parser.add_argument_group('性能分析')
+    group.add_argument('--profile', nargs='?', const='', default=None, metavar='JSON',
+                       help='记录各阶段耗时、CPU 时间、处理速度和峰值内存，写出 JSON 摘要（默认写在输出文件旁）')
+    group.add_argument('--profile-stage', default=None, metavar='STAGE',
+                       help='对指定阶段运行 cProfile，写出 .prof 文件（隐含 --profile）')
+
+
+class Stage:
+    def __init__(self, name, records=None):
+        self.name = name
+        self.records = records
+
+
+class Profiler:
+    def __init__(self, summary_path=None, cprofile_stage=None):
+        self.summary_path = summary_path
+        self.cprofile_stage = cprofile_stage
+        self.stages = []
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = _snapshot()
+        if self.enabled:
+            atexit.register(self.finish)
+
+    @classmethod
+    def from_args(cls, args, default_path):
+        """按 add_profile_args 添加的参数创建；default_path 为未指定路径时的摘要位置。"""
+        if args.profile is None and args.profile_stage is None:
+            return cls()
+        return cls(args.profile or default_path, args.profile_stage)
+
+    @property
+    def enabled(self):
+        return self.summary_path is not None
+
+    @contextmanager
+    def stage(self, name, records=None):
+        st = Stage(name, records)
+        if not self.enabled:
+            yield st
+            return
+        profile = cProfile.Profile() if name == self.cprofile_stage else None
+        before = _snapshot()
+        thread_before = time.thread_time()
+        if profile:
+            profile.enable()
+        try:
+            yield st
+        finally:
+            if profile:
+                profile.disable()
+                prof_path = self._prof_path(name)
+                os.makedirs(os.path.dirname(prof_path) or '.', exist_ok=True)
+                profile.dump_stats(prof_path)
+            entry = _stage_entry(name, st.records, before, _snapshot())
+            entry['thread_cpu_s'] = round(time.thread_time() - thread_before, 4)
+            self.stages.append(entry)
+
+    def finish(self):
+        if not self.enabled or self.summary_path is None:
+            return
+        path, self.summary_path = self.summary_path, None
+        total = _stage_entry('total', None, self._start, _snapshot())
+        summary = {
+            'script': os.path.basename(sys.argv[0]),
+            'argv': sys.argv[1:],
+            'started_at': self.started_at,
+            'python': sys.version.split()[0],
+            'total': total,
+            'stages': self.stages,
+            'notes': {
+                'cpu_s': '整个进程（含已结束子进程）的 CPU 时间，同时进行的阶段会重复计入',
+                'thread_cpu_s': '运行该阶段的线程自身的 CPU 时间',
+                'peak_rss_mib': '进程启动以来的峰值 RSS（ru_maxrss），不是阶段内的峰值',
+            },
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        width = max(len(s['name']) for s in self.stages + [total]) + 2
+        print(f"\n{'阶段':<{width - 2}}{'墙钟(s)':>9}{'进程CPU(s)':>11}{'线程CPU(s)':>11}{'记录数':>9}{'记录/s':>10}"
+              f"{'进程峰值RSS(MiB)':>15}", file=sys.stderr)
+        for s in self.stages + [total]:
+            records = '' if s['records'] is None else s['records']
+            rate = '' if s['records_per_s'] is None else f"{s['records_per_s']:.0f}"
+            rss = '' if s['peak_rss_mib'] is None else f"{s['peak_rss_mib']:.1f}"
+            thread_cpu = '' if s.get('thread_cpu_s') is None else f"{s['thread_cpu_s']:.2f}"
+            print(f"{s['name']:<{width}}{s['wall_s']:>9.2f}{s['cpu_s']:>13.2f}{thread_cpu:>15}{records:>12}{rate:>12}"
+                  f"{rss:>16}", file=sys.stderr)
+        print('进程CPU 为整个进程（含子进程）的 CPU 时间，同时进行的阶段会重复计入；'
+              '峰值RSS 为进程启动以来的峰值', file=sys.stderr)
+        print(f'性能摘要已保存至 {path}', file=sys.stderr)
+        if self.cprofile_stage:
+            if any(s['name'] == self.cprofile_stage for s in self.stages):
+                print(f'cProfile 结果已保存至 {self._prof_path(self.cprofile_stage, path)}', file=sys.stderr)
+            else:
+                print(f'警告: 没有名为 {self.cprofile_stage} 的阶段，未生成 cProfile 结果', file=sys.stderr)
+
+    def _prof_path(self, name, summary_path=None):
+        base = summary_path or self.summary_path
+        if base.endswith('.json'):
+            base = base[:-5]
+        return f'{base}.{name}.prof'
+
+
+def _snapshot():
+    t = os.times()
+    rss = children_rss = None
+    if resource is not None:
+        scale = 1 if sys.platform == 'darwin' else 1024  # Linux 上 ru_maxrss 单位为 KiB
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {
+        'wall': time.perf_counter(),
+        'cpu': t.user + t.system + t.children_user + t.children_system,
+        'rss': rss,
+        'children_rss': children_rss,
+    }
+
+
+def _stage_entry(name, records, before, after):
+    wall = after['wall'] - before['wall']
+    mib = 1024 * 1024
+    return {
+        'name': name,
+        'wall_s': round(wall, 4),
+        'cpu_s': round(after['cpu'] - before['cpu'], 4),
+        'records': records,
+        'records_per_s': round(records / wall, 1) if records is not None and wall > 0 else None,
+        'peak_rss_mib': None if after['rss'] is None else round(after['rss'] / mib, 1),
+        'children_peak_rss_mib': None if after['children_rss'] is None else round(after['children_rss'] / mib, 1),
+    }
@@ -0,0 +1,221 @@
+"""把同一字节流同时写成原文和若干压缩文件，边生成边压缩，不在内存中保留完整输出。
+
+压缩格式按扩展名决定：
+
+- ``.gz``：按块多线程 deflate（同 pigz）。每块用独立的压缩器、以前一块末尾 32 KiB 为预设字典，
+  非末块以 Z_SYNC_FLUSH 结束（字节对齐），各块首尾相接即为一个完整的 deflate 流，
+  再加 gzip 头和 CRC32 / 长度尾，得到单成员的标准 gzip 文件，任何 gzip 解压器都能读取。
+- ``.zst``：zstandard 库（多线程），没有时用 Python 3.14+ 的 compression.zstd（单线程）
+- ``.br``：brotli 库，在单独的线程中按顺序压缩
+
+其他扩展名按原文写出。所有文件先写到 ``<path>.tmp``，全部成功后再替换目标文件。
+
+用法:
+    with StreamOutputs(['person_alias.json', 'person_alias.json.gz']) as out:
+        for chunk in chunks:
+            out.write(chunk)
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+BLOCK_SIZE = 1 << 20
+DEFAULT_THREADS = os.cpu_count() or 1
+_WINDOW = 32 * 1024
+_GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\xff'  # mtime=0，保证输出可复现
+
+
+def _deflate(block, zdict, level, last):
+    if zdict:
+        c = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+    else:
+        c = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, 9)
+    return c.compress(block) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _RawSink:
+    def __init__(self, f, pool, threads, level):
+        self.f = f
+
+    def write(self, block):
+        self.f.write(block)
+
+    def close(self):
+        pass
+
+
+class _OrderedSink:
+    """在线程池中压缩各块，按提交顺序写出；未写出的块数不超过线程数的两倍。"""
+
+    def __init__(self, f, pool, threads):
+        self.f = f
+        self.pool = pool
+        self.pending = deque()
+        self.depth = 2 * threads
+
+    def submit(self, fn, *args):
+        self.pending.append(self.pool.submit(fn, *args))
+        while len(self.pending) > self.depth:
+            self.f.write(self.pending.popleft().result())
+
+    def drain(self):
+        while self.pending:
+            self.f.write(self.pending.popleft().result())
+
+
+class _GzipSink(_OrderedSink):
+    def __init__(self, f, pool, threads, level):
+        super().__init__(f, pool, threads)
+        self.level = level if level is not None else 9
+        self.crc = 0
+        self.size = 0
+        self.held = None
+        self.zdict = b''
+        f.write(_GZIP_HEADER)
+
+    def write(self, block):
+        # 最后一块要以 Z_FINISH 结束，因此总是留住最近一块，等下一块到来或关闭时再提交
+        self.crc = zlib.crc32(block, self.crc)
+        self.size += len(block)
+        if self.held is not None:
+            self._submit(False)
+        self.held = block
+
+    def _submit(self, last):
+        block = self.held or b''
+        self.submit(_deflate, block, self.zdict, self.level, last)
+        self.zdict = (self.zdict + block)[-_WINDOW:]
+        self.held = None
+
+    def close(self):
+        self._submit(True)
+        self.drain()
+        self.f.write(struct.pack('<II', self.crc, self.size & 0xffffffff))
+
+
+class _ZstdSink:
+    def __init__(self, f, pool, threads, level):
+        level = level if level is not None else 19
+        try:
+            import zstandard
+        except ImportError:
+            zstandard = None
+        if zstandard is not None:
+            cctx = zstandard.ZstdCompressor(level=level, threads=threads)
+            self.writer = cctx.stream_writer(f, closefd=False)
+            return
+        try:
+            from compression import zstd  # Python 3.14+
+        except ImportError:
+            raise RuntimeError('写出 .zst 需要 zstandard 库（pip install zstandard）') from None
+        self.writer = zstd.ZstdFile(f, 'wb', level=level)
+
+    def write(self, block):
+        self.writer.write(block)
+
+    def close(self):
+        self.writer.close()
+
+
+class _BrotliSink(_OrderedSink):
+    def __init__(self, f, pool, threads, level):
+        try:
+            import brotli
+        except ImportError:
+            raise RuntimeError('写出 .br 需要 brotli 库（pip install brotli）') from None
+        # brotli 流只能顺序压缩，用单线程池与其他格式并行
+        self.own_pool = ThreadPoolExecutor(1)
+        super().__init__(f, self.own_pool, 1)
+        self.compressor = brotli.Compressor(quality=level if level is not None else 11)
+
+    def write(self, block):
+        self.submit(self.compressor.process, block)
+
+    def close(self):
+        self.submit(self.compressor.finish)
+        self.drain()
+        self.own_pool.shutdown()
+
+
+_SINKS = {'.gz': _GzipSink, '.zst': _ZstdSink, '.br': _BrotliSink}
+
+
+def output_format(path):
+    """按扩展名给出压缩格式（'.gz' / '.zst' / '.br'），原文为 None。"""
+    ext = os.path.splitext(path)[1].lower()
+    return ext if ext in _SINKS else None
+
+
+class StreamOutputs:
+    """把写入的字节流按 block_size 分块，同时写到各输出文件；close 时替换目标文件。
+
+    level 为各压缩格式的压缩级别，默认 gzip 9、zstd 19、brotli 11。
+    """
+
+    def __init__(self, paths, threads=DEFAULT_THREADS, level=None, block_size=BLOCK_SIZE):
+        self.paths = list(paths)
+        self.block_size = block_size
+        self.buffer = bytearray()
+        threads = max(1, threads)
+        self.pool = ThreadPoolExecutor(threads)
+        self.files = []
+        self.sinks = []
+        try:
+            for path in self.paths:
+                f = open(path + '.tmp', 'wb')
+                self.files.append(f)
+                self.sinks.append(_SINKS.get(output_format(path), _RawSink)(f, self.pool, threads, level))
+        except BaseException:
+            self._abort()
+            raise
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.buffer += data
+        if len(self.buffer) >= self.block_size:
+            n = len(self.buffer) // self.block_size * self.block_size
+            blocks = bytes(self.buffer[:n])
+            del self.buffer[:n]
+            for i in range(0, n, self.block_size):
+                self._emit(blocks[i:i + self.block_size])
+
+    def _emit(self, block):
+        for sink in self.sinks:
+            sink.write(block)
+
+    def close(self):
+        try:
+            if self.buffer:
+                self._emit(bytes(self.buffer))
+                self.buffer.clear()
+            for sink in self.sinks:
+                sink.close()
+        except BaseException:
+            self._abort()
+            raise
+        self.pool.shutdown()
+        for f, path in zip(self.files, self.paths):
+            f.close()
+            os.replace(path + '.tmp', path)
+
+    def _abort(self):
+        self.pool.shutdown(cancel_futures=True)
+        for f, path in zip(self.files, self.paths):
+            f.close()
+            try:
+                os.remove(path + '.tmp')
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
@@ -30,6 +30,8 @@ import time
 from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 
+from profiling import Profiler, add_profile_args
+
 REQUEST_DELAY = 21.0  # 默认请求间隔（秒），对应 ~3/min（留少量余量）
 
 API_BASE = "https://next.bgm.tv/p1"
@@ -273,7 +275,9 @@ def main():
     parser.add_argument("--csv", help="CSV 文件路径（不指定则从 stdin 读取）")
     parser.add_argument("--dry-run", action="store_true", help="仅预览，不执行")
     parser.add_argument("--delay", type=float, default=REQUEST_DELAY, help=f"请求间隔秒数（默认 {REQUEST_DELAY}s，限流 3/min 时建议 ≥20s）")
+    add_profile_args(parser)
     args = parser.parse_args()
+    prof = Profiler.from_args(args, os.path.splitext(args.csv or f"sync_index_{args.index}")[0] + ".profile.json")
 
     token = os.environ.get("BANGUMI_TOKEN", "")
     if not token and not args.dry_run:
@@ -304,7 +308,8 @@ def main():
     print(f"列: {columns}")
     print(f"行数: {len(rows)}")
 
-    sync(args.index, cat, id_col, token, columns, rows, args.dry_run, args.delay)
+    with prof.stage("sync", len(rows)):
+        sync(args.index, cat, id_col, token, columns, rows, args.dry_run, args.delay)
 
 
 if __name__ == "__main__":
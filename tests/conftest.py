@@ -0,0 +1,23 @@
+"""各脚本都是仓库根目录下的单个模块，测试直接按模块名导入。
+
+archive_dir 为 gen_archive.py 生成的小规模合成 Archive（固定种子，整个测试会话共用一份）。
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def archive_dir(tmp_path_factory):
+    out = tmp_path_factory.mktemp('archive')
+    subprocess.run([sys.executable, os.path.join(ROOT, 'gen_archive.py'), str(out),
+                    '--subjects', '3000', '--persons', '3000', '--characters', '300',
+                    '--relations', '6000', '--seed', '7'],
+                   check=True, capture_output=True)
+    return str(out)
@@ -0,0 +1,108 @@
+"""跨期稳定下标与增量补丁：旧版本依次应用补丁后与新一期的全量文件完全一致。"""
+
+import copy
+import json
+import os
+import random
+
+import pytest
+
+from alias_delta import apply_delta, make_delta, read_chain, stabilize, write_delta
+from alias_index import AliasIndex, write_alias_index
+from person_alias import parse_bangumi_person_jsonlines
+
+
+@pytest.fixture(scope='module')
+def base(archive_dir):
+    return parse_bangumi_person_jsonlines(os.path.join(archive_dir, 'person.jsonlines'), workers=1)
+
+
+def _next_week(mapping, rng, new_id):
+    """模拟下一期的扫描结果：删除、改名、新增人物，增删别名，人物顺序打乱。"""
+    persons, aliases = mapping
+    keep = [i for i, p in enumerate(persons) if p and rng.random() > 0.05]
+    rows = [[persons[i][0] + ('′' if rng.random() < 0.02 else ''), persons[i][1]] for i in keep]
+    rows += [[f'新人物{new_id + k}', new_id + k] for k in range(30)]
+    order = list(range(len(rows)))
+    rng.shuffle(order)
+    position = {old: new for new, old in enumerate(order)}
+    old_pos = {i: position[n] for n, i in enumerate(keep)}
+    result = {}
+    for alias, indices in aliases.items():
+        moved = [old_pos[i] for i in indices if i in old_pos and rng.random() > 0.02]
+        if moved:
+            result[alias] = moved
+    for k in range(30):
+        result.setdefault(f'新别名{new_id + k}', []).append(position[len(keep) + k])
+    return [[rows[i] for i in order], result]
+
+
+def _ids(mapping):
+    return {p[1] for p in mapping[0] if p}
+
+
+def test_delta_chain_reproduces_full_file(base):
+    rng = random.Random(3)
+    current = stabilize(base, [[], {}])
+    history = [current]
+    for week in range(5):
+        scanned = _next_week(current, rng, 10 ** 6 * (week + 1))
+        stable = stabilize(scanned, current)
+        ids = _ids(stable)
+        assert ids == {p[1] for p in scanned[0]}
+        # 仍存在的人物保持原下标，已删除的人物留下空位
+        assert all(stable[0][i][1] == p[1] if p[1] in ids else stable[0][i] == []
+                   for i, p in enumerate(current[0]) if p)
+        delta = json.loads(json.dumps(make_delta(current, stable, str(week), str(week + 1)), ensure_ascii=False))
+        assert apply_delta(copy.deepcopy(current), delta) == stable
+        current = stable
+        history.append(current)
+
+    client = copy.deepcopy(history[0])
+    for old, new in zip(history, history[1:]):
+        apply_delta(client, make_delta(old, new, 'a', 'b'))
+    assert client == history[-1]
+
+
+def test_deleted_person_leaves_empty_slot():
+    old = [[['甲', 1], ['乙', 2], ['丙', 3]], {'a': [0, 1], 'c': [2]}]
+    new = stabilize([[['丙', 3], ['丁', 4], ['甲', 1]], {'a': [2], 'c': [0], 'd': [1]}], old)
+    assert new == [[['甲', 1], [], ['丙', 3], ['丁', 4]], {'a': [0], 'c': [2], 'd': [3]}]
+    delta = make_delta(old, new, 'v1', 'v2')
+    assert delta['persons'] == [[1], [3, '丁', 4]]
+    assert delta['remove'] == {'a': [1]}
+    assert apply_delta(copy.deepcopy(old), delta) == new
+
+    again = stabilize([[['乙', 2], ['甲', 1]], {'b': [0]}], new)
+    assert again[0] == [['甲', 1], [], [], [], ['乙', 2]]
+    assert make_delta(new, again, 'v2', 'v3')['persons'] == [[2], [3], [4, '乙', 2]]
+
+
+def test_empty_slot_in_binary_index(tmp_path):
+    path = str(tmp_path / 'x.bin')
+    write_alias_index([[['甲', 1], [], ['乙', 3]], {'a': [0, 2]}], path)
+    with AliasIndex(path) as index:
+        assert index.person(1) == ('', 0)
+        assert index.lookup('a') == [('甲', 1), ('乙', 3)]
+
+
+def test_write_delta_chain(base, tmp_path):
+    out = str(tmp_path)
+    rng = random.Random(5)
+    versions = [stabilize(base, [[], {}])]
+    for n in range(4):
+        versions.append(stabilize(_next_week(versions[-1], rng, 10 ** 7 * (n + 1)), versions[-1]))
+    for n, (old, new) in enumerate(zip(versions, versions[1:])):
+        if n == 0:
+            write_delta(old, [[], {}], out, 'v0')
+        write_delta(new, old, out, f'v{n + 1}', keep=3)
+
+    current, chain = read_chain(os.path.join(out, 'data_version.txt'))
+    assert current == 'v4' and [v for v, _ in chain] == ['v3', 'v2', 'v1']
+    assert sorted(f for f in os.listdir(out) if f.startswith('person_alias.delta.')) == sorted(f for _, f in chain)
+
+    client = copy.deepcopy(versions[1])
+    for _, name in reversed(chain):
+        with open(os.path.join(out, name), encoding='utf-8') as f:
+            apply_delta(client, json.load(f))
+    assert client == versions[-1]
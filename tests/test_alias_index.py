@@ -0,0 +1,86 @@
+"""person_alias.bin 读写往返与原 [persons, aliases] 映射一致。"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from alias_index import AliasIndex, write_alias_index
+from name_normalize import normalize_alias
+from person_alias import parse_bangumi_person_jsonlines
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def mapping(archive_dir):
+    return parse_bangumi_person_jsonlines(os.path.join(archive_dir, 'person.jsonlines'), workers=1)
+
+
+@pytest.fixture
+def index(mapping, tmp_path):
+    path = str(tmp_path / 'person_alias.bin')
+    write_alias_index(mapping, path)
+    with AliasIndex(path) as index:
+        yield index
+
+
+def test_round_trip(mapping, index):
+    persons, aliases = mapping
+    assert index.persons == len(persons) and index.aliases == len(aliases)
+    assert [index.person(i) for i in range(len(persons))] == [tuple(p) for p in persons]
+    assert dict(index.items()) == aliases
+    keys = [key for key, _ in index.items()]
+    assert keys == sorted(aliases, key=lambda k: k.encode('utf-8'))
+
+
+def test_lookup(mapping, index):
+    persons, aliases = mapping
+    for key, indices in aliases.items():
+        assert index.indices(key) == indices
+        assert index.lookup(key) == [tuple(persons[i]) for i in indices]
+    assert index.indices('不存在的别名xyz') == []
+    key = next(k for k in aliases if k.isascii() and k.isalpha())
+    raw = key[:3].upper() + ' ' + key[3:]
+    assert normalize_alias(raw) == key
+    assert index.lookup(raw) == [tuple(persons[i]) for i in aliases[key]]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'x.bin'
+    path.write_bytes(b'not an index' + b'\0' * 40)
+    with pytest.raises(ValueError):
+        AliasIndex(str(path))
+
+
+def test_prefix_matches_scan_of_sorted_keys(mapping, index):
+    persons, aliases = mapping
+    keys = sorted(aliases, key=lambda k: k.encode('utf-8'))
+    for prefix in ['', 'sa', 'すず', keys[len(keys) // 2][:2], 'zzzz']:
+        raw = prefix.encode('utf-8')
+        expected = [(k, [tuple(persons[i]) for i in aliases[k]]) for k in keys if k.encode('utf-8').startswith(raw)]
+        assert list(index.prefix(prefix)) == expected
+        assert list(index.prefix(prefix, limit=3)) == expected[:3]
+    assert list(index.prefix('SA')) == list(index.prefix('sa'))
+
+
+def test_query_subcommand(archive_dir, tmp_path):
+    person_file = os.path.join(archive_dir, 'person.jsonlines')
+    script = os.path.join(ROOT, 'person_alias.py')
+    subprocess.run([sys.executable, script, person_file], cwd=tmp_path, check=True, capture_output=True)
+    assert not (tmp_path / 'person_alias.bin').exists()
+    subprocess.run([sys.executable, script, person_file, '--bin'], cwd=tmp_path, check=True, capture_output=True)
+    with open(tmp_path / 'person_alias.json', encoding='utf-8') as f:
+        persons, aliases = json.load(f)
+    key = next(k for k in aliases if k.isascii())
+
+    def query(*args):
+        return json.loads(subprocess.run([sys.executable, script, 'query', '--json', *args], cwd=tmp_path,
+                                         check=True, capture_output=True, text=True).stdout)
+
+    assert query(key.upper(), 'nonexistent-alias') == {
+        key.upper(): {key: [persons[i] for i in aliases[key]]}, 'nonexistent-alias': {}}
+    expected = {k: [persons[i] for i in v] for k, v in sorted(aliases.items()) if k.startswith(key[:2])}
+    assert query('--prefix', '--limit', '1000', key[:2]) == {key[:2]: expected}
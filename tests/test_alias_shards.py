@@ -0,0 +1,72 @@
+"""分片别名与布隆过滤器的查询结果与完整映射一致；清单不含过滤器，一次查询只读一个过滤器和至多一个分片。"""
+
+import os
+
+import pytest
+
+from alias_shards import MANIFEST, ShardedAliases, fnv1a32, shard_of, write_alias_shards
+from person_alias import parse_bangumi_person_jsonlines
+
+
+@pytest.fixture(scope='module')
+def mapping(archive_dir):
+    return parse_bangumi_person_jsonlines(os.path.join(archive_dir, 'person.jsonlines'), workers=1)
+
+
+def test_fnv1a32_reference_values():
+    assert fnv1a32(b'') == 0x811c9dc5
+    assert fnv1a32(b'a') == 0xe40c292c
+    assert fnv1a32(b'foobar') == 0xbf9cf968
+
+
+@pytest.mark.parametrize('shards', [1, 7, 64])
+def test_lookup_matches_mapping(mapping, tmp_path, shards):
+    persons, aliases = mapping
+    manifest = write_alias_shards(mapping, str(tmp_path), shards)
+    index = ShardedAliases(str(tmp_path))
+    assert sum(s['keys'] for s in manifest['shards']) == len(aliases)
+    for key, indices in aliases.items():
+        assert index.might_contain(key)
+        assert index.get(key) == [persons[i] for i in indices]
+        h = fnv1a32(key.encode('utf-8'))
+        lo, hi = manifest['shards'][shard_of(h, shards)]['hash_range']
+        assert lo <= h < hi
+    assert index.fetches <= shards
+
+
+def test_missing_keys_rarely_fetch(mapping, tmp_path):
+    write_alias_shards(mapping, str(tmp_path), 16, fpr=0.01)
+    index = ShardedAliases(str(tmp_path))
+    missing = [f'不存在{i}' for i in range(5000)]
+    assert not any(k in mapping[1] for k in missing)
+    positives = sum(index.might_contain(k) for k in missing)
+    assert positives < 0.03 * len(missing)
+    assert all(index.get(k) == [] for k in missing)
+
+
+def test_rewrite_keeps_unchanged_shards(mapping, tmp_path):
+    out = str(tmp_path)
+    first = write_alias_shards(mapping, out, 8)
+    persons, aliases = mapping
+    key = next(k for k, v in aliases.items() if v != [0])
+    second = write_alias_shards([persons, {**aliases, key: [0]}], out, 8)
+    changed = [a['file'] != b['file'] for a, b in zip(first['shards'], second['shards'])]
+    assert sum(changed) == 1
+    assert [a['bloom'] for a in first['shards']] == [b['bloom'] for b in second['shards']]
+    files = sorted(f for f in os.listdir(out) if f != MANIFEST)
+    assert files == sorted([s['file'] for s in second['shards']] + [s['bloom']['file'] for s in second['shards']])
+
+
+def test_manifest_size_does_not_grow_with_aliases(mapping, tmp_path):
+    persons, aliases = mapping
+    small = dict(list(aliases.items())[:100])
+    sizes = []
+    for i, subset in enumerate((small, aliases)):
+        out = str(tmp_path / str(i))
+        write_alias_shards([persons, subset], out, 16)
+        sizes.append(os.path.getsize(os.path.join(out, MANIFEST)))
+    assert abs(sizes[0] - sizes[1]) < 16 * 8
+
+    index = ShardedAliases(str(tmp_path / '1'))
+    key = next(iter(aliases))
+    assert index.get(key) and index.bloom_fetches == 1 and index.fetches == 1
@@ -0,0 +1,97 @@
+"""列式缓存：读回的列与直接解析相同；数据源或投影版本变化后旧条目被删除，不同目录下的同名数据源互不影响。"""
+
+import json
+import os
+import shutil
+
+import archive_cache
+from archive_cache import Column, Projection, load_table
+from find_dup_person_name import IDENTIFIER_PROJECTION, PERSON_PROJECTION
+
+
+def _career(obj):
+    career = obj.get('career')
+    return career[0] if career else None
+
+
+def _keep(obj):
+    return obj.get('id', 0) % 3 != 0
+
+
+def _projection(version):
+    return Projection('test-persons', version, [
+        Column('id', 'i'),
+        Column('name', 's'),
+        Column('career', 's', _career),
+        Column('locked', 'b'),
+    ], keep=_keep)
+
+
+def _columns(table):
+    return table.rows, {name: list(values) for name, values in table.columns.items()}
+
+
+def test_cached_table_matches_build(archive_dir, tmp_path):
+    source = os.path.join(archive_dir, 'person.jsonlines')
+    cache_dir = str(tmp_path / 'cache')
+    for projection in (PERSON_PROJECTION, IDENTIFIER_PROJECTION):
+        expected = _columns(load_table(source, projection, None, workers=1))
+        assert _columns(load_table(source, projection, cache_dir, workers=1)) == expected
+        assert _columns(load_table(source, projection, cache_dir, workers=1)) == expected
+
+
+def _entries(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_prune_superseded_entries(archive_dir, tmp_path):
+    source = str(tmp_path / 'person.jsonlines')
+    shutil.copy(os.path.join(archive_dir, 'person.jsonlines'), source)
+    cache_dir = str(tmp_path / 'cache')
+    load_table(source, _projection(1), cache_dir, workers=1)
+    load_table(source, PERSON_PROJECTION, cache_dir, workers=1)
+    first = _entries(cache_dir)
+    assert len(first) == 4
+
+    # 新一期数据：本投影的旧条目被删除，其他投影的条目保留到它们自己更新
+    with open(source, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': 10 ** 7 + 1, 'name': '新人物'}, ensure_ascii=False) + '\n')
+    table = load_table(source, _projection(1), cache_dir, workers=1)
+    assert table['name'][-1] == '新人物'
+    second = _entries(cache_dir)
+    assert len(second) == 4 and len(set(second) - set(first)) == 1
+
+    # 投影升级：旧版本的指针与条目一并删除，只按文件名命名的旧式指针也是
+    legacy = 'ab' * 32
+    os.makedirs(os.path.join(cache_dir, f'{legacy[:16]}-test-persons-v1'))
+    with open(os.path.join(cache_dir, 'person.jsonlines.test-persons-v1.json'), 'w', encoding='utf-8') as f:
+        json.dump({'size': 0, 'mtime_ns': 0, 'sha256': legacy}, f)
+    load_table(source, _projection(2), cache_dir, workers=1)
+    third = _entries(cache_dir)
+    assert not any('test-persons-v1' in name for name in third)
+    assert sum('test-persons-v2' in name for name in third) == 2
+    assert sum(PERSON_PROJECTION.key in name for name in third) == 2
+
+
+def test_same_file_name_in_two_directories(archive_dir, tmp_path, monkeypatch):
+    sources = []
+    for name, extra in (('current', None), ('previous', {'id': 10 ** 7 + 2, 'name': '上一期'})):
+        os.makedirs(tmp_path / name)
+        source = str(tmp_path / name / 'person.jsonlines')
+        shutil.copy(os.path.join(archive_dir, 'person.jsonlines'), source)
+        if extra:
+            with open(source, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(extra, ensure_ascii=False) + '\n')
+        sources.append(source)
+    cache_dir = str(tmp_path / 'cache')
+    expected = [_columns(load_table(source, _projection(1), cache_dir, workers=1)) for source in sources]
+    assert len(_entries(cache_dir)) == 4
+
+    # 交替读取两份同名文件都命中缓存，互不删除对方的条目
+    def rebuild(*args):
+        raise AssertionError('cache miss')
+    monkeypatch.setattr(archive_cache, '_build', rebuild)
+    for _ in range(2):
+        for source, columns in zip(sources, expected):
+            assert _columns(load_table(source, _projection(1), cache_dir, workers=1)) == columns
+    assert len(_entries(cache_dir)) == 4
@@ -0,0 +1,94 @@
+"""并行字节段扫描与串行扫描结果一致。"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import archive_scan
+from archive_scan import _count_lines, scan, split_ranges
+from find_dup_person_name import DupNameGrouper
+from person_alias import AliasBuilder, CompactAliasBuilder
+
+
+class LineRecorder:
+    """按行号记录 id，merge 时依次拼接。"""
+
+    def __init__(self):
+        self.rows = []
+
+    def feed(self, ln, obj):
+        self.rows.append((ln, obj.get('id')))
+
+    def merge(self, other):
+        self.rows.extend(other.rows)
+
+
+def _scan_both(path, make, monkeypatch, workers=3):
+    serial = scan(path, *make(), workers=1)
+    monkeypatch.setattr(archive_scan, 'PARALLEL_MIN_BYTES', 0)
+    parallel = scan(path, *make(), workers=workers)
+    return serial, parallel
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 7, 64])
+def test_split_ranges_cover_file_on_line_boundaries(archive_dir, n):
+    path = os.path.join(archive_dir, 'person.jsonlines')
+    with open(path, 'rb') as f:
+        data = f.read()
+    ranges = split_ranges(path, n)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[start - 1:start] == b'\n' for start, _ in ranges[1:])
+    assert sum(_count_lines(path, *r) for r in ranges) == data.count(b'\n')
+
+
+def test_count_lines_without_trailing_newline(tmp_path):
+    path = str(tmp_path / 'x.jsonlines')
+    with open(path, 'wb') as f:
+        f.write(b'{"id":1}\n{"id":2}\n{"id":3}')
+    ranges = split_ranges(path, 2)
+    assert sum(_count_lines(path, *r) for r in ranges) == 3
+
+
+def test_parallel_line_numbers_match_serial(archive_dir, monkeypatch):
+    serial, parallel = _scan_both(os.path.join(archive_dir, 'person.jsonlines'), lambda: [LineRecorder()], monkeypatch)
+    assert parallel[0].rows == serial[0].rows
+    assert [ln for ln, _ in serial[0].rows] == list(range(1, len(serial[0].rows) + 1))
+
+
+def test_parallel_bad_line_is_skipped_in_place(tmp_path, monkeypatch):
+    lines = [json.dumps({'id': i}) for i in range(1, 200)]
+    lines[120] = '{"id": broken'
+    path = str(tmp_path / 'x.jsonlines')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    serial, parallel = _scan_both(path, lambda: [LineRecorder()], monkeypatch, workers=4)
+    assert parallel[0].rows == serial[0].rows
+    assert (121, None) not in serial[0].rows and len(serial[0].rows) == 198
+
+
+@pytest.mark.parametrize('builder', [AliasBuilder, CompactAliasBuilder])
+def test_parallel_alias_merge_matches_serial(archive_dir, monkeypatch, builder):
+    serial, parallel = _scan_both(os.path.join(archive_dir, 'person.jsonlines'), lambda: [builder()], monkeypatch)
+    expected, got = serial[0].result(), parallel[0].result()
+    assert got[0] == expected[0]
+    assert list(got[1].items()) == list(expected[1].items())
+
+
+def test_parallel_dup_groups_match_serial(archive_dir, monkeypatch):
+    serial, parallel = _scan_both(os.path.join(archive_dir, 'person.jsonlines'), lambda: [DupNameGrouper()], monkeypatch)
+    assert parallel[0].name_groups == serial[0].name_groups
+
+
+def test_parallel_scans_from_two_threads(archive_dir, monkeypatch):
+    paths = [os.path.join(archive_dir, name) for name in ('person.jsonlines', 'character.jsonlines')]
+    serial = [scan(path, LineRecorder(), DupNameGrouper()) for path in paths]
+    monkeypatch.setattr(archive_scan, 'PARALLEL_MIN_BYTES', 0)
+    with ThreadPoolExecutor(2) as threads:
+        futures = [threads.submit(scan, path, LineRecorder(), DupNameGrouper(), workers=3) for path in paths]
+        parallel = [fut.result(timeout=120) for fut in futures]
+    for (rec, dup), (expected_rec, expected_dup) in zip(parallel, serial):
+        assert rec.rows == expected_rec.rows
+        assert dup.name_groups == expected_dup.name_groups
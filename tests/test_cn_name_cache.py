@@ -0,0 +1,62 @@
+"""人名转换缓存：结果与直接调用 refined_to_cn 相同，进程池按原顺序给出，缓存文件跨次复用；
+人物、角色在两个线程中同时并行扫描、转换时，输出与串行运行相同。"""
+
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from opencc_cn_name import refined_to_cn
+
+import archive_scan
+from cn_name_cache import CnNameCache, conversion_pool
+from find_missing_cn_name import process_entity
+from profiling import Profiler
+
+
+def _names():
+    rng = random.Random(0)
+    pool = ['髙橋一郎', '渡邊結衣', '齋藤', '澤田', 'ソフィア', '櫻井翔', 'Smith', '鈴木愛', '']
+    return [(i, rng.choice(pool) + rng.choice(['', '子', '樹'])) for i in range(500)]
+
+
+def test_convert_stream_matches_direct():
+    items = _names()
+    expected = [(key, name, refined_to_cn(name)) for key, name in items]
+    assert list(CnNameCache(None).convert_stream(items)) == expected
+    with conversion_pool(2) as pool:
+        assert list(CnNameCache(None).convert_stream(items, pool, 2, batch_size=3)) == expected
+
+
+def test_cache_file_round_trip(tmp_path):
+    cache_dir = str(tmp_path)
+    stale = os.path.join(cache_dir, '0000000000000000.json')
+    with open(stale, 'w', encoding='utf-8') as f:
+        f.write('{}')
+    names = [name for _, name in _names()]
+    cache = CnNameCache(cache_dir)
+    assert cache.convert_all(names) == {name: refined_to_cn(name) for name in names}
+    cache.save()
+    assert os.listdir(cache_dir) == [os.path.basename(cache.path)]
+
+    again = CnNameCache(cache_dir)
+    assert again.loaded == len(set(names)) and again.table == cache.table
+
+
+def test_threaded_entities_match_serial(archive_dir, tmp_path, monkeypatch):
+    entities = ['person', 'character']
+
+    def run(out_dir, workers):
+        os.makedirs(out_dir)
+        prof = Profiler(None)
+        with conversion_pool(workers) as pool, ThreadPoolExecutor(2) as threads:
+            futures = [threads.submit(process_entity, prof, entity, os.path.join(archive_dir, f'{entity}.jsonlines'),
+                                      os.path.join(out_dir, f'{entity}.csv'), None, CnNameCache(None), pool, workers)
+                       for entity in entities]
+            return [fut.result(timeout=120) for fut in futures]
+
+    serial = run(str(tmp_path / 'serial'), 1)
+    monkeypatch.setattr(archive_scan, 'PARALLEL_MIN_BYTES', 0)
+    assert run(str(tmp_path / 'parallel'), 3) == serial
+    for entity in entities:
+        with open(tmp_path / 'serial' / f'{entity}.csv', 'rb') as a, open(tmp_path / 'parallel' / f'{entity}.csv', 'rb') as b:
+            assert a.read() == b.read()
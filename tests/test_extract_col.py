@@ -0,0 +1,141 @@
+"""extract_col: several keys in one pass equal chained single-key runs; stdin/stdout streaming and batch
+(whole files and row chunks) write the same bytes as single file runs."""
+
+import csv
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import extract_col
+from extract_col import extract_file, extract_key_from_cell, extract_keys_from_cell
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEYS = ['原画', '作画监督', '辅佐', '音响']
+NAMES = ['山田太郎', '佐藤花子', 'Smith', '鈴木', '田中一']
+
+
+def _cell(rng):
+    parts = []
+    for _ in range(rng.randrange(5)):
+        key = rng.choice(KEYS + ['脚本', '演出'])
+        form = rng.randrange(3)
+        if form == 0:
+            parts.append(f'{key}：{rng.choice(NAMES)}')
+        elif form == 1:
+            parts.append(f'{rng.choice(NAMES)}（{key}：{rng.choice(NAMES)}）')
+        else:
+            parts.append(f'{rng.choice(NAMES)}（{key}）')
+    return '；'.join(parts)
+
+
+def _write_csv(path, rows, fieldnames=('id', '制作人员', '备注')):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _rows(n, seed=0):
+    rng = random.Random(seed)
+    return [{'id': i, '制作人员': _cell(rng), '备注': rng.choice(['', 'a,b', '"q"', '多\n行'])} for i in range(n)]
+
+
+def _read(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_keys_match_chained_single_keys():
+    rng = random.Random(1)
+    for _ in range(3000):
+        cell = _cell(rng)
+        keys = rng.sample(KEYS, rng.randrange(1, 4))
+        chained, values, found = cell, [], False
+        for key in keys:
+            new_cell, value = extract_key_from_cell(chained, key)
+            if new_cell is None:
+                values.append('')
+            else:
+                chained, found = new_cell, True
+                values.append(value)
+        expected = (chained, values) if found else (None, 'key not found')
+        assert extract_keys_from_cell(cell, keys) == expected
+
+
+def test_file_matches_chained_runs(tmp_path):
+    src = str(tmp_path / 'staff.csv')
+    _write_csv(src, _rows(800))
+    multi_out, multi_fail = str(tmp_path / 'm.csv'), str(tmp_path / 'm_failed.csv')
+    extract_file(src, multi_out, multi_fail, '制作人员', KEYS[:3], KEYS[:3])
+
+    # a chained run keeps every row in which each key matched (plus rows whose cell ran out)
+    current = src
+    for i, key in enumerate(KEYS[:3]):
+        out, fail = str(tmp_path / f's{i}.csv'), str(tmp_path / f's{i}_failed.csv')
+        extract_file(current, out, fail, '制作人员', [key], [key])
+        current = out
+    chained = {row['id']: row for row in _read(current)}
+
+    multi = _read(multi_out)
+    complete = [row for row in multi if all(row[key] for key in KEYS[:3])]
+    assert len(complete) > 10
+    assert all(row == chained[row['id']] for row in complete)
+
+    # a row fails only if none of the keys is found
+    failed = _read(multi_fail) if os.path.exists(multi_fail) else []
+    for row in failed:
+        assert row['制作人员'] and all(extract_key_from_cell(row['制作人员'], key)[0] is None for key in KEYS[:3])
+    assert len(multi) + len(failed) == 800
+
+
+@pytest.fixture
+def small_split(monkeypatch):
+    # staff_a.csv (~30 KiB) is split into chunks, staff_b.csv (~3 KiB) runs as a whole file
+    monkeypatch.setattr(extract_col, 'SPLIT_BYTES', 8 * 1024)
+
+
+def test_batch_matches_single_runs(tmp_path, small_split):
+    inputs = tmp_path / 'in'
+    inputs.mkdir()
+    _write_csv(str(inputs / 'staff_a.csv'), _rows(500, seed=2))
+    _write_csv(str(inputs / 'staff_b.csv'), _rows(37, seed=3))
+    _write_csv(str(inputs / 'other.csv'), _rows(5, seed=4))
+    spec = str(tmp_path / 'spec.json')
+    with open(spec, 'w', encoding='utf-8') as f:
+        json.dump([{'match': 'staff*.csv', 'column': '制作人员', 'keys': ['原画', '辅佐:演出助手']}], f,
+                  ensure_ascii=False)
+
+    out_dir = str(tmp_path / 'out')
+    extract_col.batch_main([spec, str(inputs), '--out-dir', out_dir, '--jobs', '2', '--chunk-rows', '7'])
+
+    single_dir = tmp_path / 'single'
+    single_dir.mkdir()
+    for name in ('staff_a', 'staff_b'):
+        src = str(inputs / f'{name}.csv')
+        out, fail = extract_col.default_outputs(src, str(single_dir))
+        extract_file(src, out, fail, '制作人员', ['原画', '辅佐'], ['原画', '演出助手'])
+    assert sorted(os.listdir(out_dir)) == sorted(os.listdir(single_dir))
+    for name in os.listdir(single_dir):
+        with open(os.path.join(out_dir, name), 'rb') as a, open(single_dir / name, 'rb') as b:
+            assert a.read() == b.read(), name
+
+
+def test_stdin_to_stdout(tmp_path):
+    src = str(tmp_path / 'staff.csv')
+    _write_csv(src, _rows(200, seed=5))
+    extract_file(src, str(tmp_path / 'file.csv'), str(tmp_path / 'file_failed.csv'), '制作人员', ['原画'], ['原画'])
+
+    with open(src, 'rb') as f:
+        proc = subprocess.run([sys.executable, os.path.join(ROOT, 'extract_col.py'), '-', '制作人员', '原画',
+                               '--fail', 'piped_failed.csv'],
+                              stdin=f, cwd=tmp_path, check=True, capture_output=True)
+    assert 'OK: ' in proc.stderr.decode('utf-8')
+    expected = _read(str(tmp_path / 'file.csv'))
+    assert list(csv.DictReader(io.StringIO(proc.stdout.decode('utf-8')))) == expected
+    with open(tmp_path / 'piped_failed.csv', 'rb') as a, open(tmp_path / 'file_failed.csv', 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,96 @@
+"""同名组的稀疏序号，以及 DupNameGrouper 输出与原先按字母序连续编号的结果对应。"""
+
+import csv
+import io
+import json
+import random
+
+from find_dup_person_name import DupNameGrouper, sparse_ranks, update_sparse_ranks
+
+
+def _increasing(ranks):
+    return all(r > 0 for r in ranks) and all(a < b for a, b in zip(ranks, ranks[1:]))
+
+
+def test_sparse_ranks_keep_previous():
+    rng = random.Random(0)
+    keys = sorted(f'k{i:04d}' for i in range(500))
+    previous = dict(zip(keys, sparse_ranks(keys, {}, gap=8)))
+    assert list(previous.values()) == [(i + 1) * 8 for i in range(500)]
+    for _ in range(50):
+        current = sorted(rng.sample(keys, 400) + [f'k{rng.randrange(500):04d}x' for _ in range(rng.randrange(5))])
+        current = sorted(set(current))
+        ranks = sparse_ranks(current, previous, gap=8)
+        assert _increasing(ranks)
+        # 每次最多插入 4 个新 key，间隔 8 足够，已有 key 的序号不变
+        assert all(previous[k] == r for k, r in zip(current, ranks) if k in previous)
+
+
+def test_sparse_ranks_renumber():
+    # 前一期的序号与字母序不一致
+    assert sparse_ranks(['a', 'b'], {'a': 5, 'b': 3}, gap=10) == [10, 20]
+    # 相邻序号之间放不下新 key
+    assert sparse_ranks(['a', 'b', 'c'], {'a': 1, 'c': 2}, gap=10) == [10, 20, 30]
+    assert sparse_ranks(['a', 'b', 'c'], {'a': 1, 'c': 3}, gap=10) == [1, 2, 3]
+    # 末尾的新 key 按 gap 向后排
+    assert sparse_ranks(['a', 'b', 'c'], {'a': 7}, gap=10) == [7, 17, 27]
+
+
+def test_update_sparse_ranks_persists(tmp_path):
+    path = str(tmp_path / 'state.json')
+    first = update_sparse_ranks(path, ['a', 'c'], gap=100)
+    second = update_sparse_ranks(path, ['b', 'c', 'd'], gap=100)
+    assert first == [100, 200] and second == [100, 200, 300]
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'b': 100, 'c': 200, 'd': 300}
+
+
+def _grouper():
+    rng = random.Random(3)
+    names = ['佐藤結衣', '佐藤 結衣', '鈴木愛', '髙橋一郎', '高橋一郎', 'ソフィア', 'Yui']
+    cn = ['佐藤结衣', '铃木爱', '高桥一郎', '索菲亚']
+    grouper = DupNameGrouper()
+    ids = rng.sample(range(1, 10 ** 5), 400)
+    grouper.add_many(ids, [rng.choice(names) for _ in ids], [rng.choice(cn) for _ in ids])
+    return grouper
+
+
+def _baseline_rows(grouper):
+    # 原先的输出：按 (name, 简体中文名) 字母序连续编号
+    dup_groups = {k: v for k, v in grouper.name_groups.items() if len(v) >= 2}
+    return [(pid, order) for order, key in enumerate(sorted(dup_groups), 1) for pid, _ in dup_groups[key]]
+
+
+def _write(grouper, order_state=None):
+    out = io.StringIO()
+    grouper.write(out, order_state)
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == ['person_id', 'order']
+    return [(int(pid), int(order)) for pid, order in rows[1:]]
+
+
+def _groups(rows):
+    groups = {}
+    for pid, order in rows:
+        groups.setdefault(order, []).append(pid)
+    return groups
+
+
+def test_write_with_order_state_relabels_baseline(tmp_path):
+    grouper = _grouper()
+    baseline = _baseline_rows(grouper)
+    rows = _write(grouper, str(tmp_path / 'state.json'))
+    assert [pid for pid, _ in rows] == [pid for pid, _ in baseline]
+    relabel = dict((old, new) for (_, old), (_, new) in zip(baseline, rows))
+    assert [relabel[old] for _, old in baseline] == [new for _, new in rows]
+    assert _increasing([relabel[k] for k in sorted(relabel)])
+
+
+def test_write_without_state_uses_min_id():
+    grouper = _grouper()
+    baseline = _groups(_baseline_rows(grouper))
+    rows = _write(grouper)
+    groups = _groups(rows)
+    assert sorted(map(sorted, groups.values())) == sorted(map(sorted, baseline.values()))
+    assert all(order == min(members) for order, members in groups.items())
+    assert [order for _, order in rows] == sorted(order for _, order in rows)
@@ -0,0 +1,126 @@
+"""InfoboxExtractor 的结果与 bgm_tv_wiki.parse 一致：合法 wikitext 取值相同，parse 报错的文本不给出任何字段。"""
+
+import json
+import os
+import random
+
+import pytest
+
+from infobox import InfoboxExtractor, get_field, well_formed
+from person_alias import extract_aliases
+
+bgm_tv_wiki = pytest.importorskip('bgm_tv_wiki')
+
+KEYS = ['简体中文名', '别名', 'ISBN', '中文名', '性别', '版本特性']
+
+HANDWRITTEN = [
+    '{{Infobox Person\n|简体中文名= 张三 \n|别名={\n[日文名|張三]\n[ さん ]\n}\n|性别=\n}}',
+    '{{Infobox Person\n  |简体中文名=张三\n|简体中文名=李四\n}}',
+    '{{Infobox Person\n|别名={\n\n[纯假名| さとう ]\n}\n|简体中文名=张三}}',
+    '{{Infobox Person\n|别名={\n}\n|中文名=|x\n}}',
+    '{{Infobox animanga/Book\n|ISBN= 978-4-04-000000-0\n|版本特性={\n[ISBN|9784040000001]\n[限定版]\n}\n}}',
+    '{{Infobox Person\r\n|简体中文名= 张三\r\n|性别= 男\r\n}}',
+    '{{Infobox Person\n|备注= 见 |简体中文名=张三\n}}',
+]
+
+MALFORMED = [
+    # 数组未结束
+    '{{Infobox Person\n|简体中文名=张三\n|别名={\n[日文名|張三]\n}}',
+    # 缺少末行 }}
+    '{{Infobox Person\n|简体中文名=张三\n',
+    # 数组中出现字段行
+    '{{Infobox Person\n|别名={\n[a]\n|简体中文名=张三\n}\n}}',
+    # 数组中出现非 [...] 行
+    '{{Infobox Person\n|别名={\n[a]\nb\n}\n|简体中文名=张三\n}}',
+    # 数组外出现非字段行
+    '{{Infobox Person\n|简体中文名=张三\n备注\n}}',
+    # 字段行缺少 =
+    '{{Infobox Person\n|简体中文名=张三\n|性别\n}}',
+    # 缺少首行 {{Infobox
+    '|简体中文名=张三\n}}',
+    'x{{Infobox Person\n|简体中文名=张三\n}}',
+    '\r{{Infobox Person\n|简体中文名=张三\n}}',
+    # 多余的 }
+    '{{Infobox Person\n|别名={\n[a]\n}\n}\n|简体中文名=张三\n}}',
+]
+
+
+def _infoboxes(archive_dir):
+    yield from HANDWRITTEN
+    for name in ('person.jsonlines', 'character.jsonlines', 'subject.jsonlines'):
+        with open(os.path.join(archive_dir, name), encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)['infobox']
+
+
+def _plain(value):
+    # bgm_tv_wiki 的 Item 不是元组，按 (key, value) 比较
+    if isinstance(value, tuple):
+        return tuple((item.key, item.value) for item in value)
+    return value
+
+
+def _parse(text):
+    try:
+        return bgm_tv_wiki.parse(text)
+    except Exception:
+        return None
+
+
+def test_fields_match_parse(archive_dir):
+    extractor = InfoboxExtractor(KEYS)
+    checked = 0
+    for text in _infoboxes(archive_dir):
+        wiki = _parse(text)
+        if wiki is None:
+            continue
+        expected = [(f.key, _plain(f.value)) for f in wiki.fields if f.key in KEYS]
+        assert [(k, _plain(v)) for k, v in extractor.fields(text)] == expected, text
+        for key in KEYS:
+            assert _plain(extractor.get(text, key)) == _plain(wiki.get(key)), (key, text)
+        assert get_field(text, '简体中文名') == wiki.get('简体中文名')
+        checked += 1
+    assert checked > 6000
+
+
+def test_items_match_parse(archive_dir):
+    extractor = InfoboxExtractor([], item_keys=['ISBN', '日文名', '纯假名'])
+    for text in _infoboxes(archive_dir):
+        wiki = _parse(text)
+        if wiki is None:
+            continue
+        expected = [(item.key, item.value) for f in wiki.fields if isinstance(f.value, tuple)
+                    for item in f.value if item.key in ('ISBN', '日文名', '纯假名')]
+        assert [tuple(item) for item in extractor.items(text)] == expected, text
+
+
+def test_malformed_yield_nothing():
+    extractor = InfoboxExtractor(KEYS, item_keys=['日文名'])
+    for text in MALFORMED:
+        assert _parse(text) is None, text
+        assert not well_formed(text)
+        assert list(extractor.fields(text)) == [] and list(extractor.items(text)) == []
+        assert extractor.get(text, '简体中文名') is None
+        assert extract_aliases('張三', text) == []
+
+
+def test_well_formed_matches_parse(archive_dir):
+    pieces = ['{{Infobox', '{{Infobox Person', '}}', '}', '{', '|简体中文名=张三', '|别名={', '[a|b]', '[c]', '[', ']',
+              'x', '|k', '|=v', ' ', '\t', '\r', '\r\n', '\n', '\n', '\u3000', '\x0c', '| 别名 = { ', ' [x] ', '|a=}}']
+    rng = random.Random(0)
+    texts = list(_infoboxes(archive_dir)) + MALFORMED
+    for _ in range(20000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randrange(1, 14)))
+        texts.append(rng.choice(['', '{{Infobox\n']) + text + rng.choice(['', '}}', '\n}}', '\n}}\n']))
+    extractor = InfoboxExtractor(['简体中文名', '别名'])
+    for text in texts:
+        wiki = _parse(text)
+        assert well_formed(text) == (wiki is not None), text
+        expected = [] if wiki is None else [(f.key, _plain(f.value)) for f in wiki.fields
+                                            if f.key in ('简体中文名', '别名')]
+        assert [(k, _plain(v)) for k, v in extractor.fields(text)] == expected, text
+
+
+def test_ignore_case_reports_canonical_key():
+    extractor = InfoboxExtractor(['ISBN'], ignore_case=True)
+    assert extractor.first('{{Infobox\n|isbn= 9784040000000\n}}') == {'ISBN': '9784040000000'}
@@ -0,0 +1,108 @@
+"""MinHash 签名与 LSH 候选对：与逐对暴力计算一致。"""
+
+import csv
+import io
+import itertools
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from find_dup_person_name import fuzzy_groups, person_identifiers
+from minhash import NUM_PERM, MinHashLSH, ngrams, signature
+from union_find import UnionFind
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_ngrams():
+    assert ngrams('ab') == {'\x02a', 'ab', 'b\x03'}
+    assert ngrams('', 3) == {'\x02\x03'}
+    assert signature(set()) is None
+
+
+def test_signature_estimates_jaccard():
+    rng = random.Random(1)
+    errors = []
+    for _ in range(300):
+        base = {str(rng.randrange(10 ** 6)) for _ in range(40)}
+        other = set(rng.sample(sorted(base), rng.randrange(1, 40))) | {str(-i) for i in range(rng.randrange(40))}
+        lsh = MinHashLSH()
+        lsh.add(signature(base))
+        lsh.add(signature(other))
+        errors.append(abs(lsh.similarity(0, 1) - _jaccard(base, other)))
+    assert sum(errors) / len(errors) < 0.08
+    assert signature({'x', 'y'}) == signature({'y', 'x'})
+
+
+def _brute_force_pairs(lsh, threshold):
+    """任一段签名完全相同、且估计相似度达到阈值的所有对。"""
+    rows = lsh.rows
+    sigs = [lsh.signatures[i * NUM_PERM:(i + 1) * NUM_PERM] for i in range(len(lsh))]
+    result = set()
+    for i, j in itertools.combinations(range(len(lsh)), 2):
+        if any(sigs[i][b * rows:(b + 1) * rows] == sigs[j][b * rows:(b + 1) * rows] for b in range(lsh.bands)):
+            sim = lsh.similarity(i, j)
+            if sim >= threshold:
+                result.add((i, j, sim))
+    return result
+
+
+@pytest.mark.parametrize('bands', [4, 8, 16])
+def test_pairs_match_brute_force(bands):
+    rng = random.Random(bands)
+    words = ['さとう', 'たかはし', 'すずき', 'ゆい', 'あいこ', 'Satou', 'Yui', '佐藤', '結衣']
+    lsh = MinHashLSH(bands, max_bucket=10 ** 6)
+    for _ in range(300):
+        text = ''.join(rng.sample(words, 2)) + rng.choice(['', 'ちゃん', 'A'])
+        lsh.add(signature(ngrams(text)))
+    got = list(lsh.pairs(0.5))
+    assert len(got) == len(set((i, j) for i, j, _ in got))
+    assert all(i < j for i, j, _ in got)
+    assert set(got) == _brute_force_pairs(lsh, 0.5)
+    assert lsh.skipped_buckets == 0
+
+
+def test_fuzzy_groups_match_reference():
+    rng = random.Random(2)
+    ids, names, aliases = [], [], []
+    for pid in range(1, 400):
+        ids.append(pid * 3)
+        names.append(rng.choice(['佐藤', '鈴木', '高橋', '髙橋', 'ソフィア']) + rng.choice(['結衣', '愛', '一郎']))
+        aliases.append('\n'.join(rng.sample(['ゆい', 'あい', 'さとう', 'yui', 'ai'], 2)))
+    groups = fuzzy_groups(ids, names, aliases, threshold=0.6, max_bucket=10 ** 6, max_group=10 ** 6)
+
+    # 参照：用同样的签名，对所有在某段相同的对逐一判定再合并
+    lsh = MinHashLSH(max_bucket=10 ** 6)
+    for name, al in zip(names, aliases):
+        grams = set().union(*(ngrams(ident) for ident in person_identifiers(name, al)))
+        lsh.add(signature(grams))
+    uf = UnionFind(len(lsh))
+    for i, j, _ in _brute_force_pairs(lsh, 0.6):
+        uf.union(i, j)
+    expected = sorted(sorted(ids[i] for i in members) for members in uf.components())
+    assert [members for _, members in groups] == expected
+    assert all(0.6 <= score <= 1 for score, _ in groups)
+
+
+def test_fuzzy_cli_keeps_sync_columns(archive_dir, tmp_path):
+    scores = str(tmp_path / 'scores.csv')
+    out = subprocess.run([sys.executable, os.path.join(ROOT, 'find_dup_person_name.py'),
+                          os.path.join(archive_dir, 'person.jsonlines'), '--no-cache', '--mode', 'fuzzy',
+                          '--scores', scores],
+                         cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+    rows = list(csv.reader(io.StringIO(out)))
+    assert rows[0] == ['person_id', 'order'] and len(rows) > 1
+    with open(scores, encoding='utf-8') as f:
+        score_rows = list(csv.reader(f))
+    assert score_rows[0] == ['order', 'size', 'score']
+    sizes = {}
+    for _, order in rows[1:]:
+        sizes[order] = sizes.get(order, 0) + 1
+    assert {order: int(size) for order, size, _ in score_rows[1:]} == sizes
@@ -0,0 +1,36 @@
+"""批量归一化与逐个调用一致。"""
+
+import json
+import os
+
+import pytest
+
+from name_normalize import (normalize_alias, normalize_aliases, normalize_name, normalize_names,
+                            normalize_text, normalize_texts)
+
+EDGE_CASES = ['', ' ', '髙橋 一郎', '龍竜竝', 'ｻﾄｳ ﾀﾛｳ', 'サトウ-タロウ', 'ＡＢＣ', 'Ⅲ 巻！', 'a\x00b', '　x\n']
+
+
+def _names(archive_dir):
+    with open(os.path.join(archive_dir, 'person.jsonlines'), encoding='utf-8') as f:
+        names = [json.loads(line)['name'] for line in f]
+    with open(os.path.join(archive_dir, 'subject.jsonlines'), encoding='utf-8') as f:
+        names += [json.loads(line)['name'] for line in f]
+    return names + EDGE_CASES
+
+
+@pytest.mark.parametrize('single, batch', [
+    (normalize_name, normalize_names),
+    (normalize_alias, normalize_aliases),
+    (normalize_text, normalize_texts),
+])
+def test_batch_matches_single(archive_dir, single, batch):
+    texts = _names(archive_dir)
+    assert batch(texts) == [single(t) for t in texts]
+    assert batch(iter(EDGE_CASES)) == [single(t) for t in EDGE_CASES]
+
+
+def test_variant_map():
+    assert normalize_name('髙橋') == normalize_name('高橋')
+    assert normalize_name('龍') == '竜' and normalize_name('竜') == '竜'
+    assert normalize_name('竝') == '並'
@@ -0,0 +1,30 @@
+"""紧凑别名构建器与 AliasBuilder 结果相同。"""
+
+import os
+
+from archive_scan import scan
+from person_alias import AliasBuilder, CompactAliasBuilder
+
+
+def test_compact_builder_matches(archive_dir):
+    for name in ('person.jsonlines', 'character.jsonlines'):
+        path = os.path.join(archive_dir, name)
+        plain, = scan(path, AliasBuilder())
+        compact, = scan(path, CompactAliasBuilder())
+        expected, got = plain.result(), compact.result()
+        assert got[0] == expected[0]
+        assert list(got[1].items()) == list(expected[1].items())
+
+
+def test_compact_builder_repeated_persons():
+    rows = [
+        {'id': 1, 'name': '甲', 'infobox': '{{Infobox\n|别名={\n[x]\n[y]\n}\n}}'},
+        {'id': 2, 'name': '乙', 'infobox': '{{Infobox\n|别名={\n[x]\n}\n}}'},
+        {'id': 1, 'name': '甲', 'infobox': '{{Infobox\n|别名={\n[z]\n[x]\n}\n}}'},
+        {'id': 3, 'name': '丙'},
+    ]
+    plain, compact = AliasBuilder(), CompactAliasBuilder()
+    for ln, row in enumerate(rows, 1):
+        plain.feed(ln, row)
+        compact.feed(ln, row)
+    assert compact.result() == plain.result()
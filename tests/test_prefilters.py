@@ -0,0 +1,86 @@
+"""原始字节行预筛只拒绝 feed 本来也会丢弃的行。"""
+
+import itertools
+import json
+import os
+
+import pytest
+
+from archive_scan import scan
+from find_dup_person_name import DupNameGrouper
+from find_duplicate_isbns import IsbnCollector
+from find_missing_cn_name import MissingCnNameScanner
+
+CN_VALUES = ['张三', ' 张三', '　张三', ' 张三', '', '{', '"张三"', '\\张三', '|张三', 'A']
+NAMES = ['張三', 'さとう', '', 'A\\"B', '張\t三', 'ｻﾄｳ']
+ISBN_LINES = ['', '|ISBN= 978-4-04-000000-0', '|isbn=9784040000000', 'ISBN：9784040000000',
+              '|版本特性={\n[ISBN|9784040000001]\n}', '说明 isbn: 9784040000002']
+
+
+def _infoboxes():
+    for value, indent, newline in itertools.product(CN_VALUES, ['', ' ', '\t'], ['\n', '\r\n']):
+        cn = f'{indent}|简体中文名={value}'
+        yield newline.join(['{{Infobox Person', cn, '|性别= 男', '}}'])
+        yield newline.join(['{{Infobox Person', '|性别= 男', cn, '}}'])
+        yield newline.join(['{{Infobox Person', cn])
+        yield newline.join(['{{Infobox Person', cn, '|简体中文名=李四', '}}'])
+        yield newline.join(['{{Infobox Person', '|别名={', f'[简体中文名|{value}]', '}', '}}'])
+        yield newline.join(['{{Infobox Person', f'|备注= 见{cn}', '}}'])
+        # 格式有误：数组中出现字段行、数组未结束
+        yield newline.join(['{{Infobox Person', '|别名={', '[x]', cn, '}', '}}'])
+        yield newline.join(['{{Infobox Person', cn, '|别名={', '[x]', '}}'])
+    yield ''
+    yield '{{Infobox Person\n}}'
+    for isbn in ISBN_LINES:
+        yield f'{{{{Infobox animanga/Book\n{isbn}\n|简体中文名=张三\n}}}}'
+
+
+def _lines():
+    for i, (infobox, name) in enumerate(itertools.product(_infoboxes(), NAMES), 1):
+        obj = {'id': i, 'name': name, 'infobox': infobox}
+        for ensure_ascii in (False, True):
+            yield obj, json.dumps(obj, ensure_ascii=ensure_ascii, separators=(',', ':')).encode() + b'\n'
+
+
+def _state(consumer):
+    if isinstance(consumer, MissingCnNameScanner):
+        return consumer.candidates
+    if isinstance(consumer, IsbnCollector):
+        return dict(consumer.isbn_map)
+    return consumer.name_groups
+
+
+@pytest.mark.parametrize('make', [MissingCnNameScanner, lambda: IsbnCollector(set()), DupNameGrouper])
+def test_rejected_lines_are_discarded_by_feed(make):
+    rejected = 0
+    for obj, raw in _lines():
+        if make().prefilter(raw):
+            continue
+        rejected += 1
+        consumer = make()
+        consumer.feed(1, obj)
+        assert not _state(consumer), raw
+    assert rejected
+
+
+class NoPrefilter:
+    """去掉预筛的同一消费者。"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def feed(self, ln, obj):
+        self.inner.feed(ln, obj)
+
+
+@pytest.mark.parametrize('name, make', [
+    ('person.jsonlines', MissingCnNameScanner),
+    ('character.jsonlines', MissingCnNameScanner),
+    ('person.jsonlines', DupNameGrouper),
+    ('subject.jsonlines', lambda: IsbnCollector(set())),
+])
+def test_prefiltered_scan_matches_full_decode(archive_dir, name, make):
+    path = os.path.join(archive_dir, name)
+    filtered, = scan(path, make())
+    full, = scan(path, NoPrefilter(make()))
+    assert _state(filtered) == _state(full.inner)
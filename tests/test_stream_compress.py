@@ -0,0 +1,98 @@
+"""流式输出：各压缩文件解压后与原文逐字节相同，gzip 为单成员标准格式。"""
+
+import gzip
+import json
+import os
+import random
+import zlib
+
+import pytest
+
+from person_alias import iter_alias_json, parse_bangumi_person_jsonlines, write_alias_json
+from stream_compress import StreamOutputs
+
+BLOCK = 4096
+
+
+def _payloads():
+    rng = random.Random(0)
+    text = ''.join(rng.choice('ねこ猫ABC ,:[]{}') for _ in range(10 * BLOCK)).encode('utf-8')
+    noise = rng.randbytes(3 * BLOCK + 17)
+    for size in (0, 1, BLOCK - 1, BLOCK, BLOCK + 1, 5 * BLOCK + 3):
+        yield text[:size]
+    yield noise
+    yield text + noise + text
+
+
+def _write(paths, data, threads, pieces=7):
+    with StreamOutputs(paths, threads=threads, block_size=BLOCK) as out:
+        step = max(1, len(data) // pieces)
+        for i in range(0, len(data), step):
+            out.write(data[i:i + step])
+
+
+def _single_member(blob):
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = d.decompress(blob) + d.flush()
+    assert d.eof and d.unused_data == b''
+    return out
+
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_gzip_round_trip(tmp_path, threads):
+    raw, gz = str(tmp_path / 'x.json'), str(tmp_path / 'x.json.gz')
+    for data in _payloads():
+        _write([raw, gz], data, threads)
+        with open(raw, 'rb') as f:
+            assert f.read() == data
+        with open(gz, 'rb') as f:
+            blob = f.read()
+        assert gzip.decompress(blob) == data
+        assert _single_member(blob) == data
+    assert sorted(os.listdir(tmp_path)) == ['x.json', 'x.json.gz']
+
+
+def test_gzip_output_is_reproducible(tmp_path):
+    data = b''.join(_payloads())
+    blobs = []
+    for threads in (1, 3, 8):
+        path = str(tmp_path / f'{threads}.gz')
+        _write([path], data, threads)
+        with open(path, 'rb') as f:
+            blobs.append(f.read())
+    assert blobs[0] == blobs[1] == blobs[2]
+
+
+@pytest.mark.parametrize('ext, module', [('.zst', 'zstandard'), ('.br', 'brotli')])
+def test_other_formats_round_trip(tmp_path, ext, module):
+    lib = pytest.importorskip(module)
+    path = str(tmp_path / ('x' + ext))
+    data = b''.join(_payloads())
+    _write([path], data, 2)
+    with open(path, 'rb') as f:
+        blob = f.read()
+    if module == 'zstandard':
+        assert lib.ZstdDecompressor().decompressobj().decompress(blob) == data
+    else:
+        assert lib.decompress(blob) == data
+
+
+def test_error_leaves_no_files(tmp_path):
+    paths = [str(tmp_path / 'x.json'), str(tmp_path / 'x.json.gz')]
+    with pytest.raises(RuntimeError):
+        with StreamOutputs(paths, block_size=BLOCK) as out:
+            out.write(b'x' * 3 * BLOCK)
+            raise RuntimeError
+    assert os.listdir(tmp_path) == []
+
+
+def test_alias_json_matches_json_dumps(archive_dir, tmp_path):
+    mapping = parse_bangumi_person_jsonlines(os.path.join(archive_dir, 'person.jsonlines'), workers=1)
+    expected = json.dumps(mapping, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    assert ''.join(iter_alias_json(mapping, chunk=100)) == expected
+    raw, gz = str(tmp_path / 'a.json'), str(tmp_path / 'a.json.gz')
+    write_alias_json(mapping, raw, [gz], threads=2)
+    with open(raw, encoding='utf-8') as f:
+        assert f.read() == expected
+    with open(gz, 'rb') as f:
+        assert gzip.decompress(f.read()).decode('utf-8') == expected
@@ -0,0 +1,71 @@
+"""并查集与按共有标识分组：与按图遍历求连通分量的结果一致。"""
+
+import random
+
+from find_dup_person_name import person_identifiers, union_groups
+from union_find import UnionFind
+
+
+def _components(n, edges):
+    adjacency = [[] for _ in range(n)]
+    for a, b in edges:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    seen, result = set(), []
+    for start in range(n):
+        if start in seen:
+            continue
+        stack, members = [start], []
+        seen.add(start)
+        while stack:
+            i = stack.pop()
+            members.append(i)
+            for j in adjacency[i]:
+                if j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        result.append(sorted(members))
+    return result
+
+
+def test_union_find_matches_graph_components():
+    rng = random.Random(0)
+    for n in (1, 10, 500):
+        edges = [(rng.randrange(n), rng.randrange(n)) for _ in range(n * 3 // 4)]
+        uf = UnionFind(n)
+        for a, b in edges:
+            uf.union(a, b)
+        expected = _components(n, edges)
+        assert uf.components(min_size=1) == expected
+        assert uf.components() == [c for c in expected if len(c) >= 2]
+        assert all(uf.component_size(c[0]) == len(c) for c in expected)
+
+
+def test_add_extends_sets():
+    uf = UnionFind()
+    a, b, c = uf.add(), uf.add(), uf.add()
+    uf.union(a, c)
+    assert len(uf) == 3 and uf.find(a) == uf.find(c) != uf.find(b)
+
+
+def test_union_groups_match_shared_identifiers():
+    rng = random.Random(4)
+    pool = ['佐藤結衣', 'さとう ゆい', 'Satou Yui', 'ゆいちゃん', '鈴木愛', 'すずき あい', '髙橋一郎', '高橋一郎', 'ソフィア']
+    ids = list(range(1, 301))
+    names = [rng.choice(pool) + rng.choice(['', '', 'X']) for _ in ids]
+    aliases = ['\n'.join(rng.sample(pool, rng.randrange(3))) for _ in ids]
+
+    owners = {}
+    edges = []
+    for i, (name, al) in enumerate(zip(names, aliases)):
+        for ident in person_identifiers(name, al):
+            edges.append((owners.setdefault(ident, i), i))
+    expected = [[ids[i] for i in c] for c in _components(len(ids), edges) if len(c) >= 2]
+    assert union_groups(ids, names, aliases, max_group=10 ** 6) == expected
+
+
+def test_union_groups_respect_max_group():
+    names = [f'人物{i}' for i in range(50)]
+    aliases = ['共同别名'] * 50
+    groups = union_groups(list(range(1, 51)), names, aliases, max_group=20)
+    assert [len(g) for g in groups] == [20]
@@ -0,0 +1,50 @@
+"""数组实现的并查集，按大小合并并做路径压缩，合并 / 查找均摊近似常数时间。"""
+
+from array import array
+
+
+class UnionFind:
+    """元素为 0..n-1 的整数；add() 追加新元素。"""
+
+    def __init__(self, n=0):
+        self.parent = array('i', range(n))
+        self.size = array('i', [1]) * n
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self):
+        i = len(self.parent)
+        self.parent.append(i)
+        self.size.append(1)
+        return i
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]  # 路径减半
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        """合并 a、b 所在的集合，返回合并后的根。"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+    def component_size(self, i):
+        return self.size[self.find(i)]
+
+    def components(self, min_size=2):
+        """按各集合最小元素的顺序给出至少 min_size 个元素的集合（元素升序）。"""
+        groups = {}
+        for i in range(len(self.parent)):
+            root = self.find(i)
+            if self.size[root] >= min_size:
+                groups.setdefault(root, []).append(i)
+        return list(groups.values())
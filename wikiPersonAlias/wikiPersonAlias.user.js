@@ -2,7 +2,7 @@
 // @name         班固米人物别名本地 API
 // @namespace    https://bgm.tv/
 // @homepage     https://bgm.tv/group/topic/439645
-// @version      2.0.2
+// @version      2.1.1
 // @description  从 wiki archive 自动生成，支持远程更新和本地 .json.gz 文件导入，与其他脚本联合使用
 // @author       Your Name
 // @match        http*://bgm.tv/*
@@ -212,10 +212,20 @@
     showGMNotification({ text: '更新人物别名数据中……' });
 
     try {
+      const prevVersion = GM_getValue('lastPersonAliasVersion', '从未更新');
+      const patched = await tryIncrementalUpdate(prevVersion);
+      if (patched) {
+        registerMainMenu();
+        showGMNotification({
+          title: patched.count ? '增量更新成功' : '已是最新版本',
+          text: `旧版本: ${prevVersion}\n新版本: ${patched.version}\n应用增量补丁 ${patched.count} 个`,
+        });
+        return;
+      }
+
       const data = await downloadAndDecompress(CONFIG.dataBaseUrl + CONFIG.compressedFile);
       await importToIndexedDB(data);
 
-      const prevVersion = GM_getValue('lastPersonAliasVersion', '从未更新');
       const newVersion = await fetchDataVersion();
       GM_setValue('lastPersonAliasVersion', newVersion);
 
@@ -234,25 +244,85 @@
     }
   }
 
-  // 获取数据版本日期（GitHub Pages 上的 data_version.txt）
+  // 获取数据版本日期（GitHub Pages 上的 data_version.txt，首行为当前版本）
   function fetchDataVersion() {
+    return fetchVersionChain().then((chain) => (chain.length ? chain[0][0] : '未知'));
+  }
+
+  // 版本链：首行为当前版本，其后每行 "<旧版本> <补丁文件>"，补丁把旧版本升级到上一行的版本
+  function fetchVersionChain() {
     return new Promise((resolve) => {
       GM_xmlhttpRequest({
         method: 'GET',
         url: CONFIG.dataBaseUrl + CONFIG.versionFile,
         onload: (res) => {
           if (res.status === 200) {
-            const v = String(res.responseText).trim();
-            resolve(v || '未知');
+            const lines = String(res.responseText)
+              .split('\n')
+              .map((line) => line.trim().split(/\s+/))
+              .filter((parts) => parts[0]);
+            resolve(lines);
           } else {
-            resolve('未知');
+            resolve([]);
           }
         },
-        onerror: () => resolve('未知'),
+        onerror: () => resolve([]),
       });
     });
   }
 
+  function fetchJSON(url) {
+    return new Promise((resolve, reject) => {
+      GM_xmlhttpRequest({
+        method: 'GET',
+        url: url,
+        onload: (res) => {
+          if (res.status !== 200) {
+            reject(new Error(`下载文件失败 (HTTP ${res.status})`));
+            return;
+          }
+          try {
+            resolve(JSON.parse(res.responseText));
+          } catch (e) {
+            reject(new Error(`解析JSON失败: ${e.message}`));
+          }
+        },
+        onerror: (err) => reject(new Error(`下载请求出错: ${err.error || '未知错误'}`)),
+        ontimeout: () => reject(new Error('下载超时')),
+      });
+    });
+  }
+
+  /**
+   * 本地版本在版本链中时，依次下载并应用增量补丁，返回 { version, count }；
+   * 本地版本不在链中（过旧或从未远程更新），或下载、应用补丁出错时返回 null，由调用方下载全量文件。
+   * 每个补丁在单独的事务中应用，成功后才记录其目标版本，因此中途出错时本地数据与记录的版本一致
+   */
+  async function tryIncrementalUpdate(localVersion) {
+    const chain = await fetchVersionChain();
+    if (!chain.length) return null;
+    const latest = chain[0][0];
+    if (localVersion === latest) return { version: latest, count: 0 };
+
+    const start = chain.findIndex((parts, i) => i > 0 && parts[0] === localVersion && parts[1]);
+    if (start < 0) return null;
+    try {
+      await initDB();
+      for (let i = start; i >= 1; i--) {
+        const delta = await fetchJSON(CONFIG.dataBaseUrl + chain[i][1]);
+        if (delta.from !== GM_getValue('lastPersonAliasVersion')) {
+          throw new Error(`增量补丁版本不连续: ${delta.from} → ${delta.to}`);
+        }
+        await applyDeltaToIndexedDB(delta);
+        GM_setValue('lastPersonAliasVersion', delta.to);
+      }
+    } catch (err) {
+      console.warn('增量更新失败，改为下载全量文件:', err);
+      return null;
+    }
+    return { version: latest, count: start };
+  }
+
   // 下载并解压远程文件（原有功能，逻辑不变）
   function downloadAndDecompress(url) {
     return new Promise((resolve, reject) => {
@@ -426,6 +496,55 @@
     });
   }
 
+  // 在一个事务内应用增量补丁（格式见仓库 alias_delta.py），失败时整体回滚
+  function applyDeltaToIndexedDB(delta) {
+    return new Promise((resolve, reject) => {
+      const request = indexedDB.open(CONFIG.dbName, CONFIG.dbVersion);
+      request.onsuccess = (e) => {
+        const db = e.target.result;
+        const tx = db.transaction(['persons', 'aliases'], 'readwrite');
+        const personsStore = tx.objectStore('persons');
+        const aliasesStore = tx.objectStore('aliases');
+
+        // [index] 为已删除的人物（全量文件中该位置为 []，导入时跳过）
+        delta.persons.forEach(([index, name, id]) => {
+          if (name === undefined) {
+            personsStore.delete(index);
+          } else {
+            personsStore.put({ index: index, name: name, id: id });
+          }
+        });
+
+        const changed = new Set([...Object.keys(delta.remove), ...Object.keys(delta.add)]);
+        changed.forEach((alias) => {
+          const getReq = aliasesStore.get(alias);
+          getReq.onsuccess = () => {
+            const removed = new Set(delta.remove[alias] || []);
+            const indexes = new Set((getReq.result?.personIndexes || []).filter((i) => !removed.has(i)));
+            (delta.add[alias] || []).forEach((i) => indexes.add(i));
+            if (indexes.size) {
+              aliasesStore.put({ alias: alias, personIndexes: [...indexes].sort((a, b) => a - b) });
+            } else {
+              aliasesStore.delete(alias);
+            }
+          };
+        });
+
+        tx.oncomplete = () => {
+          db.close();
+          resolve();
+        };
+        tx.onerror = (e) => {
+          db.close();
+          reject(new Error(`应用增量补丁失败: ${tx.error?.message || e.target.error}`));
+        };
+      };
+      request.onerror = (e) => {
+        reject(new Error(`打开数据库失败: ${e.target.error.message}`));
+      };
+    });
+  }
+
   unsafeWindow.personAliasQuery = async function (aliasName) {
     const all = await unsafeWindow.personAliasQueryAll(aliasName);
     if (!all || !all.length) return null;